@@ -0,0 +1,138 @@
+"""
+Benchmark sign-in and task CRUD latency under a concurrent login storm.
+
+Runs the auth and task routers in-process against a temporary SQLite database
+and fires a burst of concurrent /auth/signin requests while a second set of
+clients exercises task CRUD. Prints p50/p99 latency for both groups so inline
+bcrypt hashing can be compared with the process pool. The burst signs in one
+account, so the /auth rate limits are disabled; the per-process concurrency
+cap is off unless --max-concurrent is given, and shed requests count as
+rejected:
+
+    python -m benchmarks.bench_auth_load --hash-workers 0   # inline
+    python -m benchmarks.bench_auth_load                    # process pool
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(name, samples):
+    if not samples:
+        print(f"{name:<12} no successful requests")
+        return
+    ms = [s * 1000 for s in samples]
+    print(
+        f"{name:<12} n={len(ms):<5} p50={statistics.median(ms):8.1f} ms "
+        f"p99={percentile(ms, 99):8.1f} ms max={max(ms):8.1f} ms"
+    )
+
+
+async def run(args):
+    import httpx
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse
+    from src.api.auth import router as auth_router
+    from src.api.tasks import router as tasks_router
+    from src.database.engine import create_db_and_tables, engine
+    from src.utils.hashing import HashingPoolSaturatedError, password_hasher
+    from src.utils.rate_limit import OverloadedError, RateLimitedError
+
+    engine.echo = False
+    create_db_and_tables()
+
+    app = FastAPI()
+
+    @app.exception_handler(HashingPoolSaturatedError)
+    async def hashing_saturated_handler(request: Request, exc: HashingPoolSaturatedError):
+        return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+    @app.exception_handler(RateLimitedError)
+    async def rate_limited_handler(request: Request, exc: RateLimitedError):
+        return JSONResponse(status_code=429, content={"detail": str(exc)})
+
+    @app.exception_handler(OverloadedError)
+    async def overloaded_handler(request: Request, exc: OverloadedError):
+        return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+    app.include_router(auth_router, prefix="/auth")
+    app.include_router(tasks_router, prefix="/api/{user_id}")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        credentials = {"email": "bench@example.com", "password": "password123"}
+        user_id = (await client.post("/auth/signup", json=credentials)).json()["id"]
+        token = (await client.post("/auth/signin", json=credentials)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        signin_latency, crud_latency = [], []
+        rejected = 0
+
+        async def signin():
+            nonlocal rejected
+            start = time.perf_counter()
+            response = await client.post("/auth/signin", json=credentials)
+            if response.status_code == 200:
+                signin_latency.append(time.perf_counter() - start)
+            else:
+                rejected += 1
+
+        async def crud(worker):
+            for i in range(args.crud_requests):
+                start = time.perf_counter()
+                await client.post(
+                    f"/api/{user_id}/tasks", json={"title": f"bench {worker}-{i}"}, headers=headers
+                )
+                await client.get(f"/api/{user_id}/tasks", params={"limit": 20}, headers=headers)
+                crud_latency.append((time.perf_counter() - start) / 2)
+
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(signin() for _ in range(args.signins)),
+            *(crud(w) for w in range(args.crud_clients)),
+        )
+        elapsed = time.perf_counter() - started
+
+    password_hasher.shutdown()
+    print(f"hash workers={password_hasher.max_workers} max pending={password_hasher.max_pending} "
+          f"bcrypt rounds={os.environ['BCRYPT_ROUNDS']} wall={elapsed:.2f}s rejected={rejected}")
+    report("signin", signin_latency)
+    report("task CRUD", crud_latency)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--signins", type=int, default=200)
+    parser.add_argument("--crud-clients", type=int, default=10)
+    parser.add_argument("--crud-requests", type=int, default=20)
+    parser.add_argument("--hash-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-pending", type=int, default=None)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--max-concurrent", type=int, default=0, help="AUTH_MAX_CONCURRENT (0: no cap)")
+    args = parser.parse_args()
+
+    # Configuration is read at import time, so set it before importing the app
+    tmpdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmpdir}/bench.db"
+    os.environ["HASH_WORKERS"] = str(args.hash_workers)
+    os.environ["HASH_MAX_PENDING"] = str(args.max_pending or args.signins)
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    os.environ["AUTH_MAX_CONCURRENT"] = str(args.max_concurrent)
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
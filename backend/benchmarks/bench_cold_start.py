@@ -0,0 +1,102 @@
+"""
+Benchmark worker cold start: the time from launching uvicorn to the first
+successful authenticated request.
+
+Each run starts a fresh ``uvicorn src.main:app`` process against a temporary
+SQLite database (schema created beforehand with ``python -m src.cli init-db``)
+and polls ``GET /api/{user_id}/tasks`` until it returns 200. The import time of
+``src.main`` in a fresh interpreter is reported alongside:
+
+    python -m benchmarks.bench_cold_start --runs 5
+    python -m benchmarks.bench_cold_start --init-on-startup   # create_all on every boot
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def import_time(env):
+    code = "import time; start = time.perf_counter(); import src.main; print(time.perf_counter() - start)"
+    output = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def first_request_time(env, url, headers, timeout):
+    port = url.split(":")[2].split("/")[0]
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--port", port, "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except (urllib.error.URLError, ConnectionError):
+                pass
+            time.sleep(0.005)
+        raise RuntimeError(f"No successful response within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def report(name, samples):
+    ms = [s * 1000 for s in samples]
+    print(f"{name:<20} min={min(ms):8.1f} ms median={statistics.median(ms):8.1f} ms max={max(ms):8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--init-on-startup", action="store_true", help="Set DB_INIT_ON_STARTUP for the server")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{tmp}/cold_start.db",
+            "USE_ASYNC_DB": "false",
+            "HASH_WORKERS": "0",
+            "DB_INIT_ON_STARTUP": "true" if args.init_on_startup else "false",
+        }
+        subprocess.run([sys.executable, "-m", "src.cli", "init-db"], env=env, check=True, stdout=subprocess.DEVNULL)
+
+        os.environ.update(env)
+        from src.utils.security import create_access_token
+
+        user_id = str(uuid.uuid4())
+        token = create_access_token({"sub": user_id, "email": "bench@example.com"})
+        headers = {"Authorization": f"Bearer {token}"}
+
+        imports, first_requests = [], []
+        for _ in range(args.runs):
+            imports.append(import_time(env))
+            url = f"http://127.0.0.1:{free_port()}/api/{user_id}/tasks"
+            first_requests.append(first_request_time(env, url, headers, args.timeout))
+
+    report("import src.main", imports)
+    report("first request", first_requests)
+
+
+if __name__ == "__main__":
+    main()
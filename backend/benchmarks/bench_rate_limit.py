@@ -0,0 +1,77 @@
+"""
+Benchmark the overhead the auth rate limiting and concurrency admission add
+to a request.
+
+    hit         RateLimiter.hit on the in-memory backend, over many distinct
+                keys so the bucket LRU is exercised
+    request     a no-op POST endpoint shaped like /auth/signin, served in
+                process, without and with the signin guards (IP and email
+                buckets plus the concurrency slot); the difference is the
+                per-request cost of the guards
+
+    python -m benchmarks.bench_rate_limit --requests 5000
+"""
+import argparse
+import asyncio
+import os
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hits", type=int, default=200_000)
+    parser.add_argument("--keys", type=int, default=50_000)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    # High limits so every request is admitted and does the full check
+    for rule in ("SIGNIN_IP", "SIGNIN_EMAIL"):
+        os.environ[f"RATE_LIMIT_{rule}"] = "1000000000/second"
+
+    import httpx
+    from fastapi import FastAPI
+    from src.api.auth import SIGNIN_GUARDS, SignInRequest
+    from src.utils.rate_limit import MemoryRateLimitBackend, RateLimiter
+
+    limiter = RateLimiter(MemoryRateLimitBackend(), {"bench": "1000000000/second"})
+
+    async def hits():
+        start = time.perf_counter()
+        for i in range(args.hits):
+            await limiter.hit("bench", str(i % args.keys))
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(hits())
+    print(f"{'hit':<16} {elapsed / args.hits * 1e6:8.2f} us")
+
+    app = FastAPI()
+
+    @app.post("/plain")
+    async def plain(credentials: SignInRequest):
+        return {}
+
+    @app.post("/guarded", dependencies=SIGNIN_GUARDS)
+    async def guarded(credentials: SignInRequest):
+        return {}
+
+    async def requests(path):
+        transport = httpx.ASGITransport(app=app, client=("10.0.0.1", 1234))
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            body = {"email": "bench@example.com", "password": "password123"}
+            for _ in range(200):
+                await client.post(path, json=body)
+            start = time.perf_counter()
+            for i in range(args.requests):
+                body["email"] = f"user{i}@example.com"
+                response = await client.post(path, json=body)
+                assert response.status_code == 200, response.text
+            return (time.perf_counter() - start) / args.requests
+
+    plain_time = asyncio.run(requests("/plain"))
+    guarded_time = asyncio.run(requests("/guarded"))
+    print(f"{'request plain':<16} {plain_time * 1e6:8.1f} us")
+    print(f"{'request guarded':<16} {guarded_time * 1e6:8.1f} us  (+{(guarded_time - plain_time) * 1e6:.1f} us)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Benchmark password reset token invalidation and purging on a table full of
+stale tokens.
+
+Fills ``passwordresettoken`` with N used or expired tokens spread over many
+users (one active token each) and reports:
+
+    invalidate  the per-request "mark my unused tokens used" step, as the old
+                SELECT-then-update-each-row loop and as the single UPDATE,
+                without and then with the (user_id, used) and partial
+                active-token indexes
+    purge       deleting every stale token in batches: total time, rows/s and
+                the longest batch, which bounds how long locks are held
+
+    python -m benchmarks.bench_reset_tokens --tokens 2000000
+    python -m benchmarks.bench_reset_tokens --url postgresql+psycopg2://...
+
+The token table is dropped and recreated, so point --url at a scratch database.
+"""
+import argparse
+import os
+import random
+import secrets
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+INDEXES = ("ix_passwordresettoken_user_used", "ix_passwordresettoken_active")
+
+
+def report(name, samples):
+    ms = [s * 1000 for s in samples]
+    print(f"{name:<28} median={statistics.median(ms):9.2f} ms max={max(ms):9.2f} ms")
+
+
+def fill(engine, users, tokens, chunk=50_000):
+    from sqlalchemy import insert
+    from src.models.password_reset import PasswordResetToken
+    from src.models.user import User
+
+    now = datetime.utcnow()
+    user_ids = [uuid.uuid4() for _ in range(users)]
+    with engine.begin() as connection:
+        connection.execute(insert(User.__table__), [
+            {"id": user_id, "email": f"bench-{user_id}@example.com", "password_hash": "x", "created_at": now, "updated_at": now}
+            for user_id in user_ids
+        ])
+        # One active token per user
+        connection.execute(insert(PasswordResetToken.__table__), [
+            {"user_id": user_id, "token": secrets.token_urlsafe(32), "expires_at": now + timedelta(hours=1), "used": False, "created_at": now}
+            for user_id in user_ids
+        ])
+    for start in range(0, tokens, chunk):
+        rows = []
+        for i in range(start, min(tokens, start + chunk)):
+            used = i % 2 == 0
+            created_at = now - timedelta(days=1 + i % 90)
+            rows.append({
+                "user_id": user_ids[i % users],
+                "token": secrets.token_urlsafe(32),
+                # A few used tokens are still unexpired; the rest expired long ago
+                "expires_at": now + timedelta(minutes=30) if used and i % 10 == 0 else created_at + timedelta(hours=1),
+                "used": used,
+                "created_at": created_at,
+            })
+        with engine.begin() as connection:
+            connection.execute(insert(PasswordResetToken.__table__), rows)
+    return user_ids
+
+
+def time_invalidation(engine, user_ids, runs):
+    from sqlmodel import Session, select
+    from src.models.password_reset import PasswordResetToken, invalidate_user_tokens
+
+    def loop(session, user_id):
+        tokens = session.exec(
+            select(PasswordResetToken).where(PasswordResetToken.user_id == user_id, PasswordResetToken.used == False)  # noqa: E712
+        ).all()
+        for token in tokens:
+            token.used = True
+            session.add(token)
+        session.flush()
+
+    def update(session, user_id):
+        session.execute(invalidate_user_tokens(user_id))
+
+    results = {}
+    for name, fn in (("loop", loop), ("update", update)):
+        samples = []
+        for user_id in random.sample(user_ids, runs):
+            with Session(engine) as session:
+                start = time.perf_counter()
+                fn(session, user_id)
+                samples.append(time.perf_counter() - start)
+                session.rollback()
+        results[name] = samples
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=2_000_000, help="Stale tokens")
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--runs", type=int, default=50, help="Invalidations timed per variant")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--url", help="Database URL (default: a temporary SQLite file)")
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = args.url or f"sqlite:///{tmp.name}/reset_tokens.db"
+    # The bulk inserts and purge batches are slow by design; keep them out of the log
+    os.environ.setdefault("DB_SLOW_QUERY_MS", "60000")
+
+    from sqlalchemy import delete, text
+    from sqlmodel import Session, SQLModel
+    from src.database.engine import engine
+    from src.models.password_reset import PasswordResetToken
+    from src.models.user import User
+    from src.services.maintenance import purge_password_reset_tokens
+
+    table = PasswordResetToken.__table__
+    SQLModel.metadata.drop_all(engine, tables=[table])
+    SQLModel.metadata.create_all(engine, tables=[User.__table__, table])
+    indexes = [index for index in table.indexes if index.name in INDEXES]
+    with engine.begin() as connection:
+        for index in indexes:
+            index.drop(connection)
+
+    start = time.perf_counter()
+    user_ids = fill(engine, args.users, args.tokens)
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE passwordresettoken"))
+    print(f"{args.users + args.tokens} tokens in {time.perf_counter() - start:.1f}s ({engine.dialect.name})\n")
+
+    for label in ("no indexes", "indexes"):
+        if label == "indexes":
+            with engine.begin() as connection:
+                for index in indexes:
+                    index.create(connection)
+                connection.execute(text("ANALYZE passwordresettoken"))
+        for name, samples in time_invalidation(engine, user_ids, args.runs).items():
+            report(f"invalidate {name} ({label})", samples)
+
+    batches = []
+    deleted = 0
+    start = time.perf_counter()
+    with Session(engine) as session:
+        while True:
+            batch_start = time.perf_counter()
+            count = purge_password_reset_tokens(session, batch_size=args.batch_size, max_batches=1)
+            batches.append(time.perf_counter() - batch_start)
+            deleted += count
+            if count < args.batch_size:
+                break
+    elapsed = time.perf_counter() - start
+    print(
+        f"\npurge: {deleted} rows in {elapsed:.1f}s ({deleted / elapsed:,.0f} rows/s), "
+        f"{len(batches)} batches, longest {max(batches) * 1000:.1f} ms"
+    )
+    with engine.connect() as connection:
+        remaining = connection.execute(text("SELECT count(*) FROM passwordresettoken")).scalar()
+    print(f"remaining tokens: {remaining} (one active per user)")
+
+    SQLModel.metadata.drop_all(engine, tables=[table])
+    with engine.begin() as connection:
+        connection.execute(delete(User).where(User.email.like("bench-%@example.com")))
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark serializing large task lists to JSON.
+
+Loads N tasks from an in-memory SQLite database and times each way of turning
+them into a response body, reporting the best of several runs:
+
+    response_model  a TaskRead per row, revalidated and encoded the way FastAPI
+                    handles ``response_model=List[TaskRead]``
+    models          a TaskRead per row dumped by pydantic-core
+    rows            serialize_task_list: plain dicts against the TaskReadRow schema
+
+It also compares loading the tasks as ORM instances with loading their columns
+as plain rows, as the export does:
+
+    python -m benchmarks.bench_task_serialization --tasks 10000
+"""
+import argparse
+import datetime
+import json
+import time
+import uuid
+from typing import List
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def report(name, seconds, baseline=None):
+    speedup = f"  {baseline / seconds:5.1f}x" if baseline else ""
+    print(f"{name:<16} {seconds * 1000:8.1f} ms{speedup}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+    from sqlmodel import Session, SQLModel, create_engine
+    from sqlmodel.pool import StaticPool
+    from src.api.tasks import serialize_task_list, task_to_read
+    from src.models.task import Task, TaskRead
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    user_id = str(uuid.uuid4())
+    now = datetime.datetime.utcnow()
+    with Session(engine) as session:
+        session.add_all(
+            Task(
+                title=f"Task {i}",
+                description="Benchmark task description",
+                user_id=user_id,
+                completed=i % 4 == 0,
+                due_date=now + datetime.timedelta(days=i % 30 - 15) if i % 3 else None,
+            )
+            for i in range(args.tasks)
+        )
+        session.commit()
+
+    session = Session(engine)
+    tasks = session.exec(select(Task)).scalars().all()
+    task_list_adapter = TypeAdapter(List[TaskRead])
+
+    def response_model():
+        value = task_list_adapter.validate_python([task_to_read(task) for task in tasks])
+        return json.dumps(task_list_adapter.dump_python(value, mode="json")).encode()
+
+    def models():
+        return task_list_adapter.dump_json([task_to_read(task) for task in tasks])
+
+    def rows():
+        return serialize_task_list(tasks)
+
+    assert json.loads(models()) == json.loads(rows())
+
+    print(f"Serializing {args.tasks} tasks (best of {args.repeat})")
+    baseline = best_of(args.repeat, response_model)
+    report("response_model", baseline)
+    report("models", best_of(args.repeat, models), baseline)
+    report("rows", best_of(args.repeat, rows), baseline)
+
+    print(f"Loading {args.tasks} tasks (best of {args.repeat})")
+    baseline = best_of(args.repeat, lambda: Session(engine).exec(select(Task)).scalars().all())
+    report("orm", baseline)
+    report("columns", best_of(args.repeat, lambda: Session(engine).execute(select(*Task.__table__.columns)).all()), baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Alembic environment for the backend schema.
+
+Migrations run through the application's own engine, so DATABASE_URL and the
+PostgreSQL connection settings in src.database.engine apply unchanged. Tests
+and tools can pass an open connection in ``config.attributes["connection"]``
+instead.
+
+Each revision runs in its own transaction, which lets revisions step outside
+it with ``autocommit_block()`` for ``CREATE INDEX CONCURRENTLY`` and batched
+backfills (see src.database.migrations).
+"""
+from logging.config import fileConfig
+
+from alembic import context
+from sqlmodel import SQLModel
+
+from src.database.engine import engine
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = SQLModel.metadata
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    # The SQLite FTS5 index and its shadow tables are created by the search
+    # revision, not declared as models; keep autogenerate from dropping them
+    if type_ == "table" and name.startswith("task_fts"):
+        return False
+    return True
+
+
+def configure(**kwargs):
+    context.configure(
+        target_metadata=target_metadata,
+        include_object=include_object,
+        transaction_per_migration=True,
+        **kwargs,
+    )
+
+
+def run_migrations_offline() -> None:
+    """Emit the migration SQL to stdout (``alembic upgrade head --sql``)."""
+    configure(
+        url=engine.url.render_as_string(hide_password=False),
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=engine.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_with_connection(connection) -> None:
+    # SQLite cannot ALTER most column properties; batch mode rebuilds the table
+    configure(connection=connection, render_as_batch=connection.dialect.name == "sqlite")
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run_with_connection(connection)
+        return
+    with engine.connect() as connection:
+        run_with_connection(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
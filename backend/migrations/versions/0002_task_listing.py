@@ -0,0 +1,48 @@
+"""Task due dates, priorities and the keyset listing indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+
+The new columns take a constant default, which PostgreSQL 11+ stores in the
+catalog without rewriting the table. The listing indexes are built
+concurrently so the task table stays writable.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel  # noqa: F401  autogenerate renders SQLModel column types
+
+from src.database.migrations import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("task") as batch_op:
+        batch_op.add_column(sa.Column("due_date", sa.DateTime(), nullable=True))
+        batch_op.add_column(
+            sa.Column("priority", sqlmodel.sql.sqltypes.AutoString(), nullable=False, server_default="medium")
+        )
+    create_index_concurrently(
+        "ix_task_user_completed_updated", "task", ["user_id", "completed", "updated_at", "id"]
+    )
+    create_index_concurrently(
+        "ix_task_user_completed_created", "task", ["user_id", "completed", "created_at", "id"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently("ix_task_user_completed_created", "task")
+    drop_index_concurrently("ix_task_user_completed_updated", "task")
+    with op.batch_alter_table("task") as batch_op:
+        batch_op.drop_column("priority")
+        batch_op.drop_column("due_date")
@@ -0,0 +1,48 @@
+"""Task change sequences, tombstones and the per-user task counter
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+
+Existing tasks keep ``seq`` 0, which clients syncing from 0 still receive, so
+no backfill is needed; counters start at 0 and are created on a user's next
+write.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel  # noqa: F401  autogenerate renders SQLModel column types
+
+from src.database.migrations import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "taskcounter",
+        sa.Column("user_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("last_seq", sa.Integer(), nullable=False),
+        sa.Column("purged_seq", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    with op.batch_alter_table("task") as batch_op:
+        batch_op.add_column(sa.Column("seq", sa.Integer(), nullable=False, server_default="0"))
+        batch_op.add_column(sa.Column("deleted_at", sa.DateTime(), nullable=True))
+    create_index_concurrently("ix_task_user_seq", "task", ["user_id", "seq"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently("ix_task_user_seq", "task")
+    with op.batch_alter_table("task") as batch_op:
+        batch_op.drop_column("deleted_at")
+        batch_op.drop_column("seq")
+    op.drop_table("taskcounter")
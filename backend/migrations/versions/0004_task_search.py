@@ -0,0 +1,67 @@
+"""Full-text search index over task titles and descriptions
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+
+PostgreSQL gets a GIN expression index, built concurrently. SQLite gets an
+FTS5 table mirroring task, kept in sync by triggers and filled from the
+existing rows.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel  # noqa: F401  autogenerate renders SQLModel column types
+
+from src.database.migrations import create_index_concurrently, drop_index_concurrently
+# The index expression must match the one search queries use, or PostgreSQL
+# will not pick the index, so it is shared with the model
+from src.models.task import search_document
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TASK_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS task_fts USING fts5("
+    "title, description, content='task', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS task_fts_insert AFTER INSERT ON task BEGIN "
+    "INSERT INTO task_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS task_fts_delete AFTER DELETE ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS task_fts_update AFTER UPDATE OF title, description ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO task_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    # Index the rows that existed before the triggers
+    "INSERT INTO task_fts(task_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        create_index_concurrently(
+            "ix_task_search",
+            "task",
+            [search_document(sa.column("title"), sa.column("description"))],
+            postgresql_using="gin",
+        )
+    elif dialect == "sqlite":
+        for statement in TASK_FTS_DDL:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        drop_index_concurrently("ix_task_search", "task")
+    elif dialect == "sqlite":
+        for trigger in ("task_fts_update", "task_fts_delete", "task_fts_insert"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS task_fts")
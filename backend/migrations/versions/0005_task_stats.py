@@ -0,0 +1,97 @@
+"""Per-user task and completed counts for the stats endpoint
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00
+
+The counts are backfilled from the task table a bounded batch of rows at a
+time, each batch upserting the counters of the users it covers, so no single
+transaction locks more than one batch. Writes made by the previous release
+while the backfill runs do not maintain the counts; run
+``python -m src.cli verify-task-stats --fix`` once the new release is live.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel  # noqa: F401  autogenerate renders SQLModel column types
+from sqlalchemy.dialects import postgresql, sqlite
+
+from src.database.migrations import (
+    backfill_in_batches,
+    create_index_concurrently,
+    drop_index_concurrently,
+    key_range,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+task = sa.table(
+    "task",
+    sa.column("user_id", sa.String),
+    sa.column("completed", sa.Boolean),
+    sa.column("deleted_at", sa.DateTime),
+)
+taskcounter = sa.table(
+    "taskcounter",
+    sa.column("user_id", sa.String),
+    sa.column("last_seq", sa.Integer),
+    sa.column("purged_seq", sa.Integer),
+    sa.column("task_count", sa.Integer),
+    sa.column("completed_count", sa.Integer),
+)
+
+
+def backfill_counts(connection, lower, upper):
+    """
+    Upsert the live task counts of the users with ids in (lower, upper]. The
+    SELECT keeps its WHERE clause even when unbounded, which SQLite needs to
+    parse INSERT ... SELECT ... ON CONFLICT.
+    """
+    counts = (
+        sa.select(
+            task.c.user_id,
+            sa.literal(0),
+            sa.literal(0),
+            sa.func.count(),
+            sa.func.sum(sa.case((task.c.completed, 1), else_=0)),
+        )
+        .where(task.c.deleted_at.is_(None), key_range(task.c.user_id, lower, upper))
+        .group_by(task.c.user_id)
+    )
+    dialect_insert = postgresql.insert if connection.dialect.name == "postgresql" else sqlite.insert
+    statement = dialect_insert(taskcounter).from_select(
+        ["user_id", "last_seq", "purged_seq", "task_count", "completed_count"], counts
+    )
+    connection.execute(
+        statement.on_conflict_do_update(
+            index_elements=["user_id"],
+            set_={
+                "task_count": statement.excluded.task_count,
+                "completed_count": statement.excluded.completed_count,
+            },
+        )
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table("taskcounter") as batch_op:
+        batch_op.add_column(sa.Column("task_count", sa.Integer(), nullable=False, server_default="0"))
+        batch_op.add_column(sa.Column("completed_count", sa.Integer(), nullable=False, server_default="0"))
+    create_index_concurrently("ix_task_user_completed_due", "task", ["user_id", "completed", "due_date"])
+    # Walks ix_task_user_id
+    backfill_in_batches("task", "user_id", backfill_counts)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently("ix_task_user_completed_due", "task")
+    with op.batch_alter_table("taskcounter") as batch_op:
+        batch_op.drop_column("completed_count")
+        batch_op.drop_column("task_count")
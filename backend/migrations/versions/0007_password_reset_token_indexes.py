@@ -0,0 +1,42 @@
+"""Password reset token lookup indexes
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 00:00:00
+
+Built concurrently: the table may hold millions of stale tokens until the
+first maintenance purge runs. ``ix_passwordresettoken_active`` is partial and
+only covers unused tokens.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel  # noqa: F401  autogenerate renders SQLModel column types
+
+from src.database.migrations import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    create_index_concurrently("ix_passwordresettoken_user_used", "passwordresettoken", ["user_id", "used"])
+    create_index_concurrently(
+        "ix_passwordresettoken_active",
+        "passwordresettoken",
+        ["user_id"],
+        postgresql_where=sa.text("NOT used"),
+        sqlite_where=sa.text("used = 0"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently("ix_passwordresettoken_active", "passwordresettoken")
+    drop_index_concurrently("ix_passwordresettoken_user_used", "passwordresettoken")
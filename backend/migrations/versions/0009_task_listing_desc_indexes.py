@@ -0,0 +1,43 @@
+"""Listing indexes in the default sort direction
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 00:00:00
+
+The listing sorts by (completed ASC, <column> DESC, id DESC) by default, which
+an all-ascending index cannot serve in either scan direction unless completed
+is filtered on. The replacements are built concurrently before the old
+indexes are dropped, so listings keep an index throughout.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel  # noqa: F401  autogenerate renders SQLModel column types
+
+from src.database.migrations import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, Sequence[str], None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, column in (("updated", "updated_at"), ("created", "created_at")):
+        create_index_concurrently(
+            f"ix_task_user_completed_{name}_desc",
+            "task",
+            ["user_id", "completed", sa.text(f"{column} DESC"), sa.text("id DESC")],
+        )
+        drop_index_concurrently(f"ix_task_user_completed_{name}", "task")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, column in (("updated", "updated_at"), ("created", "created_at")):
+        create_index_concurrently(f"ix_task_user_completed_{name}", "task", ["user_id", "completed", column, "id"])
+        drop_index_concurrently(f"ix_task_user_completed_{name}_desc", "task")
@@ -0,0 +1,155 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..database.async_engine import get_async_session
+from ..models.user import UserCreate, UserRead
+from ..models.auth_session import revoke_user_sessions
+from ..models.password_reset import PasswordResetToken, invalidate_user_tokens
+from ..services.async_auth_service import AsyncAuthService
+from ..services.email_outbox import email_outbox_worker
+from ..services.email_providers import EMAIL_PROVIDER
+from ..services.email_service import EmailService
+from ..utils.hashing import HashingPoolSaturatedError, password_hasher
+from ..utils.user_cache import user_cache
+from .auth import (
+    FORGOT_PASSWORD_GUARDS,
+    REFRESH_GUARDS,
+    RESET_PASSWORD_GUARDS,
+    SIGNIN_GUARDS,
+    SIGNUP_GUARDS,
+    ForgotPasswordRequest,
+    RefreshRequest,
+    ResetPasswordRequest,
+    SignInRequest,
+    token_response,
+)
+
+# Async counterparts of the routes in auth.py, mounted ahead of them when the
+# async database layer is enabled.
+router = APIRouter()
+
+
+@router.post("/signup", response_model=UserRead, status_code=status.HTTP_201_CREATED, dependencies=SIGNUP_GUARDS)
+async def signup(user_create: UserCreate, session: AsyncSession = Depends(get_async_session)):
+    """Register a new user"""
+    try:
+        db_user = await AsyncAuthService.create_user(session, user_create)
+        return UserRead(id=db_user.id, email=db_user.email, created_at=db_user.created_at)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+    except HashingPoolSaturatedError:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred during registration"
+        )
+
+
+@router.post("/signin", dependencies=SIGNIN_GUARDS)
+async def signin(credentials: SignInRequest, session: AsyncSession = Depends(get_async_session)):
+    """Authenticate a user and return access token"""
+    signed_in = await AsyncAuthService.sign_in(session, credentials.email, credentials.password)
+
+    if not signed_in:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    user, refresh_token = signed_in
+    return token_response(user.id, user.email, refresh_token)
+
+
+@router.post("/refresh", dependencies=REFRESH_GUARDS)
+async def refresh(request: RefreshRequest, session: AsyncSession = Depends(get_async_session)):
+    """Exchange a refresh token for a new access token and a rotated refresh token"""
+    refreshed = await AsyncAuthService.refresh_session(session, request.refresh_token)
+
+    if not refreshed:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return token_response(refreshed.user_id, refreshed.email, refreshed.refresh_token)
+
+
+@router.post("/signout", dependencies=REFRESH_GUARDS)
+async def signout(request: RefreshRequest, session: AsyncSession = Depends(get_async_session)):
+    """End the session a refresh token belongs to"""
+    await AsyncAuthService.end_session(session, request.refresh_token)
+    return {"message": "Signed out"}
+
+
+@router.post("/forgot-password", dependencies=FORGOT_PASSWORD_GUARDS)
+async def forgot_password(request: ForgotPasswordRequest, session: AsyncSession = Depends(get_async_session)):
+    """Request a password reset email"""
+    user = await AsyncAuthService.lookup_credentials(session, request.email)
+
+    # Always return success to prevent email enumeration
+    if not user:
+        return {"message": "If an account with that email exists, a password reset link has been sent."}
+
+    # Invalidate any existing tokens for this user in one UPDATE
+    await session.execute(invalidate_user_tokens(user.id))
+
+    reset_token = PasswordResetToken(
+        user_id=user.id,
+        token=PasswordResetToken.generate_token(),
+        expires_at=PasswordResetToken.get_expiry(hours=1)
+    )
+    session.add(reset_token)
+    # Queued in the same transaction; the outbox worker sends it after the commit
+    reset_link = EmailService.queue_password_reset_email(session, user.email, reset_token.token)
+    await session.commit()
+
+    email_outbox_worker.notify()
+
+    if EMAIL_PROVIDER == "console":
+        # No email provider is configured (development): hand the link back
+        return {
+            "message": "Email service unavailable. Use the link below to reset your password.",
+            "reset_link": reset_link
+        }
+    return {"message": "Password reset link has been sent to your email."}
+
+
+@router.post("/reset-password", dependencies=RESET_PASSWORD_GUARDS)
+async def reset_password(request: ResetPasswordRequest, session: AsyncSession = Depends(get_async_session)):
+    """Reset password using token"""
+    token_record = (await session.exec(
+        select(PasswordResetToken).where(PasswordResetToken.token == request.token)
+    )).first()
+
+    if not token_record or not token_record.is_valid():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid or expired reset token"
+        )
+
+    user = await AsyncAuthService.get_user_by_id(session, token_record.user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User not found"
+        )
+
+    user.password_hash = await password_hasher.hash_async(request.new_password)
+    session.add(user)
+
+    token_record.used = True
+    session.add(token_record)
+
+    await session.execute(revoke_user_sessions(user.id))
+
+    await session.commit()
+    # Drop the old hash from this process's sign-in cache
+    user_cache.invalidate(user.email)
+
+    return {"message": "Password has been reset successfully"}
@@ -0,0 +1,122 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List, Literal, Optional
+from ..database.async_engine import get_async_session
+from ..models.task import TaskCreate, TaskRead, TaskUpdate
+from ..services.async_task_service import AsyncTaskService
+from ..services.task_service import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from ..utils.pagination import InvalidCursorError
+from ..middleware.auth import validate_token
+from ..services.task_cache import compute_etag, task_list_cache
+from .tasks import parse_user_id, serialize_task_list, task_list_response, task_to_read
+
+# Async counterparts of the task CRUD routes in tasks.py. When the async database
+# layer is enabled this router is mounted ahead of the sync one, so these paths are
+# served without holding a threadpool worker for the database round trip. Task ids
+# use the ":int" convertor so other /tasks/<name> routes fall through to tasks.py.
+router = APIRouter()
+
+
+@router.get("/tasks", response_model=List[TaskRead])
+async def get_tasks(
+    user_id: str,
+    completed: Optional[bool] = None,
+    priority: Optional[str] = None,
+    sort: Literal["updated_at", "created_at"] = "updated_at",
+    order: Literal["asc", "desc"] = "desc",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(validate_token),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Get one page of tasks for a specific user"""
+    owner_id = parse_user_id(current_user, user_id, "Not authorized to access these tasks")
+
+    params = {"completed": completed, "priority": priority, "sort": sort, "order": order, "limit": limit, "cursor": cursor}
+    cache_key, cached = await task_list_cache.lookup_async(owner_id, params)
+    if cached:
+        return task_list_response(*cached, if_none_match)
+
+    try:
+        tasks, next_cursor = await AsyncTaskService.get_tasks_page(session, owner_id, **params)
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    body = serialize_task_list(tasks)
+    etag = compute_etag(body)
+    await task_list_cache.store_async(cache_key, body, etag, next_cursor)
+    return task_list_response(body, etag, next_cursor, if_none_match)
+
+
+@router.post("/tasks", response_model=TaskRead, status_code=status.HTTP_201_CREATED)
+async def create_task(user_id: str, task_create: TaskCreate, current_user: dict = Depends(validate_token), session: AsyncSession = Depends(get_async_session)):
+    """Create a new task for a user"""
+    owner_id = parse_user_id(current_user, user_id, "Not authorized to create tasks for this user")
+
+    try:
+        task = await AsyncTaskService.create_task(session, owner_id, task_create)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return task_to_read(task)
+
+
+@router.get("/tasks/{id:int}", response_model=TaskRead)
+async def get_task(user_id: str, id: int, current_user: dict = Depends(validate_token), session: AsyncSession = Depends(get_async_session)):
+    """Get a specific task by ID for a user"""
+    owner_id = parse_user_id(current_user, user_id, "Not authorized to access this task")
+
+    task = await AsyncTaskService.get_task_by_id_and_user(session, id, owner_id)
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+    return task_to_read(task)
+
+
+@router.put("/tasks/{id:int}", response_model=TaskRead)
+async def update_task(user_id: str, id: int, task_update: TaskUpdate, current_user: dict = Depends(validate_token), session: AsyncSession = Depends(get_async_session)):
+    """Update a specific task for a user"""
+    owner_id = parse_user_id(current_user, user_id, "Not authorized to update this task")
+
+    updated_task = await AsyncTaskService.update_task(session, id, owner_id, task_update)
+    if not updated_task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+    return task_to_read(updated_task)
+
+
+@router.delete("/tasks/{id:int}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_task(user_id: str, id: int, current_user: dict = Depends(validate_token), session: AsyncSession = Depends(get_async_session)):
+    """Delete a specific task for a user"""
+    owner_id = parse_user_id(current_user, user_id, "Not authorized to delete this task")
+
+    success = await AsyncTaskService.delete_task(session, id, owner_id)
+    if not success:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+
+
+@router.patch("/tasks/{id:int}/complete", response_model=TaskRead)
+async def toggle_task_completion(user_id: str, id: int, current_user: dict = Depends(validate_token), session: AsyncSession = Depends(get_async_session)):
+    """Toggle the completion status of a task"""
+    owner_id = parse_user_id(current_user, user_id, "Not authorized to update this task")
+
+    task = await AsyncTaskService.toggle_task_completion(session, id, owner_id)
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+    return task_to_read(task)
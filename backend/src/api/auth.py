@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlmodel import Session, select
 from typing import Optional
 from pydantic import BaseModel, field_validator
 from ..database import get_session
 from ..models.user import User, UserCreate, UserRead
-from ..models.password_reset import PasswordResetToken
+from ..models.auth_session import revoke_user_sessions
+from ..models.password_reset import PasswordResetToken, invalidate_user_tokens
 from ..services.auth_service import AuthService
+from ..services.email_outbox import email_outbox_worker
+from ..services.email_providers import EMAIL_PROVIDER
 from ..services.email_service import EmailService
-from ..utils.security import create_access_token, get_password_hash
+from ..utils.security import ACCESS_TOKEN_EXPIRE_MINUTES, create_access_token
+from ..utils.hashing import HashingPoolSaturatedError, password_hasher
+from ..utils.rate_limit import auth_concurrency, auth_rate_limiter
+from ..utils.user_cache import user_cache
 from datetime import timedelta
 import uuid
 
@@ -23,6 +29,10 @@ class ForgotPasswordRequest(BaseModel):
     email: str
 
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
 class ResetPasswordRequest(BaseModel):
     token: str
     new_password: str
@@ -36,7 +46,61 @@ class ResetPasswordRequest(BaseModel):
             raise ValueError('Password must not exceed 72 bytes')
         return v
 
-@router.post("/signup", response_model=UserRead, status_code=status.HTTP_201_CREATED)
+def token_response(user_id: uuid.UUID, email: str, refresh_token: str) -> dict:
+    """A fresh access token alongside the session's refresh token"""
+    access_token = create_access_token(
+        data={"sub": str(user_id), "email": email},
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        "refresh_token": refresh_token,
+    }
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+# Rate limit dependencies. They run on the event loop before the endpoint takes
+# a threadpool thread; each declares the endpoint's body parameter under the
+# same name, which FastAPI parses once and shares.
+async def limit_signup(http_request: Request, user_create: UserCreate):
+    await auth_rate_limiter.hit("signup_ip", client_ip(http_request))
+
+
+async def limit_signin(http_request: Request, credentials: SignInRequest):
+    ip = client_ip(http_request)
+    await auth_rate_limiter.hit("signin_ip", ip)
+    # Per account, but only from this client: a bucket keyed on the email alone
+    # is spent before the password check, so anyone could lock a user out
+    await auth_rate_limiter.hit("signin_email", f"{ip}:{credentials.email.strip().lower()}")
+
+
+async def limit_forgot_password(http_request: Request, request: ForgotPasswordRequest):
+    await auth_rate_limiter.hit("forgot_password_ip", client_ip(http_request))
+    await auth_rate_limiter.hit("forgot_password_email", request.email.strip().lower())
+
+
+async def limit_reset_password(http_request: Request, request: ResetPasswordRequest):
+    await auth_rate_limiter.hit("reset_password_ip", client_ip(http_request))
+
+
+async def limit_refresh(http_request: Request, request: RefreshRequest):
+    await auth_rate_limiter.hit("refresh_ip", client_ip(http_request))
+
+
+# Rate limited first, then admitted under the per-process cap on bcrypt-heavy requests
+SIGNUP_GUARDS = [Depends(limit_signup), Depends(auth_concurrency.slot)]
+SIGNIN_GUARDS = [Depends(limit_signin), Depends(auth_concurrency.slot)]
+FORGOT_PASSWORD_GUARDS = [Depends(limit_forgot_password), Depends(auth_concurrency.slot)]
+RESET_PASSWORD_GUARDS = [Depends(limit_reset_password), Depends(auth_concurrency.slot)]
+# Refresh and sign-out never run bcrypt, so they skip the concurrency cap
+REFRESH_GUARDS = [Depends(limit_refresh)]
+
+@router.post("/signup", response_model=UserRead, status_code=status.HTTP_201_CREATED, dependencies=SIGNUP_GUARDS)
 def signup(user_create: UserCreate, session: Session = Depends(get_session)):
     """Register a new user"""
     try:
@@ -49,54 +113,65 @@ def signup(user_create: UserCreate, session: Session = Depends(get_session)):
             status_code=status.HTTP_409_CONFLICT,
             detail=str(e)
         )
+    except HashingPoolSaturatedError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred during registration"
         )
 
-@router.post("/signin")
+@router.post("/signin", dependencies=SIGNIN_GUARDS)
 def signin(credentials: SignInRequest, session: Session = Depends(get_session)):
     """Authenticate a user and return access token"""
-    user = AuthService.authenticate_user(session, credentials.email, credentials.password)
+    signed_in = AuthService.sign_in(session, credentials.email, credentials.password)
 
-    if not user:
+    if not signed_in:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Create access token
-    access_token_expires = timedelta(minutes=30)
-    access_token = create_access_token(
-        data={"sub": str(user.id), "email": user.email},
-        expires_delta=access_token_expires
-    )
+    # Clients renew the access token with the refresh token instead of the password
+    user, refresh_token = signed_in
+    return token_response(user.id, user.email, refresh_token)
+
+
+@router.post("/refresh", dependencies=REFRESH_GUARDS)
+def refresh(request: RefreshRequest, session: Session = Depends(get_session)):
+    """Exchange a refresh token for a new access token and a rotated refresh token"""
+    refreshed = AuthService.refresh_session(session, request.refresh_token)
+
+    if not refreshed:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
-    return {"access_token": access_token, "token_type": "bearer"}
+    return token_response(refreshed.user_id, refreshed.email, refreshed.refresh_token)
 
 
-@router.post("/forgot-password")
+@router.post("/signout", dependencies=REFRESH_GUARDS)
+def signout(request: RefreshRequest, session: Session = Depends(get_session)):
+    """End the session a refresh token belongs to"""
+    AuthService.end_session(session, request.refresh_token)
+    return {"message": "Signed out"}
+
+
+@router.post("/forgot-password", dependencies=FORGOT_PASSWORD_GUARDS)
 def forgot_password(request: ForgotPasswordRequest, session: Session = Depends(get_session)):
     """Request a password reset email"""
     # Find user by email
-    user = session.exec(select(User).where(User.email == request.email)).first()
+    user = AuthService.lookup_credentials(session, request.email)
 
     # Always return success to prevent email enumeration
     if not user:
         return {"message": "If an account with that email exists, a password reset link has been sent."}
 
-    # Invalidate any existing tokens for this user
-    existing_tokens = session.exec(
-        select(PasswordResetToken).where(
-            PasswordResetToken.user_id == user.id,
-            PasswordResetToken.used == False
-        )
-    ).all()
-    for token in existing_tokens:
-        token.used = True
-        session.add(token)
+    # Invalidate any existing tokens for this user in one UPDATE
+    session.execute(invalidate_user_tokens(user.id))
 
     # Create new reset token
     reset_token = PasswordResetToken(
@@ -105,22 +180,22 @@ def forgot_password(request: ForgotPasswordRequest, session: Session = Depends(g
         expires_at=PasswordResetToken.get_expiry(hours=1)
     )
     session.add(reset_token)
+    # Queued in the same transaction; the outbox worker sends it after the commit
+    reset_link = EmailService.queue_password_reset_email(session, user.email, reset_token.token)
     session.commit()
 
-    # Send email (returns reset_link if email fails - useful for testing)
-    email_result = EmailService.send_password_reset_email(user.email, reset_token.token)
+    email_outbox_worker.notify()
 
-    if email_result["success"]:
-        return {"message": "Password reset link has been sent to your email."}
-    else:
-        # Return reset link when email fails (for development/testing)
+    if EMAIL_PROVIDER == "console":
+        # No email provider is configured (development): hand the link back
         return {
             "message": "Email service unavailable. Use the link below to reset your password.",
-            "reset_link": email_result["reset_link"]
+            "reset_link": reset_link
         }
+    return {"message": "Password reset link has been sent to your email."}
 
 
-@router.post("/reset-password")
+@router.post("/reset-password", dependencies=RESET_PASSWORD_GUARDS)
 def reset_password(request: ResetPasswordRequest, session: Session = Depends(get_session)):
     """Reset password using token"""
     # Find the token
@@ -143,13 +218,18 @@ def reset_password(request: ResetPasswordRequest, session: Session = Depends(get
         )
 
     # Update password
-    user.password_hash = get_password_hash(request.new_password)
+    user.password_hash = password_hasher.hash(request.new_password)
     session.add(user)
 
     # Mark token as used
     token_record.used = True
     session.add(token_record)
 
+    # Sign out every client that signed in with the old password
+    session.execute(revoke_user_sessions(user.id))
+
     session.commit()
+    # Drop the old hash from this process's sign-in cache
+    user_cache.invalidate(user.email)
 
     return {"message": "Password has been reset successfully"}
\ No newline at end of file
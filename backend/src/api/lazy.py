@@ -0,0 +1,75 @@
+"""
+Routers imported on first use.
+
+Rarely used subsystems can carry heavy imports (the chat router pulls in the
+LLM client); registering them through LazyRouter keeps those imports off the
+startup path. The router's module is imported the first time a request path
+falls under ``path``, and its routes are then included in the app like any
+other router, so dependency overrides, exception handlers and metrics route
+templates all behave as usual.
+
+Until a lazy router has loaded, its routes are missing from the OpenAPI schema.
+"""
+import importlib
+import threading
+
+from fastapi import FastAPI
+from starlette.routing import BaseRoute, Match, NoMatchFound, compile_path
+
+from ..utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class LazyRouter(BaseRoute):
+    """
+    A placeholder route that includes ``module:attribute`` into ``app`` on the
+    first request whose path starts with ``path``.
+
+    It never handles a request itself: once loaded, the real routes are
+    appended to the app's route list, which the router is still iterating, so
+    the triggering request is matched by them in the same pass.
+    """
+
+    def __init__(self, app: FastAPI, module: str, path: str, attribute: str = "router", **include_kwargs):
+        self.app = app
+        self.module = module
+        self.attribute = attribute
+        self.include_kwargs = include_kwargs
+        self.path_regex, _, _ = compile_path(path.rstrip("/") + "{rest:path}")
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def matches(self, scope):
+        if not self.loaded and scope["type"] in ("http", "websocket") and self.path_regex.match(scope["path"]):
+            self.load()
+        return Match.NONE, {}
+
+    def load(self):
+        """Import the module and include its router; failures are logged once"""
+        with self._lock:
+            if self.loaded:
+                return
+            try:
+                router = getattr(importlib.import_module(self.module), self.attribute)
+                self.app.include_router(router, **self.include_kwargs)
+                # Regenerate the schema with the new routes
+                self.app.openapi_schema = None
+                logger.info("Lazy router loaded", module=self.module)
+            except Exception:
+                logger.exception("Failed to load lazy router", module=self.module)
+            finally:
+                self.loaded = True
+
+    def url_path_for(self, name, /, **path_params):
+        raise NoMatchFound(name, path_params)
+
+    async def handle(self, scope, receive, send):
+        raise RuntimeError("LazyRouter never matches a request")
+
+
+def include_lazy_router(app: FastAPI, module: str, path: str, **include_kwargs) -> LazyRouter:
+    """Register ``module``'s router to be imported on the first request under ``path``."""
+    lazy = LazyRouter(app, module, path, **include_kwargs)
+    app.router.routes.append(lazy)
+    return lazy
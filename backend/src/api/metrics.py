@@ -0,0 +1,44 @@
+from typing import Literal
+from fastapi import APIRouter, Query, Response
+from ..database import pool_status, query_stats
+from ..utils.metrics import CONTENT_TYPE, registry
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=Response)
+def get_metrics():
+    """
+    Prometheus scrape endpoint.
+
+    Request counts, latency and response size per route template, requests in
+    flight, database time per request and per statement type, bcrypt time and
+    connection pool counters, for this worker process.
+    """
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
+
+@router.get("/metrics/db-pool")
+def get_db_pool_metrics():
+    """
+    Connection pool statistics for each database engine.
+
+    ``checked_out``/``checked_in``/``overflow`` are live occupancy; checkout
+    counts, wait times and timeouts accumulate since the process started.
+    Sustained waits or any timeouts mean the pool is too small for the load.
+    """
+    return pool_status()
+
+
+@router.get("/metrics/db-queries")
+def get_db_query_metrics(
+    limit: int = Query(20, ge=1, le=500),
+    sort: Literal["total_ms", "count", "max_ms", "rows"] = "total_ms",
+):
+    """
+    The most expensive query fingerprints since the process started.
+
+    Each entry has the normalized statement with its execution count, total,
+    average and maximum duration in milliseconds, and rows affected/returned.
+    """
+    return query_stats.top(limit, sort)
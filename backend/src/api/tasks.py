@@ -1,16 +1,55 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlmodel import Session
-from typing import List
+from typing import List, Literal, Optional
+from typing_extensions import TypedDict
 from datetime import datetime
+import asyncio
+import csv
+import io
+import json
+import tempfile
 from ..database.engine import get_session
-from ..models.task import Task, TaskCreate, TaskRead, TaskUpdate
-from ..services.task_service import TaskService
+from ..models.task import (
+    Task,
+    TaskBatchRequest,
+    TaskBatchResponse,
+    TaskBatchResult,
+    TaskChanges,
+    TaskCreate,
+    TaskImportResult,
+    TaskRead,
+    TaskStats,
+    TaskUpdate,
+)
+from ..services.task_service import TaskService, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from ..services.task_cache import compute_etag, etag_matches, task_list_cache
+from ..services.task_events import TooManySubscribersError, task_events
+from ..services.task_import import read_rows
+from ..utils.pagination import InvalidCursorError
 from uuid import UUID
-import uuid
-from ..middleware.auth import validate_token
+from ..middleware.auth import validate_stream_token, validate_token
 
 router = APIRouter()
 
+# Column order of CSV exports
+EXPORT_CSV_COLUMNS = list(TaskRead.model_fields)
+
+# Import uploads are buffered in memory up to this size, then spill to a temp file
+IMPORT_SPOOL_BYTES = 1024 * 1024
+
+# Comment line sent on idle event streams so proxies keep the connection open
+EVENT_STREAM_KEEPALIVE_SECONDS = 15
+
+# TaskRead as a TypedDict. Rows read from the database are already valid, so
+# list and export responses serialize plain dicts against this schema instead
+# of building and validating a TaskRead model per row.
+TaskReadRow = TypedDict("TaskReadRow", {name: field.annotation for name, field in TaskRead.model_fields.items()})
+task_row_adapter = TypeAdapter(TaskReadRow)
+task_rows_adapter = TypeAdapter(List[TaskReadRow])
+
 
 def task_to_read(task: Task) -> TaskRead:
     """Convert Task to TaskRead with is_overdue calculated"""
@@ -31,140 +70,380 @@ def task_to_read(task: Task) -> TaskRead:
         is_overdue=is_overdue
     )
 
-@router.get("/tasks", response_model=List[TaskRead])
-def get_tasks(user_id: str, current_user: dict = Depends(validate_token), session: Session = Depends(get_session)):
-    """Get all tasks for a specific user"""
+
+def task_read_row(task, now: datetime) -> dict:
+    """
+    The TaskRead fields of a Task, or of a row selecting Task's columns, as a
+    dict for task_row_adapter. ``now`` decides ``is_overdue``.
+    """
+    return {
+        "title": task.title,
+        "description": task.description,
+        "completed": task.completed,
+        "due_date": task.due_date,
+        "priority": task.priority,
+        "id": task.id,
+        "user_id": task.user_id,
+        "created_at": task.created_at,
+        "updated_at": task.updated_at,
+        "is_overdue": task.due_date is not None and not task.completed and now > task.due_date,
+    }
+
+
+def serialize_task_list(tasks: List[Task]) -> bytes:
+    """Serialize a page of tasks to the JSON body of a list response"""
+    now = datetime.utcnow()
+    return task_rows_adapter.dump_json([task_read_row(task, now) for task in tasks])
+
+
+def task_list_response(body: bytes, etag: str, next_cursor: Optional[str], if_none_match: Optional[str]) -> Response:
+    """Build a list response, or a bodiless 304 when the client's copy is current"""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def parse_user_id(current_user: dict, user_id: str, detail: str) -> str:
+    """Check the path user against the token and return the normalized user id"""
     if current_user["user_id"] != user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to access these tasks"
+            detail=detail
         )
-
     try:
-        user_uuid = UUID(user_id)
-        tasks = TaskService.get_tasks_by_user(session, user_uuid)
-        return [task_to_read(task) for task in tasks]
+        return str(UUID(user_id))
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid user ID format"
         )
 
+@router.get("/tasks", response_model=List[TaskRead])
+def get_tasks(
+    user_id: str,
+    completed: Optional[bool] = None,
+    priority: Optional[str] = None,
+    sort: Literal["updated_at", "created_at"] = "updated_at",
+    order: Literal["asc", "desc"] = "desc",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(validate_token),
+    session: Session = Depends(get_session),
+):
+    """
+    Get one page of tasks for a specific user.
+
+    Pages are keyset-paginated; when more tasks are available the cursor for the
+    next page is returned in the ``X-Next-Cursor`` response header. Pages are
+    served from the task list cache when possible and carry an ETag, so a
+    client sending a matching ``If-None-Match`` gets a 304 with no body.
+    """
+    owner_id = parse_user_id(current_user, user_id, "Not authorized to access these tasks")
+
+    params = {"completed": completed, "priority": priority, "sort": sort, "order": order, "limit": limit, "cursor": cursor}
+    cache_key, cached = task_list_cache.lookup(owner_id, params)
+    if cached:
+        return task_list_response(*cached, if_none_match)
+
+    try:
+        tasks, next_cursor = TaskService.get_tasks_page(session, owner_id, **params)
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    body = serialize_task_list(tasks)
+    etag = compute_etag(body)
+    task_list_cache.store(cache_key, body, etag, next_cursor)
+    return task_list_response(body, etag, next_cursor, if_none_match)
+
 
 @router.post("/tasks", response_model=TaskRead, status_code=status.HTTP_201_CREATED)
 def create_task(user_id: str, task_create: TaskCreate, current_user: dict = Depends(validate_token), session: Session = Depends(get_session)):
     """Create a new task for a user"""
-    if current_user["user_id"] != user_id:
+    owner_id = parse_user_id(current_user, user_id, "Not authorized to create tasks for this user")
+
+    try:
+        task = TaskService.create_task(session, owner_id, task_create)
+    except ValueError as e:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to create tasks for this user"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
+    return task_to_read(task)
+
+
+@router.post("/tasks:batch", response_model=TaskBatchResponse)
+def batch_tasks(user_id: str, batch: TaskBatchRequest, current_user: dict = Depends(validate_token), session: Session = Depends(get_session)):
+    """Apply a batch of create/update/delete/complete operations in one transaction"""
+    owner_id = parse_user_id(current_user, user_id, "Not authorized to modify tasks for this user")
+
+    results = TaskService.apply_batch(session, owner_id, batch.operations)
+    return TaskBatchResponse(results=[
+        TaskBatchResult(
+            index=result["index"],
+            op=result["op"],
+            status=result["status"],
+            id=result["id"],
+            task=task_to_read(result["task"]) if result["task"] is not None else None,
+            detail=result["detail"],
+        )
+        for result in results
+    ])
+
+
+@router.get("/tasks/changes", response_model=TaskChanges)
+def get_task_changes(
+    user_id: str,
+    since: int = Query(0, ge=0),
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: dict = Depends(validate_token),
+    session: Session = Depends(get_session),
+):
+    """
+    Get the tasks created, updated or deleted since a change sequence.
+
+    Start with ``since=0`` and pass the returned ``since`` on the next poll.
+    Keep polling immediately while ``has_more`` is true. When ``reset`` is true
+    the client's copy is too old to patch and it should resync from 0.
+    """
+    owner_id = parse_user_id(current_user, user_id, "Not authorized to access these tasks")
+
+    changes = TaskService.get_changes(session, owner_id, since, limit)
+    return TaskChanges(
+        tasks=[task_to_read(task) for task in changes["tasks"]],
+        deleted_ids=changes["deleted_ids"],
+        since=changes["since"],
+        has_more=changes["has_more"],
+        reset=changes["reset"],
+    )
+
+
+@router.get("/tasks/stats", response_model=TaskStats)
+def get_task_stats(
+    user_id: str,
+    current_user: dict = Depends(validate_token),
+    session: Session = Depends(get_session),
+):
+    """
+    Get the user's total, completed, pending and overdue task counts.
+    """
+    owner_id = parse_user_id(current_user, user_id, "Not authorized to access these tasks")
+    return TaskStats(**TaskService.get_stats(session, owner_id))
+
+
+@router.get("/tasks/search", response_model=List[TaskRead])
+def search_tasks(
+    user_id: str,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(validate_token),
+    session: Session = Depends(get_session),
+):
+    """
+    Search the user's tasks by title and description, best matches first.
+
+    Every word in ``q`` must match, and words match as prefixes. Paging and
+    caching work as for ``GET /tasks``: the next page's cursor comes back in
+    the ``X-Next-Cursor`` header.
+    """
+    owner_id = parse_user_id(current_user, user_id, "Not authorized to access these tasks")
+
+    params = {"search": q, "limit": limit, "cursor": cursor}
+    cache_key, cached = task_list_cache.lookup(owner_id, params)
+    if cached:
+        return task_list_response(*cached, if_none_match)
 
     try:
-        user_uuid = UUID(user_id)
-        task = TaskService.create_task(session, user_uuid, task_create)
-        return task_to_read(task)
-    except ValueError:
+        tasks, next_cursor = TaskService.search_tasks(session, owner_id, q, limit, cursor)
+    except InvalidCursorError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid user ID format"
+            detail=str(e)
         )
 
+    body = serialize_task_list(tasks)
+    etag = compute_etag(body)
+    task_list_cache.store(cache_key, body, etag, next_cursor)
+    return task_list_response(body, etag, next_cursor, if_none_match)
 
-@router.get("/tasks/{id}", response_model=TaskRead)
-def get_task(user_id: str, id: int, current_user: dict = Depends(validate_token), session: Session = Depends(get_session)):
-    """Get a specific task by ID for a user"""
-    if current_user["user_id"] != user_id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to access this task"
+
+@router.get("/tasks/export")
+def export_tasks(
+    user_id: str,
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    current_user: dict = Depends(validate_token),
+    session: Session = Depends(get_session),
+):
+    """
+    Export all of the user's tasks as NDJSON (one TaskRead object per line) or CSV.
+
+    Rows are streamed from the database in batches and written out as they
+    arrive, so memory use does not grow with the number of tasks.
+    """
+    owner_id = parse_user_id(current_user, user_id, "Not authorized to access these tasks")
+
+    def ndjson_rows():
+        for batch in TaskService.iter_tasks(session, owner_id):
+            now = datetime.utcnow()
+            yield b"".join(task_row_adapter.dump_json(task_read_row(task, now)) + b"\n" for task in batch)
+
+    def csv_rows():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_CSV_COLUMNS)
+        writer.writeheader()
+        yield buffer.getvalue()
+        for batch in TaskService.iter_tasks(session, owner_id):
+            buffer.seek(0)
+            buffer.truncate()
+            now = datetime.utcnow()
+            writer.writerows(task_rows_adapter.dump_python([task_read_row(task, now) for task in batch], mode="json"))
+            yield buffer.getvalue()
+
+    if format == "csv":
+        body, media_type = csv_rows(), "text/csv"
+    else:
+        body, media_type = ndjson_rows(), "application/x-ndjson"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format}"'},
+    )
+
+
+@router.post("/tasks/import", response_model=TaskImportResult)
+async def import_tasks(
+    user_id: str,
+    request: Request,
+    format: Optional[Literal["ndjson", "csv"]] = Query(None),
+    current_user: dict = Depends(validate_token),
+    session: Session = Depends(get_session),
+):
+    """
+    Bulk-create tasks from an NDJSON or CSV request body.
+
+    The format comes from ``?format=``, or from a ``text/csv`` Content-Type,
+    defaulting to NDJSON. Files written by ``/tasks/export`` can be imported
+    as-is. Invalid lines are skipped and reported with their line number.
+    """
+    owner_id = parse_user_id(current_user, user_id, "Not authorized to create tasks for this user")
+    if format is None:
+        format = "csv" if request.headers.get("content-type", "").startswith("text/csv") else "ndjson"
+
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as upload:
+        async for chunk in request.stream():
+            upload.write(chunk)
+        upload.seek(0)
+        result = await run_in_threadpool(
+            TaskService.import_tasks, session, owner_id, read_rows(upload, format)
         )
+    return result
+
+
+@router.get("/tasks/events")
+async def stream_task_events(
+    user_id: str,
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
+    current_user: dict = Depends(validate_stream_token),
+):
+    """
+    Stream task created/updated/deleted events as Server-Sent Events.
+
+    Each event's id is the task change sequence. A ``resync`` event (sent when
+    the client reconnects with Last-Event-ID, or fell too far behind) carries the
+    sequence to catch up from with ``GET /tasks/changes?since=``.
+    """
+    owner_id = parse_user_id(current_user, user_id, "Not authorized to access these tasks")
 
     try:
-        user_uuid = UUID(user_id)
-        task = TaskService.get_task_by_id(session, id, user_uuid)
-        if not task:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Task not found"
-            )
-        return task_to_read(task)
-    except ValueError:
+        subscription = task_events.subscribe(owner_id)
+    except TooManySubscribersError as e:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid user ID format"
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e)
         )
 
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            if last_event_id and last_event_id.isdigit():
+                yield f"event: resync\ndata: {json.dumps({'type': 'resync', 'since': int(last_event_id)})}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=EVENT_STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                event_id = f"id: {event['seq']}\n" if event.get("seq") else ""
+                yield f"{event_id}event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            subscription.close()
 
-@router.put("/tasks/{id}", response_model=TaskRead)
-def update_task(user_id: str, id: int, task_update: TaskUpdate, current_user: dict = Depends(validate_token), session: Session = Depends(get_session)):
-    """Update a specific task for a user"""
-    if current_user["user_id"] != user_id:
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/tasks/{id:int}", response_model=TaskRead)
+def get_task(user_id: str, id: int, current_user: dict = Depends(validate_token), session: Session = Depends(get_session)):
+    """Get a specific task by ID for a user"""
+    owner_id = parse_user_id(current_user, user_id, "Not authorized to access this task")
+
+    task = TaskService.get_task_by_id_and_user(session, id, owner_id)
+    if not task:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to update this task"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
         )
+    return task_to_read(task)
 
-    try:
-        user_uuid = UUID(user_id)
-        updated_task = TaskService.update_task(session, id, user_uuid, task_update)
-        if not updated_task:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Task not found"
-            )
-        return task_to_read(updated_task)
-    except ValueError:
+
+@router.put("/tasks/{id:int}", response_model=TaskRead)
+def update_task(user_id: str, id: int, task_update: TaskUpdate, current_user: dict = Depends(validate_token), session: Session = Depends(get_session)):
+    """Update a specific task for a user"""
+    owner_id = parse_user_id(current_user, user_id, "Not authorized to update this task")
+
+    updated_task = TaskService.update_task(session, id, owner_id, task_update)
+    if not updated_task:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid user ID format"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
         )
+    return task_to_read(updated_task)
+
 
-@router.delete("/tasks/{id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/tasks/{id:int}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_task(user_id: str, id: int, current_user: dict = Depends(validate_token), session: Session = Depends(get_session)):
     """Delete a specific task for a user"""
-    # Verify that the user_id in the path matches the user from the token
-    if current_user["user_id"] != user_id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to delete this task"
-        )
+    owner_id = parse_user_id(current_user, user_id, "Not authorized to delete this task")
 
-    try:
-        user_uuid = UUID(user_id)
-        success = TaskService.delete_task(session, id, user_uuid)
-        if not success:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Task not found"
-            )
-        return
-    except ValueError:
+    success = TaskService.delete_task(session, id, owner_id)
+    if not success:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid user ID format"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
         )
 
-@router.patch("/tasks/{id}/complete", response_model=TaskRead)
+
+@router.patch("/tasks/{id:int}/complete", response_model=TaskRead)
 def toggle_task_completion(user_id: str, id: int, current_user: dict = Depends(validate_token), session: Session = Depends(get_session)):
     """Toggle the completion status of a task"""
-    if current_user["user_id"] != user_id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to update this task"
-        )
+    owner_id = parse_user_id(current_user, user_id, "Not authorized to update this task")
 
-    try:
-        user_uuid = UUID(user_id)
-        task = TaskService.toggle_task_completion(session, id, user_uuid)
-        if not task:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Task not found"
-            )
-        return task_to_read(task)
-    except ValueError:
+    task = TaskService.toggle_task_completion(session, id, owner_id)
+    if not task:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid user ID format"
-        )
\ No newline at end of file
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+    return task_to_read(task)
@@ -0,0 +1,161 @@
+"""
+Maintenance commands for the AI-Powered Natural Language Chatbot for Todo Management.
+
+Usage:
+    python -m src.cli init-db
+    python -m src.cli verify-task-stats [--fix] [--user-id ID]
+    python -m src.cli send-emails [--once]
+    python -m src.cli purge-reset-tokens [--batch-size N]
+    python -m src.cli purge-sessions [--batch-size N]
+    python -m src.cli purge-tombstones [--batch-size N] [--retention-days D]
+    python -m src.cli purge-emails [--batch-size N] [--retention-days D]
+"""
+import argparse
+import asyncio
+import sys
+
+from sqlalchemy import inspect
+from sqlmodel import Session
+
+from .database.engine import engine, init_db
+from .services.email_outbox import EmailOutboxWorker, dispatch_pending
+from .services.email_providers import create_email_provider
+from .services.maintenance import (
+    purge_auth_sessions,
+    purge_password_reset_tokens,
+    purge_sent_emails,
+    purge_task_tombstones,
+)
+from .services.task_service import TaskService
+
+
+def create_schema(args) -> int:
+    """Run the migrations up to the latest revision"""
+    tables = set(inspect(engine).get_table_names())
+    if tables - {"alembic_version"} and "alembic_version" not in tables:
+        print(
+            "The database has tables but no migration history, so it was built by create_all. "
+            "Stamp the revision matching its schema (see migrations/versions), e.g. "
+            "`alembic stamp 0001`, then re-run.",
+            file=sys.stderr,
+        )
+        return 1
+    init_db(configure_logger=True)
+    print("Database schema is up to date")
+    return 0
+
+
+def verify_task_stats(args) -> int:
+    """Recompute per-user task counters and report (or repair) drift"""
+    with Session(engine) as session:
+        drift = TaskService.verify_counters(session, fix=args.fix, user_id=args.user_id)
+
+    for row in drift:
+        print(
+            f"{row['user_id']}: tasks {row['task_count']} -> {row['expected_task_count']}, "
+            f"completed {row['completed_count']} -> {row['expected_completed_count']}"
+        )
+    if not drift:
+        print("Task counters match")
+    elif args.fix:
+        print(f"Repaired {len(drift)} counter(s)")
+    # A non-zero exit lets cron/CI flag drift that was only reported
+    return 1 if drift and not args.fix else 0
+
+
+def send_emails(args) -> int:
+    """Deliver queued emails, once or continuously"""
+    provider = create_email_provider()
+    if args.once:
+        with Session(engine) as session:
+            claimed = dispatch_pending(session, provider)
+        print(f"Processed {claimed} email(s) with the {provider.name} provider")
+        return 0
+
+    async def run():
+        worker = EmailOutboxWorker(engine, provider)
+        worker.start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await worker.stop()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def purge_reset_tokens(args) -> int:
+    """Delete used and expired password reset tokens in batches"""
+    with Session(engine) as session:
+        deleted = purge_password_reset_tokens(session, batch_size=args.batch_size)
+    print(f"Deleted {deleted} password reset token(s)")
+    return 0
+
+
+def purge_sessions(args) -> int:
+    """Delete expired refresh token sessions in batches"""
+    with Session(engine) as session:
+        deleted = purge_auth_sessions(session, batch_size=args.batch_size)
+    print(f"Deleted {deleted} expired session(s)")
+    return 0
+
+
+def purge_tombstones(args) -> int:
+    """Permanently delete tasks deleted longer ago than the retention"""
+    with Session(engine) as session:
+        deleted = purge_task_tombstones(session, batch_size=args.batch_size, retention_days=args.retention_days)
+    print(f"Deleted {deleted} task tombstone(s)")
+    return 0
+
+
+def purge_emails(args) -> int:
+    """Delete sent and failed outbox rows older than the retention"""
+    with Session(engine) as session:
+        deleted = purge_sent_emails(session, batch_size=args.batch_size, retention_days=args.retention_days)
+    print(f"Deleted {deleted} outbox email(s)")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    init = commands.add_parser("init-db", help="Run the database migrations; once per deploy")
+    init.set_defaults(handler=create_schema)
+
+    verify = commands.add_parser("verify-task-stats", help="Recompute task counters and report drift")
+    verify.add_argument("--fix", action="store_true", help="Overwrite drifted counters")
+    verify.add_argument("--user-id", help="Only check this user")
+    verify.set_defaults(handler=verify_task_stats)
+
+    emails = commands.add_parser("send-emails", help="Run the email outbox worker as a standalone process")
+    emails.add_argument("--once", action="store_true", help="Send the emails that are due now and exit")
+    emails.set_defaults(handler=send_emails)
+
+    purge = commands.add_parser("purge-reset-tokens", help="Delete used and expired password reset tokens")
+    purge.add_argument("--batch-size", type=int, help="Rows per transaction (default TOKEN_PURGE_BATCH_SIZE)")
+    purge.set_defaults(handler=purge_reset_tokens)
+
+    sessions = commands.add_parser("purge-sessions", help="Delete expired refresh token sessions")
+    sessions.add_argument("--batch-size", type=int, help="Rows per transaction (default TOKEN_PURGE_BATCH_SIZE)")
+    sessions.set_defaults(handler=purge_sessions)
+
+    tombstones = commands.add_parser("purge-tombstones", help="Permanently delete tasks deleted long ago")
+    tombstones.add_argument("--batch-size", type=int, help="Rows per transaction (default TOKEN_PURGE_BATCH_SIZE)")
+    tombstones.add_argument("--retention-days", type=float, help="Keep tombstones this recent (default TOMBSTONE_RETENTION_DAYS)")
+    tombstones.set_defaults(handler=purge_tombstones)
+
+    emails = commands.add_parser("purge-emails", help="Delete sent and failed outbox emails")
+    emails.add_argument("--batch-size", type=int, help="Rows per transaction (default TOKEN_PURGE_BATCH_SIZE)")
+    emails.add_argument("--retention-days", type=float, help="Keep emails this recent (default EMAIL_RETENTION_DAYS)")
+    emails.set_defaults(handler=purge_emails)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
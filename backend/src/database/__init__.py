@@ -0,0 +1,4 @@
+from .engine import DB_INIT_ON_STARTUP, engine, get_session, create_db_and_tables, init_db
+from .async_engine import USE_ASYNC_DB, async_engine, get_async_session
+from .pool import pool_status
+from .instrumentation import query_stats
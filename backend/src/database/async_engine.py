@@ -0,0 +1,57 @@
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from .engine import DATABASE_URL, is_postgres
+from .instrumentation import DB_ECHO, instrument_engine
+from .pool import DB_POOL, PoolMetrics, pool_options, register_pool
+from uuid import uuid4
+import os
+
+# The async path uses asyncpg and is only enabled for PostgreSQL. SQLite (local
+# development and tests) keeps using the sync engine in engine.py.
+USE_ASYNC_DB = is_postgres and os.getenv("USE_ASYNC_DB", "true").lower() in ("1", "true", "yes")
+
+
+def to_async_url(url: str) -> str:
+    """Rewrite a sync PostgreSQL URL to use the asyncpg driver"""
+    for prefix in ("postgresql+psycopg2://", "postgresql://"):
+        if url.startswith(prefix):
+            url = "postgresql+asyncpg://" + url[len(prefix):]
+            break
+    # asyncpg does not understand libpq's sslmode query parameter
+    return url.replace("?sslmode=require", "").replace("&sslmode=require", "")
+
+
+async_engine = None
+async_session_factory = None
+async_pool_metrics = PoolMetrics()
+
+if USE_ASYNC_DB:
+    connect_args = {
+        "ssl": "require",  # Require SSL for PostgreSQL
+        "timeout": 10,
+    }
+    if DB_POOL == "null":
+        # Behind PgBouncer in transaction mode a connection may land on a different
+        # server each transaction, so prepared statements must not be cached or reused
+        connect_args.update(
+            statement_cache_size=0,
+            prepared_statement_cache_size=0,
+            prepared_statement_name_func=lambda: f"__asyncpg_{uuid4()}__",
+        )
+    async_engine = create_async_engine(
+        to_async_url(DATABASE_URL),
+        echo=DB_ECHO,
+        **pool_options(async_pool_metrics, is_async=True),
+        connect_args=connect_args,
+    )
+    async_session_factory = async_sessionmaker(
+        async_engine, class_=AsyncSession, expire_on_commit=False
+    )
+    register_pool("async", async_engine, async_pool_metrics)
+    instrument_engine(async_engine)
+
+
+async def get_async_session():
+    """Get async database session"""
+    async with async_session_factory() as session:
+        yield session
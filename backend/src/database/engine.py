@@ -1,9 +1,13 @@
 from sqlmodel import create_engine, Session
 from sqlalchemy import text
-from sqlalchemy.pool import QueuePool
 from ..models.user import User
 from ..models.task import Task
+from ..models.task_counter import TaskCounter
 from ..models.password_reset import PasswordResetToken
+from ..models.email_outbox import EmailOutbox
+from ..models.auth_session import AuthSession
+from .instrumentation import DB_ECHO, instrument_engine
+from .pool import PoolMetrics, pool_options, register_pool
 import os
 from dotenv import load_dotenv
 
@@ -16,19 +20,22 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./todo_app.db")
 if DATABASE_URL.startswith("postgresql://") and "+psycopg2" not in DATABASE_URL:
     DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+psycopg2://")
 
+# Run the migrations when the app starts. Off by default: run
+# `python -m src.cli init-db` once per deploy instead, since several workers
+# migrating at once would race.
+DB_INIT_ON_STARTUP = os.getenv("DB_INIT_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+
 # Check if using PostgreSQL for pool settings
 is_postgres = DATABASE_URL.startswith("postgresql")
 
-# Create engine with connection pool settings for PostgreSQL
+pool_metrics = PoolMetrics()
+
+# Create engine with connection pool settings for PostgreSQL (see pool.py for DB_POOL_*)
 if is_postgres:
     engine = create_engine(
         DATABASE_URL,
-        echo=True,
-        pool_pre_ping=True,  # Check connection health before using
-        pool_recycle=300,    # Recycle connections after 5 minutes
-        pool_size=5,         # Number of connections to keep
-        max_overflow=10,     # Additional connections allowed
-        pool_timeout=30,     # Timeout waiting for connection
+        echo=DB_ECHO,
+        **pool_options(pool_metrics),
         connect_args={
             "sslmode": "require",  # Require SSL for PostgreSQL
             "connect_timeout": 10,
@@ -39,10 +46,16 @@ if is_postgres:
         }
     )
 else:
-    engine = create_engine(DATABASE_URL, echo=True)
+    engine = create_engine(DATABASE_URL, echo=DB_ECHO)
+
+register_pool("sync", engine, pool_metrics)
+instrument_engine(engine)
+
+# Alembic configuration, next to the src package
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "alembic.ini")
 
 def create_db_and_tables():
-    """Create database tables"""
+    """Create database tables straight from the models (tests and benchmarks; deployments use init_db)"""
     from sqlmodel import SQLModel
     SQLModel.metadata.create_all(engine)
 
@@ -52,6 +65,20 @@ async def create_db_and_tables_async():
     from sqlmodel import SQLModel
     SQLModel.metadata.create_all(engine)
 
+def init_db(configure_logger: bool = False):
+    """
+    Bring the database schema up to date by running the Alembic migrations.
+
+    ``configure_logger`` applies alembic.ini's logging setup, which replaces
+    the application's, so only command-line callers should set it.
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    config.attributes["configure_logger"] = configure_logger
+    command.upgrade(config, "head")
+
 def get_session():
     """Get database session"""
     with Session(engine) as session:
@@ -0,0 +1,214 @@
+"""
+Query instrumentation for the database engines, replacing ``echo=True``.
+
+Every statement is timed through SQLAlchemy cursor events and reduced to a
+fingerprint: the SQL with placeholders unified and IN/VALUES lists collapsed,
+so ``WHERE id IN (?, ?, ?)`` and ``WHERE id IN (?)`` count as one query shape.
+Only queries slower than DB_SLOW_QUERY_MS are logged, plus a DB_QUERY_SAMPLE_RATE
+fraction of the rest; per-fingerprint totals are kept for the metrics endpoint.
+
+Inside a request (see middleware.query_budget) statements are also counted
+per request, so requests that exceed DB_QUERY_BUDGET statements or repeat
+one fingerprint DB_N_PLUS_ONE_THRESHOLD times are reported as likely N+1s.
+
+    DB_ECHO                   log every statement through SQLAlchemy (default false)
+    DB_SLOW_QUERY_MS          slow-query log threshold (default 200)
+    DB_QUERY_SAMPLE_RATE      fraction of other statements logged (default 0)
+    DB_QUERY_BUDGET           statements per request before warning (default 50)
+    DB_N_PLUS_ONE_THRESHOLD   repeats of one fingerprint per request before warning (default 10)
+"""
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+
+from ..utils.logging import get_logger
+from ..utils.metrics import db_query_duration_seconds
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+DB_QUERY_SAMPLE_RATE = float(os.getenv("DB_QUERY_SAMPLE_RATE", "0"))
+DB_QUERY_BUDGET = int(os.getenv("DB_QUERY_BUDGET", "50"))
+DB_N_PLUS_ONE_THRESHOLD = int(os.getenv("DB_N_PLUS_ONE_THRESHOLD", "10"))
+
+# Statement types reported as db_query_duration_seconds{operation}; others are "other"
+QUERY_OPERATIONS = ("select", "insert", "update", "delete", "with", "copy")
+
+# Distinct fingerprints tracked per process; later ones are folded into "other"
+MAX_FINGERPRINTS = 500
+
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<![:\w]):\w+|\?")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_REPEATED_GROUP = re.compile(r"(\([^()]*\))(?:\s*,\s*\1)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> Tuple[str, str]:
+    """Return ``(fingerprint id, normalized SQL)`` for a statement."""
+    normalized = _WHITESPACE.sub(" ", statement).strip()
+    normalized = _STRING.sub("?", normalized)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _IN_LIST.sub("IN (?+)", normalized)
+    normalized = _REPEATED_GROUP.sub(r"\1, ...", normalized)
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12], normalized
+
+
+@lru_cache(maxsize=2048)
+def statement_operation(statement: str) -> str:
+    """The statement type of ``statement`` as a metric label, e.g. ``select``"""
+    words = statement.split(None, 1)
+    keyword = words[0].lower() if words else ""
+    return keyword if keyword in QUERY_OPERATIONS else "other"
+
+
+class QueryStats:
+    """Per-fingerprint totals since the process started."""
+
+    def __init__(self, max_fingerprints: int = MAX_FINGERPRINTS):
+        self.max_fingerprints = max_fingerprints
+        self._lock = threading.Lock()
+        self._stats: Dict[str, dict] = {}
+
+    def record(self, fingerprint_id: str, sql: str, duration_ms: float, rows: Optional[int]):
+        with self._lock:
+            stats = self._stats.get(fingerprint_id)
+            if stats is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    fingerprint_id, sql = "other", "(fingerprint limit reached)"
+                    stats = self._stats.get(fingerprint_id)
+                if stats is None:
+                    stats = self._stats[fingerprint_id] = {
+                        "fingerprint": fingerprint_id, "statement": sql,
+                        "count": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0,
+                    }
+            stats["count"] += 1
+            stats["total_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+            if rows is not None and rows >= 0:
+                stats["rows"] += rows
+
+    def top(self, limit: int = 20, key: str = "total_ms") -> List[dict]:
+        """The ``limit`` fingerprints with the highest ``key``"""
+        with self._lock:
+            rows = [dict(stats) for stats in self._stats.values()]
+        for stats in rows:
+            stats["avg_ms"] = stats["total_ms"] / stats["count"]
+        return sorted(rows, key=lambda stats: stats[key], reverse=True)[:limit]
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+
+
+query_stats = QueryStats()
+
+
+class RequestQueries:
+    """Statements executed while handling one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration_ms = 0.0
+        self.fingerprints: Counter = Counter()
+        self.statements: Dict[str, str] = {}
+
+    def record(self, fingerprint_id: str, sql: str, duration_ms: float):
+        self.count += 1
+        self.duration_ms += duration_ms
+        self.fingerprints[fingerprint_id] += 1
+        self.statements.setdefault(fingerprint_id, sql)
+
+    def report(self, method: str, path: str):
+        """Warn about a request that ran too many statements or repeated one"""
+        repeated = [
+            (fingerprint_id, count)
+            for fingerprint_id, count in self.fingerprints.most_common(3)
+            if count >= DB_N_PLUS_ONE_THRESHOLD
+        ]
+        for fingerprint_id, count in repeated:
+            logger.warning(
+                "Possible N+1 query",
+                method=method,
+                path=path,
+                fingerprint=fingerprint_id,
+                statement=self.statements[fingerprint_id][:500],
+                repeats=count,
+            )
+        if self.count > DB_QUERY_BUDGET:
+            logger.warning(
+                "Request exceeded query budget",
+                method=method,
+                path=path,
+                query_count=self.count,
+                query_budget=DB_QUERY_BUDGET,
+                db_ms=round(self.duration_ms, 2),
+            )
+
+
+request_queries: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration_ms = (time.perf_counter() - conn.info["query_start_time"].pop()) * 1000
+    fingerprint_id, sql = fingerprint(statement)
+    rows = getattr(cursor, "rowcount", None)
+    query_stats.record(fingerprint_id, sql, duration_ms, rows)
+    db_query_duration_seconds.labels(statement_operation(statement)).observe(duration_ms / 1000)
+
+    current = request_queries.get()
+    if current is not None:
+        current.record(fingerprint_id, sql, duration_ms)
+
+    if duration_ms >= DB_SLOW_QUERY_MS:
+        logger.warning(
+            "Slow query",
+            fingerprint=fingerprint_id,
+            statement=sql[:1000],
+            duration_ms=round(duration_ms, 2),
+            rows=rows,
+            executemany=executemany,
+        )
+    elif DB_QUERY_SAMPLE_RATE and random.random() < DB_QUERY_SAMPLE_RATE:
+        logger.info(
+            "Query sampled",
+            fingerprint=fingerprint_id,
+            statement=sql[:1000],
+            duration_ms=round(duration_ms, 2),
+            rows=rows,
+        )
+
+
+def _handle_error(exception_context):
+    # The statement never reached after_cursor_execute; drop its start time
+    start_times = exception_context.connection.info.get("query_start_time") if exception_context.connection else None
+    if start_times:
+        start_times.pop()
+
+
+def instrument_engine(engine):
+    """Attach query timing to an Engine or AsyncEngine"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
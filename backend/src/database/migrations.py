@@ -0,0 +1,119 @@
+"""
+Helpers for Alembic revisions that must run against large, live tables.
+
+PostgreSQL builds a plain index under a lock that blocks writes to the table
+for the whole build, and a single UPDATE over millions of rows holds its row
+locks (and bloats the table) until it commits. Revisions under ``migrations/``
+use these helpers instead:
+
+- ``create_index_concurrently``/``drop_index_concurrently`` run
+  ``CREATE/DROP INDEX CONCURRENTLY`` outside the migration transaction on
+  PostgreSQL, and a plain statement elsewhere.
+- ``backfill_in_batches`` walks a table in key order and applies a statement
+  to one bounded range of rows at a time, committing after each, so locks are
+  short-lived and an interrupted backfill keeps the batches it completed.
+
+Both commit as they go, so revisions using them must be written to be re-run
+safely; ``if_not_exists`` and idempotent backfill statements take care of that.
+"""
+import logging
+import os
+from typing import Any, Callable, Optional, Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+logger = logging.getLogger("alembic.backfill")
+
+# Rows per backfill transaction
+BACKFILL_BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "5000"))
+
+
+def _is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+def _drop_invalid_index(name: str):
+    # An interrupted CREATE INDEX CONCURRENTLY leaves an invalid index behind
+    # that IF NOT EXISTS would then skip; drop it so the build is retried
+    invalid = op.get_bind().execute(
+        sa.text(
+            "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid "
+            "WHERE pg_class.relname = :name AND NOT pg_index.indisvalid"
+        ),
+        {"name": name},
+    ).first()
+    if invalid:
+        logger.warning("Dropping invalid index %s left by an interrupted build", name)
+        op.drop_index(name, postgresql_concurrently=True, if_exists=True)
+
+
+def create_index_concurrently(name: str, table: str, columns: Sequence[Any], **kwargs):
+    """
+    Create an index without blocking writes to ``table`` on PostgreSQL.
+
+    ``columns`` may hold column names or SQL expressions, and ``kwargs`` are
+    passed to ``op.create_index`` (``unique``, ``postgresql_using``, ...).
+    """
+    if _is_postgres():
+        with op.get_context().autocommit_block():
+            _drop_invalid_index(name)
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True, **kwargs)
+    else:
+        op.create_index(name, table, columns, if_not_exists=True, **kwargs)
+
+
+def drop_index_concurrently(name: str, table: str):
+    """Drop an index without blocking writes to ``table`` on PostgreSQL."""
+    if _is_postgres():
+        with op.get_context().autocommit_block():
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        op.drop_index(name, table_name=table, if_exists=True)
+
+
+def backfill_in_batches(
+    table: str,
+    key: str,
+    apply_batch: Callable[[sa.engine.Connection, Optional[Any], Optional[Any]], Any],
+    batch_size: Optional[int] = None,
+) -> int:
+    """
+    Call ``apply_batch(connection, lower, upper)`` for consecutive ranges of
+    ``table.key`` and return the number of batches. The connection is in
+    autocommit mode, so ``apply_batch`` should issue a single statement, which
+    commits as soon as it completes.
+
+    A range covers the keys ``lower < key <= upper``: about ``batch_size`` rows
+    (default MIGRATION_BATCH_SIZE), extended to the end of the last key's rows
+    when the key is not unique, so a batch never splits one key's rows. ``lower`` is None on the first batch
+    and ``upper`` is None on the last. ``key`` should be indexed, since each
+    boundary is found by skipping ``batch_size`` rows along it.
+    """
+    batch_size = batch_size or BACKFILL_BATCH_SIZE
+    connection = op.get_bind()
+    column = sa.table(table, sa.column(key)).c[key]
+    batches = 0
+    lower = None
+    with op.get_context().autocommit_block():
+        while True:
+            boundary = sa.select(column).order_by(column).offset(batch_size - 1).limit(1)
+            if lower is not None:
+                boundary = boundary.where(column > lower)
+            upper = connection.execute(boundary).scalar()
+            apply_batch(connection, lower, upper)
+            batches += 1
+            logger.info("Backfilled %s batch %d up to %s=%s", table, batches, key, upper)
+            if upper is None:
+                return batches
+            lower = upper
+
+
+def key_range(column, lower, upper):
+    """The WHERE clause for one backfill_in_batches range of ``column``"""
+    clauses = []
+    if lower is not None:
+        clauses.append(column > lower)
+    if upper is not None:
+        clauses.append(column <= upper)
+    return sa.and_(sa.true(), *clauses)
@@ -0,0 +1,179 @@
+"""
+Connection pool settings and instrumentation for the database engines.
+
+Pool sizing comes from the environment so it can be matched to the number of
+uvicorn workers and to the limits of PgBouncer or the database:
+
+    DB_POOL             queue (default) pools connections in-process; null opens
+                        a connection per checkout, for use behind an external pooler
+    DB_POOL_SIZE        connections kept open per engine (default 5)
+    DB_MAX_OVERFLOW     extra connections allowed under load (default 10)
+    DB_POOL_TIMEOUT     seconds to wait for a connection before failing (default 30)
+    DB_POOL_RECYCLE     seconds before a connection is replaced (default 300, -1 = never)
+    DB_POOL_PRE_PING    test each connection on checkout (default true)
+
+Each engine's pool records how many checkouts it served, how long they waited
+and how many timed out; ``pool_status()`` reports those next to the live pool
+counters for the metrics endpoints, and ``pool_metric_lines()`` exposes them
+to the Prometheus scrape.
+"""
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from ..utils.metrics import registry
+
+load_dotenv()
+
+DB_POOL = os.getenv("DB_POOL", "queue").lower()
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "300"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+if DB_POOL not in ("queue", "null"):
+    raise ValueError(f"DB_POOL must be 'queue' or 'null', not {DB_POOL!r}")
+
+
+class PoolMetrics:
+    """Checkout counters for one engine's pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.checked_out = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def observe_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def on_checkout(self, *args):
+        with self._lock:
+            self.checked_out += 1
+
+    def on_checkin(self, *args):
+        with self._lock:
+            self.checked_out -= 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checked_out": self.checked_out,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "timeouts_per_checkout": self.timeouts / attempts if attempts else 0.0,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_avg": round(self.wait_seconds_total / attempts, 6) if attempts else 0.0,
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+
+
+class MeteredPoolMixin:
+    """Times every connection request, including waits for a free slot and connects."""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.observe_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.observe_wait(time.perf_counter() - start)
+        return connection
+
+
+# Engines whose pools are reported by pool_status(), by name
+_engines: Dict[str, tuple] = {}
+
+
+def pool_options(metrics: PoolMetrics, is_async: bool = False) -> dict:
+    """
+    Keyword arguments for create_engine/create_async_engine from the DB_POOL_* settings.
+
+    The pool class is a metered subclass bound to ``metrics``. It is a class
+    attribute so it survives the pool being recreated by ``engine.dispose()``.
+    """
+    if DB_POOL == "null":
+        base = NullPool
+    else:
+        base = AsyncAdaptedQueuePool if is_async else QueuePool
+    pool_class = type(f"Metered{base.__name__}", (MeteredPoolMixin, base), {"metrics": metrics})
+
+    options = {"poolclass": pool_class, "pool_pre_ping": DB_POOL_PRE_PING}
+    if DB_POOL == "queue":
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    return options
+
+
+def register_pool(name: str, engine, metrics: PoolMetrics):
+    """Report ``engine``'s pool in pool_status() under ``name``."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "checkout", metrics.on_checkout)
+    event.listen(sync_engine, "checkin", metrics.on_checkin)
+    _engines[name] = (sync_engine, metrics)
+
+
+def pool_status(name: Optional[str] = None) -> Dict[str, dict]:
+    """Live pool occupancy plus checkout counters for each registered engine."""
+    status = {}
+    for engine_name, (engine, metrics) in _engines.items():
+        if name is not None and engine_name != name:
+            continue
+        pool = engine.pool
+        stats = {"pool": type(pool).__name__, **metrics.snapshot()}
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_in=pool.checkedin(),
+                overflow=pool.overflow(),
+                timeout=pool.timeout(),
+            )
+        status[engine_name] = stats
+    return status
+
+
+# pool_status() keys exported to Prometheus: (metric name, type, help)
+POOL_METRICS = {
+    "checked_out": ("db_pool_checked_out", "gauge", "Connections currently checked out of the pool"),
+    "checkouts": ("db_pool_checkouts_total", "counter", "Connections checked out of the pool"),
+    "timeouts": ("db_pool_checkout_timeouts_total", "counter", "Checkouts that timed out waiting for a connection"),
+    "wait_seconds_total": ("db_pool_wait_seconds_total", "counter", "Time spent waiting for pool connections"),
+    "size": ("db_pool_size", "gauge", "Configured pool size"),
+    "overflow": ("db_pool_overflow", "gauge", "Connections open beyond the pool size"),
+}
+
+
+def pool_metric_lines():
+    """pool_status() in the Prometheus text format, one series per engine."""
+    status = pool_status()
+    for key, (name, kind, documentation) in POOL_METRICS.items():
+        yield f"# HELP {name} {documentation}"
+        yield f"# TYPE {name} {kind}"
+        for engine_name, stats in status.items():
+            if key in stats:
+                yield f'{name}{{engine="{engine_name}"}} {stats[key]}'
+
+
+registry.add_collector(pool_metric_lines)
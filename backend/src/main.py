@@ -1,13 +1,22 @@
 """
 Main FastAPI application for the AI-Powered Natural Language Chatbot for Todo Management.
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import structlog
-from src.database import init_db
-from src.api.chat_endpoint import router as chat_router
-from src.api.tasks_simple import router as tasks_router
+from src.database import DB_INIT_ON_STARTUP, init_db, USE_ASYNC_DB
+from src.utils.hashing import HashingPoolSaturatedError, password_hasher
+from src.utils.rate_limit import OverloadedError, RateLimitedError
+from src.services.email_outbox import EMAIL_WORKER_ENABLED, email_outbox_worker
+from src.services.maintenance import MAINTENANCE_ENABLED, maintenance_scheduler
+from src.middleware.query_budget import QueryBudgetMiddleware
+from src.middleware.metrics import MetricsMiddleware
+from src.middleware.profiling import PROFILING_ENABLED, ProfilingMiddleware
+from src.api.tasks import router as tasks_router
 from src.api.auth import router as auth_router
+from src.api.metrics import router as metrics_router
+from src.api.lazy import include_lazy_router
 
 # Configure structlog
 structlog.configure(
@@ -43,24 +52,88 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+app.add_middleware(QueryBudgetMiddleware)
+# Opt-in request profiling; not installed at all unless enabled
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+# Added last so it is outermost and its latency covers the other middleware
+app.add_middleware(MetricsMiddleware)
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize the database when the application starts."""
+    """
+    Run the migrations if DB_INIT_ON_STARTUP is set. Normally they run once
+    per deploy with ``python -m src.cli init-db`` instead, so workers start
+    without touching the database. Also starts this process's email outbox
+    worker and maintenance scheduler unless disabled.
+    """
     logger.info("Starting up application")
-    init_db()
-    logger.info("Database initialized")
+    if DB_INIT_ON_STARTUP:
+        init_db()
+        logger.info("Database initialized")
+    if EMAIL_WORKER_ENABLED:
+        email_outbox_worker.start()
+    if MAINTENANCE_ENABLED:
+        maintenance_scheduler.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the background workers and the password hashing worker processes."""
+    await maintenance_scheduler.stop()
+    await email_outbox_worker.stop()
+    password_hasher.shutdown()
+
+@app.exception_handler(HashingPoolSaturatedError)
+async def hashing_saturated_handler(request: Request, exc: HashingPoolSaturatedError):
+    """Shed auth load quickly when the password hashing pool is full."""
+    logger.warning("Password hashing pool saturated", path=request.url.path)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.exception_handler(RateLimitedError)
+async def rate_limited_handler(request: Request, exc: RateLimitedError):
+    """Reject a client that exhausted a rate limit bucket."""
+    logger.info("Rate limited", path=request.url.path, rule=exc.rule)
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.exception_handler(OverloadedError)
+async def overloaded_handler(request: Request, exc: OverloadedError):
+    """Shed expensive requests early when their concurrency cap is reached."""
+    logger.warning("Concurrency cap reached", path=request.url.path)
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 @app.get("/")
 async def root():
     """Root endpoint for health check."""
     return {"message": "AI-Powered Todo Chatbot API is running"}
 
-# Include API routers
+# Include API routers. With the async database layer enabled the async auth and
+# task CRUD routers are registered first so they take precedence; the sync routers
+# still serve every other route.
+if USE_ASYNC_DB:
+    from src.api.async_auth import router as async_auth_router
+    from src.api.async_tasks import router as async_tasks_router
+    app.include_router(async_auth_router, prefix="/auth", tags=["auth"])
+    app.include_router(async_tasks_router, prefix="/api/{user_id}", tags=["tasks"])
+
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
-app.include_router(chat_router, prefix="/api/{user_id}", tags=["chat"])
 app.include_router(tasks_router, prefix="/api/{user_id}", tags=["tasks"])
+app.include_router(metrics_router, tags=["metrics"])
+# The chat router and its LLM client are imported on the first chat request
+include_lazy_router(app, "src.api.chat_endpoint", "/api/{user_id}/chat", prefix="/api/{user_id}", tags=["chat"])
 
 if __name__ == "__main__":
     import uvicorn
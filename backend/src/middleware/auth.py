@@ -1,23 +1,28 @@
-from fastapi import HTTPException, status
+from fastapi import HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
 from ..utils.security import verify_token
+from ..utils.token_cache import token_cache
 from fastapi import Depends
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
-def validate_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Validate JWT token and extract user information"""
-    token = credentials.credentials
-    
-    payload = verify_token(token)
+def user_from_token(token: str) -> dict:
+    """Validate a JWT and return the user it was issued to"""
+    # Tokens seen before are served from the cache until their exp
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = verify_token(token)
+        if payload is not None:
+            token_cache.put(token, payload)
     if payload is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
+
     user_id = payload.get("sub")
     if user_id is None:
         raise HTTPException(
@@ -25,5 +30,30 @@ def validate_token(credentials: HTTPAuthorizationCredentials = Depends(security)
             detail="Invalid token: no user ID",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    return {"user_id": user_id, "email": payload.get("email")}
\ No newline at end of file
+
+    return {"user_id": user_id, "email": payload.get("email")}
+
+# The dependencies are async so routes do not take a threadpool hop to run
+# them; validation is CPU work and a cache lookup that never blocks.
+async def validate_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Validate JWT token and extract user information"""
+    return user_from_token(credentials.credentials)
+
+async def validate_stream_token(
+    access_token: Optional[str] = Query(None),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+):
+    """
+    Validate a JWT from the Authorization header or an ``access_token`` query parameter.
+
+    Browsers' EventSource cannot send headers, so streaming endpoints also accept
+    the token in the query string.
+    """
+    token = credentials.credentials if credentials else access_token
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user_from_token(token)
@@ -0,0 +1,60 @@
+import time
+
+from ..utils.metrics import (
+    http_request_duration_seconds,
+    http_requests_in_flight,
+    http_requests_total,
+    http_response_size_bytes,
+)
+
+
+def route_template(scope) -> str:
+    """
+    The path template of the route that handled a request, e.g.
+    ``/api/{user_id}/tasks/{id}``, so metrics are not split per user or task.
+    Requests that matched no route are grouped as ``unmatched``.
+    """
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request counts, latency, response size and
+    in-flight requests for the /metrics endpoint.
+
+    Latency runs until the last body chunk is sent, so streaming responses are
+    measured in full. The route template is read from the scope after the app
+    returns, since routing only resolves it further down the stack.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            method, route = scope["method"], route_template(scope)
+            http_requests_total.labels(method, route, str(status)).inc()
+            http_request_duration_seconds.labels(method, route).observe(duration)
+            http_response_size_bytes.labels(method, route).observe(size)
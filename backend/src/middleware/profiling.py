@@ -0,0 +1,140 @@
+"""
+Opt-in per-request profiling.
+
+When PROFILING_ENABLED is set, main.py adds ProfilingMiddleware. It profiles a
+request made with an admin token (one whose email is in PROFILE_ADMIN_EMAILS)
+that either sends the PROFILE_HEADER header or falls into the
+PROFILE_SAMPLE_RATE sample. The response then carries an ``X-Profile-Id``
+header naming the file written to PROFILE_DIR. With PROFILING_ENABLED unset the
+middleware is not installed at all, so there is no per-request cost.
+
+    PROFILING_ENABLED        install the middleware (default false)
+    PROFILE_ADMIN_EMAILS     comma-separated emails allowed to trigger profiles
+    PROFILE_HEADER           request header that triggers a profile (default X-Profile)
+    PROFILE_SAMPLE_RATE      fraction of admin requests profiled without the header (default 0)
+    PROFILE_INTERVAL_MS      sampling interval (default 5)
+    PROFILE_DIR              output directory (default profiles)
+    PROFILE_FORMAT           speedscope (default) or collapsed
+    PROFILE_MAX_CONCURRENT   profiles running at once per worker (default 1)
+
+The sampler sees every thread of the worker, so requests running concurrently
+with the profiled one show up in its profile too.
+"""
+import os
+import random
+import threading
+import time
+import uuid
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from ..utils.logging import get_logger
+from ..utils.profiler import SamplingProfiler
+from .auth import user_from_token
+from .metrics import route_template
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILE_ADMIN_EMAILS = frozenset(
+    email.strip().lower() for email in os.getenv("PROFILE_ADMIN_EMAILS", "").split(",") if email.strip()
+)
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "X-Profile")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_FORMAT = os.getenv("PROFILE_FORMAT", "speedscope").lower()
+PROFILE_MAX_CONCURRENT = int(os.getenv("PROFILE_MAX_CONCURRENT", "1"))
+
+if PROFILE_FORMAT not in ("speedscope", "collapsed"):
+    raise ValueError(f"PROFILE_FORMAT must be 'speedscope' or 'collapsed', not {PROFILE_FORMAT!r}")
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that samples the stacks of selected requests."""
+
+    def __init__(
+        self,
+        app,
+        admin_emails=PROFILE_ADMIN_EMAILS,
+        header: str = PROFILE_HEADER,
+        sample_rate: float = PROFILE_SAMPLE_RATE,
+        interval_ms: float = PROFILE_INTERVAL_MS,
+        directory: str = PROFILE_DIR,
+        format: str = PROFILE_FORMAT,
+        max_concurrent: int = PROFILE_MAX_CONCURRENT,
+    ):
+        self.app = app
+        self.admin_emails = frozenset(email.lower() for email in admin_emails)
+        self.header = header.lower().encode("latin-1")
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+        self.directory = directory
+        self.format = format
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    def _is_admin(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                scheme, _, token = value.decode("latin-1").partition(" ")
+                if scheme.lower() != "bearer" or not token:
+                    return False
+                try:
+                    email = user_from_token(token)["email"]
+                except Exception:
+                    return False
+                return bool(email) and email.lower() in self.admin_emails
+        return False
+
+    def _should_profile(self, scope) -> bool:
+        requested = any(name == self.header for name, _ in scope["headers"])
+        if not requested and not (self.sample_rate and random.random() < self.sample_rate):
+            return False
+        return self._is_admin(scope)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.admin_emails or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        if not self._slots.acquire(blocking=False):
+            logger.info("Profile skipped, another profile is running", path=scope["path"])
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        profiler = SamplingProfiler(self.interval)
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            name = f"{scope['method']} {route_template(scope)}"
+            profiler.stop(lambda p: self._write(p, profile_id, name))
+
+    def _write(self, profiler: SamplingProfiler, profile_id: str, name: str):
+        # Runs on the sampler thread once sampling has stopped
+        path: Optional[str] = None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = profiler.write(os.path.join(self.directory, profile_id), name, self.format)
+        except OSError:
+            logger.exception("Failed to write request profile", profile_id=profile_id)
+        finally:
+            self._slots.release()
+        if path:
+            logger.info(
+                "Request profile written",
+                profile=path,
+                request=name,
+                samples=profiler.sample_count,
+                duration_ms=round(profiler.duration * 1000, 2),
+            )
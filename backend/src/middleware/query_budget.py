@@ -0,0 +1,32 @@
+from ..database.instrumentation import RequestQueries, request_queries
+from ..utils.metrics import http_request_db_seconds
+from .metrics import route_template
+
+
+class QueryBudgetMiddleware:
+    """
+    ASGI middleware that counts the database statements each HTTP request runs.
+
+    The counter lives in a context variable, which FastAPI copies into the
+    threadpool for sync endpoints and streaming bodies, so every statement a
+    request triggers is attributed to it. When the response completes,
+    RequestQueries.report warns about query budget overruns and N+1 patterns,
+    and the request's total database time is recorded per route template.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries()
+        token = request_queries.set(queries)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_queries.reset(token)
+            queries.report(scope["method"], scope["path"])
+            http_request_db_seconds.labels(scope["method"], route_template(scope)).observe(queries.duration_ms / 1000)
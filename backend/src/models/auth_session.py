@@ -0,0 +1,88 @@
+"""
+Refresh token sessions for the AI-Powered Natural Language Chatbot for Todo Management.
+"""
+from datetime import datetime, timedelta
+from typing import NamedTuple
+import uuid
+
+from sqlalchemy import delete, insert, literal, select, update
+from sqlmodel import SQLModel, Field
+
+from ..utils.security import REFRESH_TOKEN_EXPIRE_DAYS
+from .user import User
+
+
+class AuthSession(SQLModel, table=True):
+    """
+    One signed-in client, holding its current refresh token.
+
+    The token is ``<id>.<secret>`` and only an HMAC of the secret is stored,
+    so refreshing is a primary key lookup and a hash comparison, never a
+    bcrypt check. Each refresh rotates the secret in place and pushes
+    ``expires_at`` out by REFRESH_TOKEN_EXPIRE_DAYS. Presenting a secret the
+    session has rotated away from means the token was copied, so the session
+    is ended.
+
+    Revoking a session deletes its row (sign-out, token reuse, a password
+    reset for all of the user's sessions). Expired rows are deleted in batches
+    by the maintenance scheduler (``services/maintenance.py``). Access tokens
+    already issued stay valid until their own expiry.
+    """
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    user_id: uuid.UUID = Field(foreign_key="user.id", nullable=False, index=True)
+    token_hash: str = Field(nullable=False)
+    expires_at: datetime = Field(nullable=False)
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+    @staticmethod
+    def get_expiry(days: int = REFRESH_TOKEN_EXPIRE_DAYS) -> datetime:
+        """Expiry for a session refreshed now"""
+        return datetime.utcnow() + timedelta(days=days)
+
+
+class RefreshedSession(NamedTuple):
+    """A rotated refresh token and the user it signs in"""
+    refresh_token: str
+    user_id: uuid.UUID
+    email: str
+
+
+def start_session(auth_session: AuthSession, password_hash: str):
+    """
+    ``INSERT ... SELECT`` of a new session that only inserts a row while the
+    user's password hash is still ``password_hash``. Sign-in may have checked
+    the password against a hash cached before a reset in another process;
+    this keeps that from minting a session with the old password.
+    """
+    values = auth_session.model_dump()
+    columns = AuthSession.__table__.c
+    return insert(AuthSession).from_select(
+        list(values),
+        select(*(literal(value, columns[name].type) for name, value in values.items())).where(
+            User.id == auth_session.user_id, User.password_hash == password_hash
+        ),
+    )
+
+
+def rotate_session(session_id: uuid.UUID, token_hash: str, new_token_hash: str):
+    """
+    ``UPDATE`` replacing a session's token hash, only while it still holds
+    ``token_hash``: of two concurrent refreshes with the same token, one
+    updates a row.
+    """
+    return (
+        update(AuthSession)
+        .where(AuthSession.id == session_id, AuthSession.token_hash == token_hash)
+        .values(token_hash=new_token_hash, expires_at=AuthSession.get_expiry())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def revoke_session(session_id: uuid.UUID):
+    """Single-statement ``DELETE`` of one session"""
+    return delete(AuthSession).where(AuthSession.id == session_id).execution_options(synchronize_session=False)
+
+
+def revoke_user_sessions(user_id: uuid.UUID):
+    """Single-statement ``DELETE`` of all of a user's sessions"""
+    return delete(AuthSession).where(AuthSession.user_id == user_id).execution_options(synchronize_session=False)
@@ -0,0 +1,44 @@
+"""
+Outbound email queue for the AI-Powered Natural Language Chatbot for Todo Management.
+"""
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Column, Index, Text
+from sqlmodel import SQLModel, Field
+
+
+class EmailOutbox(SQLModel, table=True):
+    """
+    One queued outbound email.
+
+    Rows are added in the same transaction as the change that triggers them
+    (a password reset token, say), so an email is queued exactly when that
+    change commits, and the request never waits on the email provider. The
+    outbox worker (``services/email_outbox.py``) sends due rows in batches.
+
+    ``status`` stays ``pending`` until the message is sent, or becomes
+    ``failed`` after EMAIL_MAX_ATTEMPTS attempts. ``next_attempt_at`` is when a
+    pending row is next due: claiming a row pushes it out by the claim lease,
+    so a worker that dies mid-send releases its rows, and a failed attempt
+    pushes it out by the backoff delay.
+
+    Sent and failed rows are deleted EMAIL_RETENTION_DAYS after their last
+    attempt by the maintenance scheduler (``services/maintenance.py``).
+    """
+    __table_args__ = (
+        # The worker scans pending rows by due time
+        Index("ix_emailoutbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str = Field(nullable=False)
+    to_email: str = Field(nullable=False)
+    subject: str = Field(nullable=False)
+    html: str = Field(sa_column=Column(Text, nullable=False))
+    status: str = Field(default="pending", nullable=False)
+    attempts: int = Field(default=0, nullable=False)
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    last_error: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+    sent_at: Optional[datetime] = Field(default=None)
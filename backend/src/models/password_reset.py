@@ -1,10 +1,28 @@
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index, not_, text, update
 from datetime import datetime, timedelta
 import uuid
 import secrets
 
 
 class PasswordResetToken(SQLModel, table=True):
+    """
+    A single-use password reset token. Requesting a new token invalidates the
+    user's unused ones; used and expired rows are deleted in batches by the
+    maintenance scheduler (``services/maintenance.py``).
+    """
+    __table_args__ = (
+        Index("ix_passwordresettoken_user_used", "user_id", "used"),
+        # Only a user's few unused tokens, which invalidation looks up
+        Index(
+            "ix_passwordresettoken_active",
+            "user_id",
+            # Written the way each dialect renders ``not_(used)`` so the planner matches it
+            postgresql_where=text("NOT used"),
+            sqlite_where=text("used = 0"),
+        ),
+    )
+
     id: int = Field(default=None, primary_key=True)
     user_id: uuid.UUID = Field(foreign_key="user.id", nullable=False)
     token: str = Field(unique=True, nullable=False, index=True)
@@ -25,3 +43,13 @@ class PasswordResetToken(SQLModel, table=True):
     def is_valid(self) -> bool:
         """Check if token is valid (not expired and not used)"""
         return not self.used and datetime.utcnow() < self.expires_at
+
+
+def invalidate_user_tokens(user_id: uuid.UUID):
+    """Single-statement ``UPDATE passwordresettoken SET used = true`` for a user's unused tokens."""
+    return (
+        update(PasswordResetToken)
+        .where(PasswordResetToken.user_id == user_id, not_(PasswordResetToken.used))
+        .values(used=True)
+        .execution_options(synchronize_session=False)
+    )
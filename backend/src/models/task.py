@@ -2,19 +2,104 @@
 Task model for the AI-Powered Natural Language Chatbot for Todo Management.
 """
 from sqlmodel import SQLModel, Field
-from typing import Optional
+from sqlalchemy import DDL, Index, event, func, literal_column, text
+from sqlalchemy.dialects import postgresql  # noqa: F401  registers the typed to_tsvector/to_tsquery
+from pydantic import field_validator
+from typing import List, Literal, Optional
 import datetime
 
 class TaskBase(SQLModel):
     title: str
     description: Optional[str] = None
     completed: bool = False
+    due_date: Optional[datetime.datetime] = None
+    priority: str = "medium"
 
 class Task(TaskBase, table=True):
+    # The keyset pagination indexes are declared below the class, since their
+    # columns have sort directions
+    __table_args__ = (
+        # Incremental sync reads a user's changes in sequence order
+        Index("ix_task_user_seq", "user_id", "seq"),
+        # Overdue counts scan a user's pending tasks by due date
+        Index("ix_task_user_completed_due", "user_id", "completed", "due_date"),
+        # The tombstone purge finds old deletions; partial, so live tasks cost nothing
+        Index(
+            "ix_task_tombstones",
+            "deleted_at",
+            postgresql_where=text("deleted_at IS NOT NULL"),
+            sqlite_where=text("deleted_at IS NOT NULL"),
+        ),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: str = Field(index=True)  # FK to user, indexed for performance
     created_at: datetime.datetime = Field(default_factory=datetime.datetime.utcnow)
     updated_at: datetime.datetime = Field(default_factory=datetime.datetime.utcnow)
+    # Per-user change sequence of the last write, see TaskCounter
+    seq: int = Field(default=0, nullable=False)
+    # Set when the task is deleted; the row is kept as a tombstone for sync clients
+    deleted_at: Optional[datetime.datetime] = None
+
+# Composite indexes backing keyset pagination of a user's task list. Column order
+# and directions match the default listing sort, (completed ASC, <sort column>
+# DESC, id DESC). A page reads one range per completed value (see
+# utils.pagination.keyset_page), forward for descending order and backward for
+# ascending, so neither order sorts the user's rows.
+for name, sort_column in (("updated", Task.__table__.c.updated_at), ("created", Task.__table__.c.created_at)):
+    Task.__table__.append_constraint(
+        Index(
+            f"ix_task_user_completed_{name}_desc",
+            Task.__table__.c.user_id,
+            Task.__table__.c.completed,
+            sort_column.desc(),
+            Task.__table__.c.id.desc(),
+        )
+    )
+
+# Full-text search over title and description. The schema is dialect specific:
+# PostgreSQL gets a GIN expression index over the weighted tsvector below, and
+# SQLite gets an FTS5 table mirroring task that triggers keep in sync.
+
+def search_document(title, description):
+    """
+    Weighted tsvector of a task's title (weight A) and description (weight B).
+
+    Queries must use this exact expression for PostgreSQL to pick the GIN index,
+    so all constants are rendered inline rather than bound.
+    """
+    english = literal_column("'english'")
+    return func.setweight(func.to_tsvector(english, title), literal_column("'A'")).op("||")(
+        func.setweight(
+            func.to_tsvector(english, func.coalesce(description, literal_column("''"))),
+            literal_column("'B'"),
+        )
+    )
+
+# Expression-only indexes are not attached to a table automatically
+Task.__table__.append_constraint(
+    Index(
+        "ix_task_search",
+        search_document(Task.__table__.c.title, Task.__table__.c.description),
+        postgresql_using="gin",
+    ).ddl_if(dialect="postgresql")
+)
+
+TASK_FTS_DDL = [
+    "CREATE VIRTUAL TABLE task_fts USING fts5("
+    "title, description, content='task', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER task_fts_insert AFTER INSERT ON task BEGIN "
+    "INSERT INTO task_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER task_fts_delete AFTER DELETE ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER task_fts_update AFTER UPDATE OF title, description ON task BEGIN "
+    "INSERT INTO task_fts(task_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO task_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+]
+
+for statement in TASK_FTS_DDL:
+    event.listen(Task.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Task.__table__, "after_drop", DDL("DROP TABLE IF EXISTS task_fts").execute_if(dialect="sqlite"))
 
 class TaskCreate(TaskBase):
     pass
@@ -24,8 +109,70 @@ class TaskRead(TaskBase):
     user_id: str
     created_at: datetime.datetime
     updated_at: datetime.datetime
+    is_overdue: bool = False
 
 class TaskUpdate(SQLModel):
     title: Optional[str] = None
     description: Optional[str] = None
-    completed: Optional[bool] = None
\ No newline at end of file
+    completed: Optional[bool] = None
+    due_date: Optional[datetime.datetime] = None
+    priority: Optional[str] = None
+
+
+MAX_BATCH_OPERATIONS = 1000
+
+class TaskBatchOperation(SQLModel):
+    """One operation in a batch request.
+
+    ``create`` takes ``task``; ``update`` takes ``id`` and ``changes``;
+    ``delete`` and ``complete`` take ``id``.
+    """
+    op: Literal["create", "update", "delete", "complete"]
+    id: Optional[int] = None
+    task: Optional[TaskCreate] = None
+    changes: Optional[TaskUpdate] = None
+
+class TaskBatchRequest(SQLModel):
+    operations: List[TaskBatchOperation]
+
+    @field_validator('operations')
+    @classmethod
+    def validate_operations(cls, v):
+        if not v:
+            raise ValueError('At least one operation is required')
+        if len(v) > MAX_BATCH_OPERATIONS:
+            raise ValueError(f'A batch may contain at most {MAX_BATCH_OPERATIONS} operations')
+        return v
+
+class TaskBatchResult(SQLModel):
+    index: int
+    op: str
+    status: Literal["ok", "not_found", "invalid"]
+    id: Optional[int] = None
+    task: Optional[TaskRead] = None
+    detail: Optional[str] = None
+
+class TaskBatchResponse(SQLModel):
+    results: List[TaskBatchResult]
+
+class TaskChanges(SQLModel):
+    tasks: List[TaskRead]
+    deleted_ids: List[int]
+    since: int  # pass back as ?since= on the next poll
+    has_more: bool
+    reset: bool = False  # tombstones since `since` were purged; resync from since=0
+
+class TaskImportError(SQLModel):
+    line: int
+    detail: str
+
+class TaskImportResult(SQLModel):
+    imported: int
+    failed: int
+    errors: List[TaskImportError]  # first MAX_IMPORT_ERRORS failures only
+
+class TaskStats(SQLModel):
+    total: int
+    completed: int
+    pending: int
+    overdue: int
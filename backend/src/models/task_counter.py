@@ -0,0 +1,25 @@
+"""
+Per-user task bookkeeping for the AI-Powered Natural Language Chatbot for Todo Management.
+"""
+from sqlmodel import SQLModel, Field
+
+class TaskCounter(SQLModel, table=True):
+    """
+    One row per user holding their task change sequence and task counts.
+
+    Every task write bumps ``last_seq`` with an upsert in the same transaction
+    and stamps the new value on the task row. The upsert takes a row lock, so a
+    user's writes commit in sequence order and ``seq > since`` polling never
+    skips a change. ``purged_seq`` is the highest sequence whose tombstone has
+    been purged; clients that last synced before it must do a full resync.
+
+    ``task_count`` and ``completed_count`` count the user's live tasks. Writes
+    adjust them in the same transaction as the task change, so the stats
+    endpoint never has to count rows; ``python -m src.cli verify-task-stats``
+    recomputes them to detect drift.
+    """
+    user_id: str = Field(primary_key=True)
+    last_seq: int = Field(default=0, nullable=False)
+    purged_seq: int = Field(default=0, nullable=False)
+    task_count: int = Field(default=0, nullable=False)
+    completed_count: int = Field(default=0, nullable=False)
@@ -0,0 +1,158 @@
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Optional, Tuple
+from datetime import datetime
+import hmac
+from ..models.auth_session import AuthSession, RefreshedSession, revoke_session, rotate_session, start_session
+from ..models.user import User, UserCreate
+from ..utils.hashing import password_hasher
+from ..utils.security import create_refresh_token, dummy_password_hash, parse_refresh_token
+from ..utils.user_cache import UserCredentials, user_cache
+
+class AsyncAuthService:
+    @staticmethod
+    async def authenticate_user(session: AsyncSession, email: str, password: str) -> Optional[UserCredentials]:
+        """
+        Authenticate a user by email and password. Unknown emails cost the same
+        bcrypt check, against a dummy hash, so timing does not reveal them.
+        """
+        cached = user_cache.get(email)
+        credentials = cached or await AsyncAuthService.get_credentials(session, email)
+        if credentials is None:
+            await password_hasher.verify_async(password, dummy_password_hash())
+            return None
+        if cached is None:
+            user_cache.put(credentials)
+        if await password_hasher.verify_async(password, credentials.password_hash):
+            return credentials
+
+        if cached is not None:
+            # The cached hash may predate a password change made by another process
+            current = await AsyncAuthService.get_credentials(session, email)
+            if current is None:
+                user_cache.invalidate(email)
+            elif current.password_hash != cached.password_hash:
+                user_cache.put(current)
+                if await password_hasher.verify_async(password, current.password_hash):
+                    return current
+        return None
+
+    @staticmethod
+    async def create_user(session: AsyncSession, user_create: UserCreate) -> User:
+        """
+        Create a new user with hashed password in a single INSERT; the unique
+        constraint on email rejects duplicates.
+        """
+        hashed_password = await password_hasher.hash_async(user_create.password)
+        db_user = User(email=user_create.email, password_hash=hashed_password)
+        try:
+            # A Core insert leaves db_user detached, so reading it back needs no query
+            await session.execute(insert(User).values(**db_user.model_dump()))
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            raise ValueError("Email already registered")
+        user_cache.put(UserCredentials(db_user.id, db_user.email, hashed_password))
+        return db_user
+
+    @staticmethod
+    async def get_credentials(session: AsyncSession, email: str) -> Optional[UserCredentials]:
+        """Load the sign-in columns for an email, bypassing the cache"""
+        result = await session.exec(select(User.id, User.email, User.password_hash).where(User.email == email))
+        row = result.first()
+        return UserCredentials(*row) if row else None
+
+    @staticmethod
+    async def lookup_credentials(session: AsyncSession, email: str) -> Optional[UserCredentials]:
+        """The sign-in columns for an email, from the user cache when possible"""
+        credentials = user_cache.get(email)
+        if credentials is None:
+            credentials = await AsyncAuthService.get_credentials(session, email)
+            if credentials is not None:
+                user_cache.put(credentials)
+        return credentials
+
+    @staticmethod
+    async def create_session(session: AsyncSession, credentials: UserCredentials) -> Optional[str]:
+        """
+        Start a refresh token session for a signed-in user; returns its refresh
+        token, or None if the password changed since ``credentials`` were read.
+        """
+        auth_session = AuthSession(user_id=credentials.id, token_hash="", expires_at=AuthSession.get_expiry())
+        refresh_token, auth_session.token_hash = create_refresh_token(auth_session.id)
+        result = await session.execute(start_session(auth_session, credentials.password_hash))
+        await session.commit()
+        return refresh_token if result.rowcount == 1 else None
+
+    @staticmethod
+    async def sign_in(session: AsyncSession, email: str, password: str) -> Optional[Tuple[UserCredentials, str]]:
+        """Authenticate a user and start a session; returns the user and refresh token"""
+        for _ in range(2):
+            user = await AsyncAuthService.authenticate_user(session, email, password)
+            if user is None:
+                return None
+            refresh_token = await AsyncAuthService.create_session(session, user)
+            if refresh_token is not None:
+                return user, refresh_token
+            # The hash was cached before another process changed the password;
+            # check again against the current one
+            user_cache.invalidate(email)
+        return None
+
+    @staticmethod
+    async def refresh_session(session: AsyncSession, refresh_token: str) -> Optional[RefreshedSession]:
+        """
+        Rotate a refresh token: one primary key lookup, an HMAC comparison and
+        a conditional UPDATE. A token the session has already rotated away
+        from ends the session.
+        """
+        parsed = parse_refresh_token(refresh_token)
+        if parsed is None:
+            return None
+        session_id, token_hash = parsed
+        row = (await session.exec(
+            select(AuthSession.token_hash, AuthSession.expires_at, User.id, User.email)
+            .join(User, User.id == AuthSession.user_id)
+            .where(AuthSession.id == session_id)
+        )).first()
+        if row is None or row.expires_at <= datetime.utcnow():
+            return None
+        if not hmac.compare_digest(token_hash, row.token_hash):
+            await session.execute(revoke_session(session_id))
+            await session.commit()
+            return None
+
+        new_token, new_token_hash = create_refresh_token(session_id)
+        result = await session.execute(rotate_session(session_id, row.token_hash, new_token_hash))
+        await session.commit()
+        if result.rowcount != 1:
+            # A concurrent refresh with the same token rotated it first
+            return None
+        return RefreshedSession(new_token, row.id, row.email)
+
+    @staticmethod
+    async def end_session(session: AsyncSession, refresh_token: str) -> bool:
+        """Sign a client out by deleting the session its refresh token belongs to"""
+        parsed = parse_refresh_token(refresh_token)
+        if parsed is None:
+            return False
+        session_id, token_hash = parsed
+        result = await session.execute(
+            revoke_session(session_id).where(AuthSession.token_hash == token_hash)
+        )
+        await session.commit()
+        return result.rowcount == 1
+
+    @staticmethod
+    async def get_user_by_email(session: AsyncSession, email: str) -> Optional[User]:
+        """Get a user by email"""
+        result = await session.exec(select(User).where(User.email == email))
+        return result.first()
+
+    @staticmethod
+    async def get_user_by_id(session: AsyncSession, user_id) -> Optional[User]:
+        """Get a user by ID"""
+        result = await session.exec(select(User).where(User.id == user_id))
+        return result.first()
@@ -0,0 +1,188 @@
+"""
+Async task service for the AI-Powered Natural Language Chatbot for Todo Management.
+Mirrors TaskService on an AsyncSession so request handlers never block a worker thread.
+"""
+from typing import List, Optional, Tuple
+from sqlalchemy import not_
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..models.task import Task, TaskCreate, TaskUpdate
+from ..utils.logging import get_logger
+from .task_events import task_event
+from .task_service import (
+    DEFAULT_PAGE_SIZE,
+    after_write_async,
+    build_page_query,
+    build_task,
+    bump_sequence,
+    count_adjustment,
+    insert_returning,
+    split_page,
+    tombstone_returning,
+    update_returning,
+)
+
+logger = get_logger(__name__)
+
+class AsyncTaskService:
+    """
+    Service class for handling task operations on an async database session.
+    """
+
+    @staticmethod
+    async def create_task(db_session: AsyncSession, user_id: str, task_create: TaskCreate) -> Task:
+        """
+        Create a new task for a user.
+
+        Args:
+            db_session: Async database session
+            user_id: ID of the user creating the task
+            task_create: Task creation data
+
+        Returns:
+            Created Task object
+        """
+        logger.info("Creating task", user_id=user_id, title=task_create.title)
+
+        task = build_task(user_id, task_create)
+        task.seq = await AsyncTaskService._next_seq(db_session, user_id, task_delta=1, completed_delta=int(task.completed))
+        task = (await db_session.execute(insert_returning(task))).scalars().one()
+        db_session.expunge(task)
+        await db_session.commit()
+        await after_write_async(user_id, lambda: [task_event("created", task.id, task.seq, task)])
+
+        logger.info("Task created successfully", task_id=task.id, user_id=user_id)
+        return task
+
+    @staticmethod
+    async def get_task_by_id_and_user(db_session: AsyncSession, task_id: int, user_id: str) -> Optional[Task]:
+        """
+        Get a specific task by its ID and user ID.
+
+        Args:
+            db_session: Async database session
+            task_id: ID of the task
+            user_id: ID of the user
+
+        Returns:
+            Task object if found and belongs to user, None otherwise
+        """
+        statement = select(Task).where(Task.id == task_id, Task.user_id == user_id, Task.deleted_at.is_(None))
+        result = await db_session.exec(statement)
+        return result.first()
+
+    @staticmethod
+    async def get_tasks_page(
+        db_session: AsyncSession,
+        user_id: str,
+        completed: Optional[bool] = None,
+        priority: Optional[str] = None,
+        sort: str = "updated_at",
+        order: str = "desc",
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Task], Optional[str]]:
+        """
+        Get one page of a user's tasks using keyset pagination.
+
+        See TaskService.get_tasks_page for the ordering and cursor semantics.
+
+        Returns:
+            Tuple of (tasks, next_cursor); next_cursor is None on the last page
+        """
+        statement, limit, sort_spec = build_page_query(
+            user_id, completed, priority, sort, order, limit, cursor
+        )
+        result = await db_session.exec(statement)
+        tasks, next_cursor = split_page(list(result.all()), limit, sort, sort_spec)
+
+        logger.info("Task page fetched", user_id=user_id, task_count=len(tasks), has_more=next_cursor is not None)
+        return tasks, next_cursor
+
+    @staticmethod
+    async def update_task(db_session: AsyncSession, task_id: int, user_id: str, task_update: TaskUpdate) -> Optional[Task]:
+        """
+        Update a task for a user.
+
+        Args:
+            db_session: Async database session
+            task_id: ID of the task to update
+            user_id: ID of the user
+            task_update: Task update data
+
+        Returns:
+            Updated Task object, or None if the task does not exist
+        """
+        logger.info("Updating task", task_id=task_id, user_id=user_id)
+
+        values = task_update.model_dump(exclude_unset=True)
+        seq = await AsyncTaskService._next_seq(db_session, user_id)
+        if values.get("completed") is not None:
+            await db_session.execute(count_adjustment(task_id, user_id, "complete", values["completed"]))
+        return await AsyncTaskService._update_one(db_session, user_id, update_returning(task_id, user_id, values, seq))
+
+    @staticmethod
+    async def toggle_task_completion(db_session: AsyncSession, task_id: int, user_id: str) -> Optional[Task]:
+        """
+        Flip the completion status of a task with ``completed = NOT completed``.
+
+        Args:
+            db_session: Async database session
+            task_id: ID of the task
+            user_id: ID of the user
+
+        Returns:
+            Updated Task object, or None if the task does not exist
+        """
+        seq = await AsyncTaskService._next_seq(db_session, user_id)
+        await db_session.execute(count_adjustment(task_id, user_id, "toggle"))
+        return await AsyncTaskService._update_one(
+            db_session, user_id, update_returning(task_id, user_id, {"completed": not_(Task.completed)}, seq)
+        )
+
+    @staticmethod
+    async def delete_task(db_session: AsyncSession, task_id: int, user_id: str) -> bool:
+        """
+        Delete a task for a user.
+
+        Args:
+            db_session: Async database session
+            task_id: ID of the task to delete
+            user_id: ID of the user
+
+        Returns:
+            True if deletion was successful, False otherwise
+        """
+        logger.info("Deleting task", task_id=task_id, user_id=user_id)
+
+        seq = await AsyncTaskService._next_seq(db_session, user_id)
+        await db_session.execute(count_adjustment(task_id, user_id, "delete"))
+        deleted_id = (await db_session.execute(tombstone_returning(task_id, user_id, seq))).scalar_one_or_none()
+        await db_session.commit()
+
+        if deleted_id is None:
+            logger.warning("Attempted to delete non-existent task", task_id=task_id, user_id=user_id)
+            return False
+
+        await after_write_async(user_id, lambda: [task_event("deleted", task_id, seq)])
+        logger.info("Task deleted successfully", task_id=task_id, user_id=user_id)
+        return True
+
+    @staticmethod
+    async def _next_seq(
+        db_session: AsyncSession, user_id: str, count: int = 1, task_delta: int = 0, completed_delta: int = 0
+    ) -> int:
+        """Reserve ``count`` change sequence numbers for a user and return the last."""
+        statement = bump_sequence(user_id, db_session.get_bind().dialect.name, count, task_delta, completed_delta)
+        return (await db_session.execute(statement)).scalar_one()
+
+    @staticmethod
+    async def _update_one(db_session: AsyncSession, user_id: str, statement) -> Optional[Task]:
+        """Execute an UPDATE ... RETURNING for one task and commit."""
+        task = (await db_session.execute(statement)).scalars().first()
+        if task is not None:
+            db_session.expunge(task)
+        await db_session.commit()
+        if task is not None:
+            await after_write_async(user_id, lambda: [task_event("updated", task.id, task.seq, task)])
+        return task
@@ -0,0 +1,191 @@
+"""
+Background delivery of queued emails.
+
+Endpoints add an ``EmailOutbox`` row in the transaction that needs the email
+and return as soon as it commits. The worker sends due rows in batches of
+EMAIL_BATCH_SIZE through the configured provider (``email_providers.py``):
+
+- A batch is claimed with one ``UPDATE ... RETURNING`` that bumps ``attempts``
+  and pushes ``next_attempt_at`` out by EMAIL_CLAIM_LEASE_SECONDS. On
+  PostgreSQL the rows are picked with ``FOR UPDATE SKIP LOCKED``, so any number
+  of workers can drain the outbox without sending a message twice, and rows
+  claimed by a worker that dies come due again when the lease runs out.
+- A failed message is retried with exponential backoff (EMAIL_RETRY_BASE_SECONDS
+  doubling per attempt, capped at EMAIL_RETRY_MAX_SECONDS, with jitter) and
+  marked ``failed`` after EMAIL_MAX_ATTEMPTS attempts.
+
+Each app process runs an ``EmailOutboxWorker`` unless EMAIL_WORKER_ENABLED is
+false; it polls every EMAIL_POLL_INTERVAL seconds and is woken early by
+``notify()`` after a request queues an email. ``python -m src.cli send-emails``
+runs the same loop as a standalone process.
+"""
+import asyncio
+import os
+import random
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import update
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from ..database.engine import engine
+from ..models.email_outbox import EmailOutbox
+from ..utils.logging import get_logger
+from ..utils.metrics import registry
+from .email_providers import create_email_provider
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+EMAIL_WORKER_ENABLED = os.getenv("EMAIL_WORKER_ENABLED", "true").lower() == "true"
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "50"))
+EMAIL_POLL_INTERVAL = float(os.getenv("EMAIL_POLL_INTERVAL", "5"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "8"))
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", "30"))
+EMAIL_RETRY_MAX_SECONDS = float(os.getenv("EMAIL_RETRY_MAX_SECONDS", "3600"))
+EMAIL_CLAIM_LEASE_SECONDS = float(os.getenv("EMAIL_CLAIM_LEASE_SECONDS", "300"))
+
+emails_total = registry.counter(
+    "emails_total", "Outbox email send attempts by outcome (sent, retry, failed)", ("outcome",)
+)
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds before the next try after ``attempts`` failed attempts; half fixed, half jitter"""
+    delay = min(EMAIL_RETRY_MAX_SECONDS, EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def claim_batch(session: Session, batch_size: int, now: datetime) -> List:
+    """Claim up to ``batch_size`` due rows and commit; returns their (id, attempts, message) rows"""
+    due = (
+        select(EmailOutbox.id)
+        .where(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now)
+        .order_by(EmailOutbox.next_attempt_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    claimed = session.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(due.scalar_subquery()))
+        .values(
+            attempts=EmailOutbox.attempts + 1,
+            next_attempt_at=now + timedelta(seconds=EMAIL_CLAIM_LEASE_SECONDS),
+        )
+        .returning(EmailOutbox.id, EmailOutbox.attempts, EmailOutbox.to_email, EmailOutbox.subject, EmailOutbox.html)
+        .execution_options(synchronize_session=False)
+    ).all()
+    session.commit()
+    return claimed
+
+
+def dispatch_batch(session: Session, provider, batch_size: Optional[int] = None) -> int:
+    """Claim one batch of due emails, send it and record the outcomes; returns the number claimed"""
+    claimed = claim_batch(session, batch_size or EMAIL_BATCH_SIZE, datetime.utcnow())
+    if not claimed:
+        return 0
+
+    messages = [{"to": row.to_email, "subject": row.subject, "html": row.html} for row in claimed]
+    errors = provider.send_batch(messages)
+    now = datetime.utcnow()
+
+    sent_ids = [row.id for row, error in zip(claimed, errors) if error is None]
+    if sent_ids:
+        session.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(sent_ids))
+            .values(status="sent", sent_at=now, last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+        emails_total.labels("sent").inc(len(sent_ids))
+    for row, error in zip(claimed, errors):
+        if error is None:
+            continue
+        if row.attempts >= EMAIL_MAX_ATTEMPTS:
+            values = {"status": "failed"}
+            outcome = "failed"
+            logger.error("Email delivery failed", email_id=row.id, attempts=row.attempts, error=error)
+        else:
+            values = {"next_attempt_at": now + timedelta(seconds=retry_delay(row.attempts))}
+            outcome = "retry"
+            logger.warning("Email delivery will be retried", email_id=row.id, attempts=row.attempts, error=error)
+        session.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id == row.id)
+            .values(last_error=error[:1000], **values)
+            .execution_options(synchronize_session=False)
+        )
+        emails_total.labels(outcome).inc()
+    session.commit()
+    return len(claimed)
+
+
+def dispatch_pending(session: Session, provider, batch_size: Optional[int] = None) -> int:
+    """Send batches until no due emails are left; returns the number of emails claimed"""
+    batch_size = batch_size or EMAIL_BATCH_SIZE
+    total = 0
+    while True:
+        claimed = dispatch_batch(session, provider, batch_size)
+        total += claimed
+        if claimed < batch_size:
+            return total
+
+
+class EmailOutboxWorker:
+    """
+    Drains the outbox on the event loop of the process that starts it. The
+    blocking database and provider calls run in the threadpool.
+    """
+
+    def __init__(self, engine, provider=None, poll_interval: float = EMAIL_POLL_INTERVAL):
+        self.engine = engine
+        self.provider = provider
+        self.poll_interval = poll_interval
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.provider is None:
+            self.provider = create_email_provider()
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = self._loop.create_task(self.run())
+        logger.info("Email outbox worker started", provider=self.provider.name)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = self._loop = None
+
+    def notify(self):
+        """Wake the worker to send newly committed emails; safe to call from any thread"""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake.set)
+
+    def dispatch(self) -> int:
+        with Session(self.engine) as session:
+            return dispatch_pending(session, self.provider)
+
+    async def run(self):
+        while True:
+            self._wake.clear()
+            try:
+                await run_in_threadpool(self.dispatch)
+            except Exception:
+                logger.exception("Email outbox dispatch failed")
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+email_outbox_worker = EmailOutboxWorker(engine)
@@ -0,0 +1,170 @@
+"""
+Email delivery providers used by the outbox worker.
+
+A provider sends a batch of messages (dicts with ``to``, ``subject`` and
+``html``) and returns one error string per message, None for each message
+that was sent. Select one with EMAIL_PROVIDER:
+
+- ``resend``: the Resend API (RESEND_API_KEY), one batch call per batch
+- ``smtp``: an SMTP server, one connection per batch (SMTP_HOST, SMTP_PORT,
+  SMTP_USERNAME, SMTP_PASSWORD, SMTP_STARTTLS); a local catcher such as
+  MailHog or Mailpit on port 1025 stands in for a real server in development
+- ``file``: writes each message as an ``.eml`` file under EMAIL_FILE_DIR
+- ``console``: logs each message; the default when RESEND_API_KEY is unset
+"""
+import os
+import smtplib
+import uuid
+from email.message import EmailMessage
+from pathlib import Path
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from ..utils.logging import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+RESEND_API_KEY = os.getenv("RESEND_API_KEY", "")
+FROM_EMAIL = os.getenv("FROM_EMAIL", "onboarding@resend.dev")
+EMAIL_PROVIDER = os.getenv("EMAIL_PROVIDER", "resend" if RESEND_API_KEY else "console")
+EMAIL_FILE_DIR = os.getenv("EMAIL_FILE_DIR", "outbox")
+SMTP_HOST = os.getenv("SMTP_HOST", "localhost")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "1025"))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME", "")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "false").lower() == "true"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "10"))
+
+
+def _error(exc: Exception) -> str:
+    return f"{type(exc).__name__}: {exc}"
+
+
+def mime_message(message: dict) -> EmailMessage:
+    """Build the MIME message for a queued email"""
+    mime = EmailMessage()
+    mime["From"] = FROM_EMAIL
+    mime["To"] = message["to"]
+    mime["Subject"] = message["subject"]
+    mime.set_content(message["html"], subtype="html")
+    return mime
+
+
+class ConsoleProvider:
+    """Logs messages instead of sending them, for local development."""
+
+    name = "console"
+
+    def send_batch(self, messages: List[dict]) -> List[Optional[str]]:
+        for message in messages:
+            logger.info("Email (console provider)", to=message["to"], subject=message["subject"], html=message["html"])
+        return [None] * len(messages)
+
+
+class FileProvider:
+    """Writes each message to ``directory`` as an .eml file."""
+
+    name = "file"
+
+    def __init__(self, directory: str = EMAIL_FILE_DIR):
+        self.directory = Path(directory)
+
+    def send_batch(self, messages: List[dict]) -> List[Optional[str]]:
+        errors: List[Optional[str]] = []
+        for message in messages:
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                path = self.directory / f"{uuid.uuid4().hex}.eml"
+                path.write_bytes(bytes(mime_message(message)))
+                errors.append(None)
+            except OSError as exc:
+                errors.append(_error(exc))
+        return errors
+
+
+class SMTPProvider:
+    """Sends a batch over a single SMTP connection."""
+
+    name = "smtp"
+
+    def __init__(
+        self,
+        host: str = SMTP_HOST,
+        port: int = SMTP_PORT,
+        username: str = SMTP_USERNAME,
+        password: str = SMTP_PASSWORD,
+        starttls: bool = SMTP_STARTTLS,
+        timeout: float = SMTP_TIMEOUT,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+
+    def send_batch(self, messages: List[dict]) -> List[Optional[str]]:
+        try:
+            connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        except (OSError, smtplib.SMTPException) as exc:
+            return [_error(exc)] * len(messages)
+
+        errors: List[Optional[str]] = []
+        with connection:
+            try:
+                if self.starttls:
+                    connection.starttls()
+                if self.username:
+                    connection.login(self.username, self.password)
+            except (OSError, smtplib.SMTPException) as exc:
+                return [_error(exc)] * len(messages)
+            for message in messages:
+                try:
+                    connection.send_message(mime_message(message))
+                    errors.append(None)
+                except smtplib.SMTPServerDisconnected as exc:
+                    # The rest of the batch cannot be sent on this connection
+                    errors.extend([_error(exc)] * (len(messages) - len(errors)))
+                    break
+                except (OSError, smtplib.SMTPException) as exc:
+                    errors.append(_error(exc))
+        return errors
+
+
+class ResendProvider:
+    """Sends a batch with one Resend batch API call; the call succeeds or fails as a whole."""
+
+    name = "resend"
+
+    def __init__(self, api_key: str = RESEND_API_KEY):
+        self.api_key = api_key
+
+    def send_batch(self, messages: List[dict]) -> List[Optional[str]]:
+        try:
+            # Imported on first use: the SDK pulls in requests and httpx, which
+            # would otherwise add ~100 ms to every worker start
+            import resend
+            resend.api_key = self.api_key
+            resend.Batch.send([
+                {"from": FROM_EMAIL, "to": [message["to"]], "subject": message["subject"], "html": message["html"]}
+                for message in messages
+            ])
+        except Exception as exc:
+            return [_error(exc)] * len(messages)
+        return [None] * len(messages)
+
+
+PROVIDERS = {
+    provider.name: provider for provider in (ConsoleProvider, FileProvider, SMTPProvider, ResendProvider)
+}
+
+
+def create_email_provider(name: str = EMAIL_PROVIDER):
+    """Build the configured email provider"""
+    try:
+        return PROVIDERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown EMAIL_PROVIDER {name!r}; expected one of {', '.join(PROVIDERS)}") from None
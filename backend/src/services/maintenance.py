@@ -0,0 +1,210 @@
+"""
+Periodic database maintenance.
+
+Each app process runs a ``MaintenanceScheduler`` unless MAINTENANCE_ENABLED is
+false. It runs every job once shortly after startup and then every
+``interval`` seconds; a job's blocking work runs in the threadpool and a
+failing job is logged and retried on its next run. Jobs delete in bounded
+batches, committing after each, so they never hold locks for long. Several
+processes running the same job is harmless: on PostgreSQL a batch skips rows
+another process has locked.
+
+Jobs:
+
+- ``purge-reset-tokens`` (every TOKEN_PURGE_INTERVAL seconds) deletes used
+  and expired password reset tokens, TOKEN_PURGE_BATCH_SIZE rows per
+  transaction. Also available as ``python -m src.cli purge-reset-tokens``.
+- ``purge-sessions`` (every SESSION_PURGE_INTERVAL seconds) deletes expired
+  refresh token sessions in batches of the same size. Also available as
+  ``python -m src.cli purge-sessions``.
+- ``purge-tombstones`` (every TOMBSTONE_PURGE_INTERVAL seconds) permanently
+  deletes tasks deleted more than TOMBSTONE_RETENTION_DAYS ago. Sync clients
+  that last polled before a purged deletion are told to resync from scratch
+  by ``GET /tasks/changes``, so the retention is how long a client can stay
+  offline and still catch up incrementally. Also available as
+  ``python -m src.cli purge-tombstones``.
+- ``purge-emails`` (every EMAIL_PURGE_INTERVAL seconds) deletes sent and
+  failed outbox rows last attempted more than EMAIL_RETENTION_DAYS ago, so
+  the outbox does not keep every message body (reset links included)
+  forever. Also available as ``python -m src.cli purge-emails``.
+"""
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import Callable, List, NamedTuple, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import delete, or_, select
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+
+from ..database.engine import engine
+from ..models.auth_session import AuthSession
+from ..models.email_outbox import EmailOutbox
+from ..models.password_reset import PasswordResetToken
+from .task_service import TaskService
+from ..utils.logging import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+MAINTENANCE_ENABLED = os.getenv("MAINTENANCE_ENABLED", "true").lower() == "true"
+TOKEN_PURGE_INTERVAL = float(os.getenv("TOKEN_PURGE_INTERVAL", "3600"))
+TOKEN_PURGE_BATCH_SIZE = int(os.getenv("TOKEN_PURGE_BATCH_SIZE", "1000"))
+SESSION_PURGE_INTERVAL = float(os.getenv("SESSION_PURGE_INTERVAL", "3600"))
+TOMBSTONE_PURGE_INTERVAL = float(os.getenv("TOMBSTONE_PURGE_INTERVAL", "3600"))
+TOMBSTONE_RETENTION_DAYS = float(os.getenv("TOMBSTONE_RETENTION_DAYS", "30"))
+EMAIL_PURGE_INTERVAL = float(os.getenv("EMAIL_PURGE_INTERVAL", "3600"))
+EMAIL_RETENTION_DAYS = float(os.getenv("EMAIL_RETENTION_DAYS", "7"))
+# Seconds between startup and the first run of each job
+MAINTENANCE_STARTUP_DELAY = float(os.getenv("MAINTENANCE_STARTUP_DELAY", "60"))
+
+
+def purge_in_batches(session: Session, model, condition, batch_size: int, max_batches: Optional[int] = None) -> int:
+    """
+    Delete ``model`` rows matching ``condition`` ``batch_size`` rows per
+    transaction until none are left (or ``max_batches`` ran); returns the
+    number deleted.
+
+    Each batch picks its ids with a LIMIT, which finds matches quickly while
+    the table is mostly stale and scans little once it is kept small.
+    """
+    stale = select(model.id).where(condition).limit(batch_size).with_for_update(skip_locked=True)
+    deleted = batches = 0
+    while max_batches is None or batches < max_batches:
+        result = session.execute(
+            delete(model)
+            .where(model.id.in_(stale.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+        deleted += result.rowcount
+        batches += 1
+        if result.rowcount < batch_size:
+            break
+    return deleted
+
+
+def purge_password_reset_tokens(
+    session: Session,
+    batch_size: Optional[int] = None,
+    now: Optional[datetime] = None,
+    max_batches: Optional[int] = None,
+) -> int:
+    """Delete used and expired reset tokens in batches; returns the number deleted"""
+    now = now or datetime.utcnow()
+    return purge_in_batches(
+        session,
+        PasswordResetToken,
+        or_(PasswordResetToken.used, PasswordResetToken.expires_at < now),
+        batch_size or TOKEN_PURGE_BATCH_SIZE,
+        max_batches,
+    )
+
+
+def purge_auth_sessions(
+    session: Session,
+    batch_size: Optional[int] = None,
+    now: Optional[datetime] = None,
+    max_batches: Optional[int] = None,
+) -> int:
+    """Delete expired refresh token sessions in batches; returns the number deleted"""
+    now = now or datetime.utcnow()
+    return purge_in_batches(
+        session, AuthSession, AuthSession.expires_at < now, batch_size or TOKEN_PURGE_BATCH_SIZE, max_batches
+    )
+
+
+def purge_task_tombstones(
+    session: Session,
+    batch_size: Optional[int] = None,
+    now: Optional[datetime] = None,
+    max_batches: Optional[int] = None,
+    retention_days: Optional[float] = None,
+) -> int:
+    """Delete tombstones older than the retention in batches; returns the number deleted"""
+    batch_size = batch_size or TOKEN_PURGE_BATCH_SIZE
+    retention_days = TOMBSTONE_RETENTION_DAYS if retention_days is None else retention_days
+    older_than = (now or datetime.utcnow()) - timedelta(days=retention_days)
+    deleted = batches = 0
+    while max_batches is None or batches < max_batches:
+        count = TaskService.purge_tombstones(session, older_than, batch_size=batch_size)
+        deleted += count
+        batches += 1
+        if count < batch_size:
+            break
+    return deleted
+
+
+def purge_sent_emails(
+    session: Session,
+    batch_size: Optional[int] = None,
+    now: Optional[datetime] = None,
+    max_batches: Optional[int] = None,
+    retention_days: Optional[float] = None,
+) -> int:
+    """Delete sent and failed outbox rows older than the retention in batches; returns the number deleted"""
+    retention_days = EMAIL_RETENTION_DAYS if retention_days is None else retention_days
+    older_than = (now or datetime.utcnow()) - timedelta(days=retention_days)
+    # A finished row's next_attempt_at is its last claim, so the worker's
+    # (status, next_attempt_at) index serves this too
+    return purge_in_batches(
+        session,
+        EmailOutbox,
+        EmailOutbox.status.in_(("sent", "failed")) & (EmailOutbox.next_attempt_at < older_than),
+        batch_size or TOKEN_PURGE_BATCH_SIZE,
+        max_batches,
+    )
+
+
+class MaintenanceJob(NamedTuple):
+    name: str
+    interval: float
+    run: Callable[[Session], int]
+
+
+JOBS: List[MaintenanceJob] = [
+    MaintenanceJob("purge-reset-tokens", TOKEN_PURGE_INTERVAL, purge_password_reset_tokens),
+    MaintenanceJob("purge-sessions", SESSION_PURGE_INTERVAL, purge_auth_sessions),
+    MaintenanceJob("purge-tombstones", TOMBSTONE_PURGE_INTERVAL, purge_task_tombstones),
+    MaintenanceJob("purge-emails", EMAIL_PURGE_INTERVAL, purge_sent_emails),
+]
+
+
+class MaintenanceScheduler:
+    """Runs each job on its own interval on the event loop of the process that starts it."""
+
+    def __init__(self, engine, jobs: List[MaintenanceJob] = JOBS, startup_delay: float = MAINTENANCE_STARTUP_DELAY):
+        self.engine = engine
+        self.jobs = jobs
+        self.startup_delay = startup_delay
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self.run(job)) for job in self.jobs]
+        logger.info("Maintenance scheduler started", jobs=[job.name for job in self.jobs])
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def run_job(self, job: MaintenanceJob) -> int:
+        with Session(self.engine) as session:
+            return job.run(session)
+
+    async def run(self, job: MaintenanceJob):
+        await asyncio.sleep(self.startup_delay)
+        while True:
+            try:
+                affected = await run_in_threadpool(self.run_job, job)
+                logger.info("Maintenance job finished", job=job.name, rows=affected)
+            except Exception:
+                logger.exception("Maintenance job failed", job=job.name)
+            await asyncio.sleep(job.interval)
+
+
+maintenance_scheduler = MaintenanceScheduler(engine)
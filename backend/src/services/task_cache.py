@@ -0,0 +1,283 @@
+"""
+Response cache for task list pages.
+
+Serialized ``GET /api/{user_id}/tasks`` pages are cached per user and per query
+(filters, sort, limit, cursor). Instead of hunting down every cached page on a
+write, each user has a generation counter that is part of the cache key;
+TaskService bumps it after every committed write, which orphans all of that
+user's cached pages at once. Orphans age out through the LRU/TTL, and the TTL
+also bounds how stale the time-dependent ``is_overdue`` flag can get.
+
+The store is pluggable: an in-process LRU, or any Redis-compatible client
+(``get``/``set(ex=)``/``incr``) shared by every worker. The in-process store
+only sees generation bumps made by its own process, so with several workers
+another worker would keep serving a user's old pages (and 304s for their old
+ETag) until the TTL. It is therefore the default only for a single worker
+(WEB_CONCURRENCY, the worker count uvicorn and gunicorn read, unset or 1);
+with more the default is ``none`` and asking for ``memory`` is an error.
+
+Async routes use the ``*_async`` methods, which go through ``redis.asyncio``
+so a cache round trip never blocks the event loop.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+from ..utils.logging import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# Worker processes serving the app; uvicorn and gunicorn take their default from it
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+TASK_CACHE_BACKEND = os.getenv("TASK_CACHE_BACKEND", "memory" if WEB_CONCURRENCY <= 1 else "none")  # memory, redis or none
+TASK_CACHE_SIZE = int(os.getenv("TASK_CACHE_SIZE", "2048"))
+TASK_CACHE_TTL = int(os.getenv("TASK_CACHE_TTL", "300"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+class MemoryCacheBackend:
+    """
+    In-process LRU store with per-entry TTL.
+
+    Counters (``incr``) are kept apart from the LRU and never evicted. Were a
+    user's generation evicted it would restart from zero, and the next writes
+    would bump it back onto generations whose pages are still cached, serving
+    them as current. There is one small counter per user that has written.
+    """
+
+    def __init__(self, maxsize: int = TASK_CACHE_SIZE, clock=time.monotonic):
+        self.maxsize = maxsize
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key in self._counters:
+                return str(self._counters[key]).encode()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and self._clock() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None):
+        with self._lock:
+            expires_at = self._clock() + ex if ex else None
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    # Nothing to wait for in process
+    async def get_async(self, key: str) -> Optional[bytes]:
+        return self.get(key)
+
+    async def set_async(self, key: str, value: bytes, ex: Optional[int] = None):
+        self.set(key, value, ex=ex)
+
+    async def incr_async(self, key: str) -> int:
+        return self.incr(key)
+
+
+def _as_bytes(value) -> Optional[bytes]:
+    return value.encode() if isinstance(value, str) else value
+
+
+class RedisCacheBackend:
+    """
+    Adapter for a Redis-compatible client (redis-py or a test fake), and its
+    asyncio counterpart for the ``*_async`` methods. Without an async client
+    those run the sync calls in the threadpool.
+
+    Generation counters are set without a TTL, so the ``volatile-*`` eviction
+    policies never drop them; under ``allkeys-*`` a dropped counter can bring
+    back pages written before it, so use a volatile policy for this cache.
+    """
+
+    def __init__(self, client, async_client=None):
+        self.client = client
+        self.async_client = async_client
+
+    def get(self, key: str) -> Optional[bytes]:
+        return _as_bytes(self.client.get(key))
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None):
+        self.client.set(key, value, ex=ex)
+
+    def incr(self, key: str) -> int:
+        return int(self.client.incr(key))
+
+    async def get_async(self, key: str) -> Optional[bytes]:
+        if self.async_client is None:
+            return await run_in_threadpool(self.get, key)
+        return _as_bytes(await self.async_client.get(key))
+
+    async def set_async(self, key: str, value: bytes, ex: Optional[int] = None):
+        if self.async_client is None:
+            return await run_in_threadpool(self.set, key, value, ex)
+        await self.async_client.set(key, value, ex=ex)
+
+    async def incr_async(self, key: str) -> int:
+        if self.async_client is None:
+            return await run_in_threadpool(self.incr, key)
+        return int(await self.async_client.incr(key))
+
+
+class TaskListCache:
+    """Per-user, per-query cache of serialized task list pages."""
+
+    def __init__(self, backend=None, ttl: int = TASK_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    @staticmethod
+    def _generation_key(user_id: str) -> str:
+        return f"tasks:gen:{user_id}"
+
+    @staticmethod
+    def _key(user_id: str, generation: Optional[bytes], params: dict) -> str:
+        query = json.dumps(params, sort_keys=True, default=str)
+        digest = hashlib.sha1(query.encode("utf-8")).hexdigest()
+        return f"tasks:page:{user_id}:{(generation or b'0').decode()}:{digest}"
+
+    def _entry(self, raw: Optional[bytes]) -> Optional[Tuple[bytes, str, Optional[str]]]:
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry = json.loads(raw)
+        return entry["body"].encode("utf-8"), entry["etag"], entry["next_cursor"]
+
+    @staticmethod
+    def _serialize(body: bytes, etag: str, next_cursor: Optional[str]) -> bytes:
+        return json.dumps({"body": body.decode("utf-8"), "etag": etag, "next_cursor": next_cursor}).encode("utf-8")
+
+    def lookup(self, user_id: str, params: dict) -> Tuple[Optional[str], Optional[Tuple[bytes, str, Optional[str]]]]:
+        """
+        Look up a cached page.
+
+        Returns:
+            Tuple of (key, entry). ``entry`` is (body, etag, next_cursor) on a hit
+            and None on a miss. Pass ``key`` to ``store`` after building the page:
+            it pins the user's generation as of *before* the database read, so a
+            write that commits in between cannot leave a stale page behind.
+        """
+        if not self.enabled:
+            return None, None
+        try:
+            key = self._key(user_id, self.backend.get(self._generation_key(user_id)), params)
+            raw = self.backend.get(key)
+        except Exception as e:
+            logger.warning("Task cache read failed", error=str(e))
+            return None, None
+        return key, self._entry(raw)
+
+    async def lookup_async(self, user_id: str, params: dict) -> Tuple[Optional[str], Optional[Tuple[bytes, str, Optional[str]]]]:
+        """``lookup`` for async routes"""
+        if not self.enabled:
+            return None, None
+        try:
+            key = self._key(user_id, await self.backend.get_async(self._generation_key(user_id)), params)
+            raw = await self.backend.get_async(key)
+        except Exception as e:
+            logger.warning("Task cache read failed", error=str(e))
+            return None, None
+        return key, self._entry(raw)
+
+    def store(self, key: Optional[str], body: bytes, etag: str, next_cursor: Optional[str]):
+        """Store a serialized page under a key returned by ``lookup``"""
+        if not self.enabled or key is None:
+            return
+        try:
+            self.backend.set(key, self._serialize(body, etag, next_cursor), ex=self.ttl)
+        except Exception as e:
+            logger.warning("Task cache write failed", error=str(e))
+
+    async def store_async(self, key: Optional[str], body: bytes, etag: str, next_cursor: Optional[str]):
+        """``store`` for async routes"""
+        if not self.enabled or key is None:
+            return
+        try:
+            await self.backend.set_async(key, self._serialize(body, etag, next_cursor), ex=self.ttl)
+        except Exception as e:
+            logger.warning("Task cache write failed", error=str(e))
+
+    def invalidate(self, user_id: str):
+        """Orphan every cached page for a user by bumping their generation"""
+        if not self.enabled:
+            return
+        try:
+            self.backend.incr(self._generation_key(user_id))
+        except Exception as e:
+            logger.warning("Task cache invalidation failed", user_id=user_id, error=str(e))
+
+    async def invalidate_async(self, user_id: str):
+        """``invalidate`` for async writes"""
+        if not self.enabled:
+            return
+        try:
+            await self.backend.incr_async(self._generation_key(user_id))
+        except Exception as e:
+            logger.warning("Task cache invalidation failed", user_id=user_id, error=str(e))
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def compute_etag(body: bytes) -> str:
+    """Strong ETag for a serialized response body"""
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header (which may list several tags) against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def create_backend(name: str = TASK_CACHE_BACKEND, workers: int = WEB_CONCURRENCY):
+    """Build the configured cache backend"""
+    if name == "none":
+        return None
+    if name == "redis":
+        # Optional dependency; only needed when the Redis backend is selected
+        import redis
+        import redis.asyncio
+        return RedisCacheBackend(redis.Redis.from_url(REDIS_URL), redis.asyncio.Redis.from_url(REDIS_URL))
+    if workers > 1:
+        raise RuntimeError(
+            f"TASK_CACHE_BACKEND=memory is per process and would serve stale task lists with "
+            f"WEB_CONCURRENCY={workers} workers; use redis or none"
+        )
+    return MemoryCacheBackend()
+
+
+task_list_cache = TaskListCache(create_backend())
@@ -0,0 +1,252 @@
+"""
+Task change events pushed to connected clients.
+
+TaskService publishes an event after every committed write. Events fan out to
+per-connection subscriptions through a broker. The default LocalBroker only
+reaches subscribers in the same process; RedisBroker relays events over Redis
+pub/sub so every worker's subscribers see writes handled by any worker.
+
+Each subscription has a bounded queue. When a slow consumer lets it fill up,
+the queued events are dropped and replaced by a single ``resync`` event that
+carries the last sequence the client received. The client then catches up
+through ``GET /tasks/changes?since=``. Publishers therefore never block and
+memory per connection stays bounded.
+"""
+import asyncio
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Set
+
+from dotenv import load_dotenv
+
+from ..utils.logging import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+TASK_EVENTS_BROKER = os.getenv("TASK_EVENTS_BROKER", "local")  # local or redis
+TASK_EVENTS_QUEUE_SIZE = int(os.getenv("TASK_EVENTS_QUEUE_SIZE", "100"))
+TASK_EVENTS_MAX_SUBSCRIBERS = int(os.getenv("TASK_EVENTS_MAX_SUBSCRIBERS", "10"))
+TASK_EVENTS_RECONNECT_DELAY = float(os.getenv("TASK_EVENTS_RECONNECT_DELAY", "0.5"))  # seconds, doubled per failed attempt
+TASK_EVENTS_RECONNECT_MAX_DELAY = float(os.getenv("TASK_EVENTS_RECONNECT_MAX_DELAY", "30"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+class TooManySubscribersError(RuntimeError):
+    """Raised when a user already has TASK_EVENTS_MAX_SUBSCRIBERS open streams."""
+
+
+class Subscription:
+    """One client's bounded event queue, bound to the event loop that reads it."""
+
+    def __init__(self, broker: "LocalBroker", user_id: str, maxsize: int):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.last_seq = 0
+        self.dropped = 0
+
+    def deliver(self, event: dict):
+        """Enqueue an event; must run on ``self.loop``."""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow consumer: replace the backlog with one resync marker
+            self.dropped += self.queue.qsize() + 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": "resync", "since": self.last_seq})
+
+    def resync(self):
+        """Tell the client events may have been missed; must run on ``self.loop``."""
+        self.deliver({"type": "resync", "since": self.last_seq})
+
+    async def get(self) -> dict:
+        event = await self.queue.get()
+        if event.get("seq"):
+            self.last_seq = event["seq"]
+        return event
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """In-process fan-out of task events to subscriptions."""
+
+    def __init__(self, queue_size: int = TASK_EVENTS_QUEUE_SIZE, max_subscribers: int = TASK_EVENTS_MAX_SUBSCRIBERS):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id: str) -> Subscription:
+        """Open a subscription; call from the event loop that will consume it"""
+        subscription = Subscription(self, user_id, self.queue_size)
+        with self._lock:
+            subscribers = self._subscribers.setdefault(user_id, set())
+            if len(subscribers) >= self.max_subscribers:
+                raise TooManySubscribersError("Too many open event streams for this user")
+            subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def has_subscribers(self, user_id: str) -> bool:
+        return user_id in self._subscribers
+
+    def should_publish(self, user_id: str) -> bool:
+        """Whether events for a user need to be built at all"""
+        return self.has_subscribers(user_id)
+
+    def publish(self, user_id: str, events: List[dict]):
+        """Fan events out to local subscribers; safe to call from any thread"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            for event in events:
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+                except RuntimeError:
+                    # The subscriber's loop has shut down
+                    self.unsubscribe(subscription)
+                    break
+
+    async def publish_async(self, user_id: str, events: List[dict]):
+        """``publish`` for callers on the event loop; local fan-out never blocks"""
+        self.publish(user_id, events)
+
+    def resync(self, user_id: Optional[str] = None):
+        """Send a resync event to one user's subscribers, or to all of them"""
+        with self._lock:
+            if user_id is None:
+                subscribers = [s for group in self._subscribers.values() for s in group]
+            else:
+                subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.resync)
+            except RuntimeError:
+                self.unsubscribe(subscription)
+
+
+class RedisBroker(LocalBroker):
+    """
+    Relays events through Redis pub/sub so they reach subscribers on every worker.
+
+    Publishing writes to the ``task_events:<user_id>`` channel. One listener task
+    per process, started with the first subscription, feeds received events into
+    the local fan-out. Pub/sub does not replay what was published while the
+    listener was disconnected, so when the connection drops every local
+    subscriber gets a resync event, and the listener reconnects with
+    exponential backoff for as long as anyone is subscribed.
+    """
+
+    def __init__(
+        self,
+        client,
+        async_client,
+        reconnect_delay: float = TASK_EVENTS_RECONNECT_DELAY,
+        max_reconnect_delay: float = TASK_EVENTS_RECONNECT_MAX_DELAY,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.client = client
+        self.async_client = async_client
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._listener: Optional[asyncio.Task] = None
+
+    def subscribe(self, user_id: str) -> Subscription:
+        subscription = super().subscribe(user_id)
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+        return subscription
+
+    def should_publish(self, user_id: str) -> bool:
+        # Subscribers may be connected to another worker
+        return True
+
+    def publish(self, user_id: str, events: List[dict]):
+        try:
+            self.client.publish(f"task_events:{user_id}", json.dumps(events, default=str))
+        except Exception as e:
+            logger.warning("Task event publish failed", user_id=user_id, error=str(e))
+
+    async def publish_async(self, user_id: str, events: List[dict]):
+        # The async client, so a slow Redis round trip does not stall the event loop
+        try:
+            await self.async_client.publish(f"task_events:{user_id}", json.dumps(events, default=str))
+        except Exception as e:
+            logger.warning("Task event publish failed", user_id=user_id, error=str(e))
+
+    def _relay(self, message: dict):
+        """Fan one pub/sub message out to local subscribers"""
+        if message.get("type") != "pmessage":
+            return
+        channel = message["channel"]
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        user_id = channel.split(":", 1)[1]
+        if not self.has_subscribers(user_id):
+            return
+        try:
+            events = json.loads(message["data"])
+        except (TypeError, ValueError) as e:
+            logger.warning("Dropped malformed task event message", user_id=user_id, error=str(e))
+            self.resync(user_id)
+            return
+        super().publish(user_id, events)
+
+    async def _listen(self):
+        delay = self.reconnect_delay
+        while self._subscribers:
+            pubsub = self.async_client.pubsub()
+            try:
+                await pubsub.psubscribe("task_events:*")
+                async for message in pubsub.listen():
+                    delay = self.reconnect_delay
+                    self._relay(message)
+                logger.warning("Task event listener disconnected", retry_in=delay)
+            except Exception as e:
+                logger.warning("Task event listener failed", error=str(e), retry_in=delay)
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+            # Events published while disconnected are lost; clients catch up
+            # through GET /tasks/changes
+            self.resync()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+
+def create_broker(name: str = TASK_EVENTS_BROKER):
+    """Build the configured event broker"""
+    if name == "redis":
+        # Optional dependency; only needed when the Redis broker is selected
+        import redis
+        import redis.asyncio
+        return RedisBroker(redis.Redis.from_url(REDIS_URL), redis.asyncio.Redis.from_url(REDIS_URL))
+    return LocalBroker()
+
+
+def task_event(event_type: str, task_id: int, seq: int, task=None) -> dict:
+    """Build the event published for a task write"""
+    event = {"type": event_type, "id": task_id, "seq": seq}
+    if task is not None:
+        event["task"] = task.model_dump(mode="json", exclude={"deleted_at", "seq"})
+    return event
+
+
+task_events = create_broker()
@@ -0,0 +1,58 @@
+"""
+Row readers for bulk task imports.
+
+Each reader takes a binary file positioned at the start of the upload and
+yields ``(line_number, row)`` pairs one at a time, so an import never holds
+more than the current row in memory. ``row`` is a dict of TaskCreate fields,
+or a string describing why the line could not be parsed.
+"""
+import codecs
+import csv
+import json
+from typing import BinaryIO, Iterator, Tuple, Union
+
+ImportRow = Tuple[int, Union[dict, str]]
+
+IMPORT_FORMATS = ("ndjson", "csv")
+
+
+def read_ndjson(stream: BinaryIO) -> Iterator[ImportRow]:
+    """One JSON object per line; blank lines are skipped."""
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, "Expected a JSON object"
+            continue
+        yield line_number, row
+
+
+def read_csv(stream: BinaryIO) -> Iterator[ImportRow]:
+    """
+    CSV with a header row naming TaskCreate fields, as written by the CSV export.
+
+    Empty cells are treated as missing, so optional fields fall back to their
+    defaults. Line numbers count the header as line 1; quoted values may span
+    lines, in which case the row's last line is reported.
+    """
+    reader = csv.DictReader(codecs.getreader("utf-8-sig")(stream))
+    try:
+        for row in reader:
+            if None in row:
+                yield reader.line_num, "Too many values"
+                continue
+            yield reader.line_num, {key: value for key, value in row.items() if value not in ("", None)}
+    except (csv.Error, UnicodeDecodeError) as e:
+        yield reader.line_num, f"Invalid CSV: {e}"
+
+
+def read_rows(stream: BinaryIO, format: str) -> Iterator[ImportRow]:
+    """Dispatch to the reader for ``format``"""
+    if format == "csv":
+        return read_csv(stream)
+    return read_ndjson(stream)
@@ -2,20 +2,404 @@
 Task service for the AI-Powered Natural Language Chatbot for Todo Management.
 Handles all business logic and database operations related to tasks.
 """
-from typing import List, Optional
+import io
+import re
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from pydantic import ValidationError
+from sqlalchemy import Double, Row, case, cast, column, delete, func, insert, literal_column, not_, table, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlmodel import Session, select
-from ..models.task import Task, TaskCreate, TaskUpdate
+from ..models.task import Task, TaskBatchOperation, TaskCreate, TaskUpdate, search_document
+from ..models.task_counter import TaskCounter
 from ..utils.logging import get_logger
+from .task_cache import task_list_cache
+from .task_events import task_event, task_events
+from .task_import import ImportRow
+from ..utils.pagination import (
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    keyset_page,
+    keyset_predicate,
+    order_by_clauses,
+    parse_datetime,
+)
 import structlog
 
 logger = get_logger(__name__)
 
+# Columns a task listing may be sorted by. Each one is backed by a
+# (user_id, completed, <column>, id) composite index on the task table.
+SORTABLE_COLUMNS = {
+    "updated_at": Task.updated_at,
+    "created_at": Task.created_at,
+}
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+# SQLite FTS5 table mirroring task (see models.task); bm25 weights for title, description
+TASK_FTS = table("task_fts", column("rowid"))
+FTS_COLUMN_WEIGHTS = (10.0, 1.0)
+# Rows fetched per round trip when streaming an export
+EXPORT_BATCH_SIZE = 500
+# Rows written (and committed) per statement during a bulk import
+IMPORT_CHUNK_SIZE = 1000
+# Per-line errors reported back from one import; the rest are only counted
+MAX_IMPORT_ERRORS = 100
+# Columns written by COPY during an import, i.e. everything but the serial id
+COPY_COLUMNS = [column.name for column in Task.__table__.columns if column.name != "id"]
+
+
+def validate_task_create(task_create: TaskCreate):
+    """Checks on creation data beyond what the TaskCreate schema enforces."""
+    if not task_create.title.strip():
+        raise ValueError("Task title cannot be empty")
+
+
+def build_task(user_id: str, task_create: TaskCreate) -> Task:
+    """Validate creation data and build an unsaved Task for a user."""
+    validate_task_create(task_create)
+
+    return Task(
+        title=task_create.title,
+        description=task_create.description,
+        completed=task_create.completed,
+        due_date=task_create.due_date,
+        priority=task_create.priority,
+        user_id=user_id
+    )
+
+
+def after_write(user_id: str, events: Callable[[], List[dict]]):
+    """
+    Run after a committed write: orphan cached list pages and push change events.
+
+    ``events`` is only called when someone is listening, so writes with no
+    connected clients do not pay for building event payloads.
+    """
+    task_list_cache.invalidate(user_id)
+    if task_events.should_publish(user_id):
+        task_events.publish(user_id, events())
+
+
+async def after_write_async(user_id: str, events: Callable[[], List[dict]]):
+    """``after_write`` for the async service, without blocking the event loop"""
+    await task_list_cache.invalidate_async(user_id)
+    if task_events.should_publish(user_id):
+        await task_events.publish_async(user_id, events())
+
+
+def bump_sequence(user_id: str, dialect_name: str, count: int = 1, task_delta: int = 0, completed_delta: int = 0):
+    """
+    Upsert that reserves ``count`` sequence numbers for a user and returns the last.
+
+    ``INSERT ... ON CONFLICT (user_id) DO UPDATE SET last_seq = last_seq + :count
+    RETURNING last_seq``; the reserved range is ``last - count + 1 .. last``.
+    Count changes already known up front (creates) ride along in the same statement.
+    """
+    upsert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    statement = upsert(TaskCounter).values(
+        user_id=user_id, last_seq=count, task_count=task_delta, completed_count=completed_delta
+    )
+    set_ = {"last_seq": TaskCounter.last_seq + count}
+    if task_delta:
+        set_["task_count"] = TaskCounter.task_count + task_delta
+    if completed_delta:
+        set_["completed_count"] = TaskCounter.completed_count + completed_delta
+    return statement.on_conflict_do_update(
+        index_elements=[TaskCounter.user_id],
+        set_=set_,
+    ).returning(TaskCounter.last_seq)
+
+
+def adjust_counts(user_id: str, task_delta=0, completed_delta=0):
+    """``UPDATE task_counter SET task_count = task_count + ..., completed_count = ...`` for a user."""
+    return (
+        update(TaskCounter)
+        .where(TaskCounter.user_id == user_id)
+        .values(
+            task_count=TaskCounter.task_count + task_delta,
+            completed_count=TaskCounter.completed_count + completed_delta,
+        )
+    )
+
+
+def count_adjustment(task_id: int, user_id: str, change: str, completed: Optional[bool] = None):
+    """
+    adjust_counts statement for a pending write to one task.
+
+    The deltas are scalar subqueries over the task's current state, so they are
+    0 when the task is missing or already in the target state. Run it after
+    bump_sequence, whose row lock keeps the user's other writes out, and before
+    the write itself.
+
+    Args:
+        change: "delete", "toggle", or "complete" (set completed to ``completed``)
+    """
+    def matching(*conditions):
+        return (
+            select(func.count())
+            .select_from(Task)
+            .where(Task.id == task_id, Task.user_id == user_id, Task.deleted_at.is_(None), *conditions)
+            .scalar_subquery()
+        )
+
+    if change == "delete":
+        return adjust_counts(user_id, -matching(), -matching(Task.completed))
+    if change == "toggle":
+        return adjust_counts(user_id, 0, matching(not_(Task.completed)) - matching(Task.completed))
+    flips = matching(Task.completed == (not completed))
+    return adjust_counts(user_id, 0, flips if completed else -flips)
+
+
+def overdue_count_query(user_id: str, now: datetime):
+    """Count of a user's pending tasks past their due date, read from ix_task_user_completed_due."""
+    return (
+        select(func.count())
+        .select_from(Task)
+        .where(
+            Task.user_id == user_id,
+            Task.completed == False,  # noqa: E712
+            Task.due_date < now,
+            Task.deleted_at.is_(None),
+        )
+    )
+
+
+def update_returning(task_id: int, user_id: str, values: dict, seq: int):
+    """
+    Single-statement ``UPDATE task ... WHERE id = :id AND user_id = :uid RETURNING *``.
+
+    ``values`` may contain SQL expressions, e.g. ``not_(Task.completed)`` for an
+    atomic toggle. updated_at and seq are always set; tombstones are never matched.
+    """
+    return (
+        update(Task)
+        .where(Task.id == task_id, Task.user_id == user_id, Task.deleted_at.is_(None))
+        .values(**values, updated_at=datetime.utcnow(), seq=seq)
+        .returning(Task)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+
+
+def tombstone_returning(task_id: int, user_id: str, seq: int):
+    """Single-statement soft delete: ``UPDATE task SET deleted_at = now ... RETURNING id``."""
+    now = datetime.utcnow()
+    return (
+        update(Task)
+        .where(Task.id == task_id, Task.user_id == user_id, Task.deleted_at.is_(None))
+        .values(deleted_at=now, updated_at=now, seq=seq)
+        .returning(Task.id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def changes_query(user_id: str, since: int, limit: int):
+    """Rows (live and tombstoned) written after sequence ``since``, oldest first."""
+    return (
+        select(Task)
+        .where(Task.user_id == user_id, Task.seq > since)
+        .order_by(Task.seq)
+        .limit(limit + 1)
+    )
+
+
+def insert_returning(task: Task):
+    """Single-statement ``INSERT INTO task ... RETURNING *`` for an unsaved Task."""
+    return insert(Task).values(**task.model_dump(exclude={"id"})).returning(Task)
+
+
+def import_values(user_id: str, row: dict, now: datetime) -> dict:
+    """
+    Validate one import row against TaskCreate and return its task column values.
+
+    Builds the plain dict insert_many needs directly; constructing a table-bound
+    Task per row would dominate the cost of a large import.
+    """
+    task_create = TaskCreate.model_validate(row)
+    validate_task_create(task_create)
+    values = task_create.model_dump()
+    values.update(user_id=user_id, created_at=now, updated_at=now, deleted_at=None)
+    return values
+
+
+def copy_text_value(value) -> str:
+    """Render one value in PostgreSQL ``COPY ... FROM STDIN`` text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def insert_many(db_session: Session, rows: List[dict]):
+    """
+    Insert task rows in the session's transaction without returning them.
+
+    PostgreSQL gets one ``COPY task (...) FROM STDIN`` on the session's own
+    connection; other databases get a single executemany INSERT.
+    """
+    if db_session.get_bind().dialect.name != "postgresql":
+        db_session.execute(insert(Task.__table__), rows)
+        return
+
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(copy_text_value(row[column]) for column in COPY_COLUMNS))
+        buffer.write("\n")
+    buffer.seek(0)
+    cursor = db_session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {Task.__tablename__} ({', '.join(COPY_COLUMNS)}) FROM STDIN", buffer)
+    finally:
+        cursor.close()
+
+
+def import_error_detail(error: ValueError) -> str:
+    """One-line description of why an import row was rejected."""
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}" for detail in error.errors()
+        )
+    return str(error)
+
+
+def build_page_query(
+    user_id: str,
+    completed: Optional[bool],
+    priority: Optional[str],
+    sort: str,
+    order: str,
+    limit: int,
+    cursor: Optional[str],
+):
+    """
+    Build the keyset query for one page of a user's tasks.
+
+    Returns:
+        Tuple of (statement, clamped limit, sort spec). The statement selects
+        ``limit + 1`` rows so the caller can tell whether another page exists.
+    """
+    if sort not in SORTABLE_COLUMNS:
+        raise ValueError(f"Unsupported sort column: {sort}")
+    if order not in ("asc", "desc"):
+        raise ValueError(f"Unsupported sort order: {order}")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    descending = order == "desc"
+    keys = [
+        (Task.completed, False),
+        (SORTABLE_COLUMNS[sort], descending),
+        (Task.id, descending),
+    ]
+    sort_spec = f"{sort}:{order}"
+
+    statement = select(Task).where(Task.user_id == user_id, Task.deleted_at.is_(None))
+    if completed is not None:
+        statement = statement.where(Task.completed == completed)
+    if priority is not None:
+        statement = statement.where(Task.priority == priority)
+
+    values = None
+    if cursor:
+        last_completed, last_value, last_id = decode_cursor(cursor, sort_spec, len(keys))
+        if not isinstance(last_completed, bool):
+            raise InvalidCursorError("Invalid pagination cursor")
+        try:
+            values = [last_completed, parse_datetime(last_value), int(last_id)]
+        except (TypeError, ValueError) as e:
+            raise InvalidCursorError("Invalid pagination cursor") from e
+
+    # completed leads the listing indexes, which either order scans within one
+    # value of it. They store the sort column descending, so from the start
+    # only an ascending listing needs a branch per value to avoid a sort.
+    statement = keyset_page(statement, Task, keys, values, limit + 1, leading=1, split_start=not descending)
+    return statement, limit, sort_spec
+
+
+def split_page(tasks: List[Task], limit: int, sort: str, sort_spec: str) -> Tuple[List[Task], Optional[str]]:
+    """Trim the look-ahead row from a page and compute the next cursor."""
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        last = tasks[-1]
+        next_cursor = encode_cursor(
+            [last.completed, getattr(last, sort), last.id], sort_spec
+        )
+    return tasks, next_cursor
+
+
+def search_terms(q: str) -> List[str]:
+    """Split a search string into the words to match; punctuation is dropped."""
+    return re.findall(r"\w+", q.lower())
+
+
+def build_search_query(user_id: str, terms: List[str], dialect_name: str, limit: int, cursor: Optional[str]):
+    """
+    Build the ranked full-text query for one page of search results.
+
+    Every term must match, and the last characters of a term may be missing
+    (``mil`` finds "milk"). Rows are ordered by (rank desc, id desc) with a
+    keyset over the same pair. PostgreSQL matches through the GIN index on
+    search_document and ranks with ts_rank; SQLite matches through task_fts and
+    ranks with bm25, negated so that higher is better on both.
+
+    Returns:
+        Tuple of (statement, clamped limit, sort spec); the statement selects
+        ``(Task, rank)`` rows, ``limit + 1`` of them.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    sort_spec = "search:" + " ".join(terms)
+
+    if dialect_name == "postgresql":
+        document = search_document(Task.title, Task.description)
+        query = func.to_tsquery(literal_column("'english'"), " & ".join(f"{term}:*" for term in terms))
+        # ts_rank returns real; compare as double so cursor values round-trip exactly
+        rank = cast(func.ts_rank(document, query), Double)
+        statement = select(Task, rank).where(document.op("@@")(query))
+    else:
+        fts = literal_column(TASK_FTS.name)
+        rank = cast(-func.bm25(fts, *FTS_COLUMN_WEIGHTS), Double)
+        statement = (
+            select(Task, rank)
+            .join(TASK_FTS, TASK_FTS.c.rowid == Task.id)
+            .where(fts.op("MATCH")(" ".join(f'"{term}"*' for term in terms)))
+        )
+
+    keys = [(rank, True), (Task.id, True)]
+    statement = statement.where(Task.user_id == user_id, Task.deleted_at.is_(None))
+    if cursor:
+        last_rank, last_id = decode_cursor(cursor, sort_spec, len(keys))
+        try:
+            values = [float(last_rank), int(last_id)]
+        except (TypeError, ValueError) as e:
+            raise InvalidCursorError("Invalid pagination cursor") from e
+        statement = statement.where(keyset_predicate(keys, values))
+
+    statement = statement.order_by(*order_by_clauses(keys)).limit(limit + 1)
+    return statement, limit, sort_spec
+
+
+def batch_seq(items: List[Tuple[int, int]], base: int):
+    """``CASE id WHEN ... THEN base + index END`` giving each batch item its own sequence."""
+    return case({task_id: base + index for index, task_id in items}, value=Task.id)
+
+
 class TaskService:
     """
     Service class for handling task operations.
     """
 
-    def create_task(self, db_session: Session, user_id: str, task_create: TaskCreate) -> Task:
+    @staticmethod
+    def create_task(db_session: Session, user_id: str, task_create: TaskCreate) -> Task:
         """
         Create a new task for a user.
 
@@ -29,27 +413,21 @@ class TaskService:
         """
         logger.info("Creating task", user_id=user_id, title=task_create.title)
 
-        # Validate input
-        if not task_create.title.strip():
-            raise ValueError("Task title cannot be empty")
-
-        # Create task object
-        task = Task(
-            title=task_create.title,
-            description=task_create.description,
-            completed=task_create.completed,
-            user_id=user_id
-        )
+        # Validate input and create task object
+        task = build_task(user_id, task_create)
+        task.seq = TaskService._next_seq(db_session, user_id, task_delta=1, completed_delta=int(task.completed))
 
-        # Add to database
-        db_session.add(task)
+        # INSERT ... RETURNING gives us the generated id without a refresh
+        task = db_session.execute(insert_returning(task)).scalars().one()
+        db_session.expunge(task)
         db_session.commit()
-        db_session.refresh(task)
+        after_write(user_id, lambda: [task_event("created", task.id, task.seq, task)])
 
         logger.info("Task created successfully", task_id=task.id, user_id=user_id)
         return task
 
-    def get_task_by_id_and_user(self, db_session: Session, task_id: int, user_id: str) -> Optional[Task]:
+    @staticmethod
+    def get_task_by_id_and_user(db_session: Session, task_id: int, user_id: str) -> Optional[Task]:
         """
         Get a specific task by its ID and user ID.
 
@@ -63,7 +441,7 @@ class TaskService:
         """
         logger.info("Fetching task by ID and user", task_id=task_id, user_id=user_id)
 
-        statement = select(Task).where(Task.id == task_id).where(Task.user_id == user_id)
+        statement = select(Task).where(Task.id == task_id, Task.user_id == user_id, Task.deleted_at.is_(None))
         task = db_session.exec(statement).first()
 
         if task:
@@ -73,7 +451,8 @@ class TaskService:
 
         return task
 
-    def get_tasks_by_user_id(self, db_session: Session, user_id: str, completed: Optional[bool] = None) -> List[Task]:
+    @staticmethod
+    def get_tasks_by_user_id(db_session: Session, user_id: str, completed: Optional[bool] = None) -> List[Task]:
         """
         Get all tasks for a user, optionally filtered by completion status.
 
@@ -87,7 +466,7 @@ class TaskService:
         """
         logger.info("Fetching tasks by user", user_id=user_id, completed_filter=completed)
 
-        statement = select(Task).where(Task.user_id == user_id)
+        statement = select(Task).where(Task.user_id == user_id, Task.deleted_at.is_(None))
 
         if completed is not None:
             statement = statement.where(Task.completed == completed)
@@ -97,7 +476,50 @@ class TaskService:
         logger.info("Tasks fetched successfully", user_id=user_id, task_count=len(tasks))
         return tasks
 
-    def update_task(self, db_session: Session, task_id: int, user_id: str, task_update: TaskUpdate) -> Task:
+    @staticmethod
+    def get_tasks_page(
+        db_session: Session,
+        user_id: str,
+        completed: Optional[bool] = None,
+        priority: Optional[str] = None,
+        sort: str = "updated_at",
+        order: str = "desc",
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Task], Optional[str]]:
+        """
+        Get one page of a user's tasks using keyset pagination.
+
+        Tasks are ordered by (completed, <sort>, id), so pending tasks come first
+        and the scan walks the matching composite index. Only ``limit + 1`` rows
+        are read per call regardless of how many tasks the user has.
+
+        Args:
+            db_session: Database session
+            user_id: ID of the user
+            completed: Filter by completion status (None for all)
+            priority: Filter by priority (None for all)
+            sort: Column to sort by, one of SORTABLE_COLUMNS
+            order: "asc" or "desc"
+            limit: Maximum number of tasks to return
+            cursor: Cursor returned with the previous page, if any
+
+        Returns:
+            Tuple of (tasks, next_cursor); next_cursor is None on the last page
+
+        Raises:
+            ValueError: If the sort/order is unsupported or the cursor is invalid
+        """
+        statement, limit, sort_spec = build_page_query(
+            user_id, completed, priority, sort, order, limit, cursor
+        )
+        tasks, next_cursor = split_page(list(db_session.exec(statement).all()), limit, sort, sort_spec)
+
+        logger.info("Task page fetched", user_id=user_id, task_count=len(tasks), has_more=next_cursor is not None)
+        return tasks, next_cursor
+
+    @staticmethod
+    def update_task(db_session: Session, task_id: int, user_id: str, task_update: TaskUpdate) -> Optional[Task]:
         """
         Update a task for a user.
 
@@ -108,38 +530,53 @@ class TaskService:
             task_update: Task update data
 
         Returns:
-            Updated Task object
+            Updated Task object, or None if the task does not exist or belongs to another user
         """
         logger.info("Updating task", task_id=task_id, user_id=user_id)
 
-        # Get the task
-        statement = select(Task).where(Task.id == task_id).where(Task.user_id == user_id)
-        task = db_session.exec(statement).first()
+        values = task_update.model_dump(exclude_unset=True)
+        seq = TaskService._next_seq(db_session, user_id)
+        if values.get("completed") is not None:
+            db_session.execute(count_adjustment(task_id, user_id, "complete", values["completed"]))
+        task = TaskService._update_one(db_session, user_id, update_returning(task_id, user_id, values, seq))
 
-        if not task:
-            raise ValueError(f"Task {task_id} not found or doesn't belong to user {user_id}")
+        if task:
+            logger.info("Task updated successfully", task_id=task.id, user_id=user_id)
+        else:
+            logger.info("Task not found or doesn't belong to user", task_id=task_id, user_id=user_id)
+        return task
 
-        # Update the task with provided values
-        update_data = task_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(task, field, value)
+    @staticmethod
+    def toggle_task_completion(db_session: Session, task_id: int, user_id: str) -> Optional[Task]:
+        """
+        Flip the completion status of a task.
 
-        # Update timestamp
-        from datetime import datetime
-        task.updated_at = datetime.utcnow()
+        The flip happens in the database (``completed = NOT completed``), so two
+        concurrent toggles never read the same old value.
 
-        # Commit changes
-        db_session.add(task)
-        db_session.commit()
-        db_session.refresh(task)
+        Args:
+            db_session: Database session
+            task_id: ID of the task
+            user_id: ID of the user
 
-        logger.info("Task updated successfully", task_id=task.id, user_id=user_id)
-        return task
+        Returns:
+            Updated Task object, or None if the task does not exist or belongs to another user
+        """
+        logger.info("Toggling task completion", task_id=task_id, user_id=user_id)
+        seq = TaskService._next_seq(db_session, user_id)
+        db_session.execute(count_adjustment(task_id, user_id, "toggle"))
+        return TaskService._update_one(
+            db_session, user_id, update_returning(task_id, user_id, {"completed": not_(Task.completed)}, seq)
+        )
 
-    def delete_task(self, db_session: Session, task_id: int, user_id: str) -> bool:
+    @staticmethod
+    def delete_task(db_session: Session, task_id: int, user_id: str) -> bool:
         """
         Delete a task for a user.
 
+        The row is kept as a tombstone (``deleted_at`` set) so incremental sync
+        clients learn about the deletion; see purge_tombstones.
+
         Args:
             db_session: Database session
             task_id: ID of the task to delete
@@ -150,17 +587,500 @@ class TaskService:
         """
         logger.info("Deleting task", task_id=task_id, user_id=user_id)
 
-        # Get the task
-        statement = select(Task).where(Task.id == task_id).where(Task.user_id == user_id)
-        task = db_session.exec(statement).first()
+        seq = TaskService._next_seq(db_session, user_id)
+        db_session.execute(count_adjustment(task_id, user_id, "delete"))
+        deleted_id = db_session.execute(tombstone_returning(task_id, user_id, seq)).scalar_one_or_none()
+        db_session.commit()
 
-        if not task:
+        if deleted_id is None:
             logger.warning("Attempted to delete non-existent task", task_id=task_id, user_id=user_id)
             return False
 
-        # Delete the task
-        db_session.delete(task)
+        after_write(user_id, lambda: [task_event("deleted", task_id, seq)])
+        logger.info("Task deleted successfully", task_id=task_id, user_id=user_id)
+        return True
+
+    @staticmethod
+    def iter_tasks(db_session: Session, user_id: str, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[Row]]:
+        """
+        Stream all of a user's tasks in id order, ``batch_size`` rows at a time.
+
+        ``yield_per`` reads through a server-side cursor where the driver has one
+        (psycopg2), so memory use is bounded by the batch size rather than the
+        number of tasks. The session must stay open while the iterator is consumed.
+
+        Rows carry Task's columns as attributes but are not ORM instances, which
+        skips identity-map bookkeeping for what is a read-only dump.
+        """
+        statement = (
+            select(*Task.__table__.columns)
+            .where(Task.user_id == user_id, Task.deleted_at.is_(None))
+            .order_by(Task.id)
+            .execution_options(yield_per=batch_size)
+        )
+        task_count = 0
+        for batch in db_session.execute(statement).partitions():
+            task_count += len(batch)
+            yield batch
+
+        logger.info("Tasks exported", user_id=user_id, task_count=task_count)
+
+    @staticmethod
+    def search_tasks(
+        db_session: Session,
+        user_id: str,
+        q: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Task], Optional[str]]:
+        """
+        Full-text search over a user's task titles and descriptions.
+
+        Title matches rank above description matches. Results are keyset
+        paginated like get_tasks_page.
+
+        Args:
+            db_session: Database session
+            user_id: ID of the user
+            q: Search string; every word must match, words match as prefixes
+            limit: Maximum number of tasks to return
+            cursor: Cursor returned with the previous page, if any
+
+        Returns:
+            Tuple of (tasks, next_cursor); next_cursor is None on the last page
+
+        Raises:
+            ValueError: If the cursor is invalid or was issued for another query
+        """
+        terms = search_terms(q)
+        if not terms:
+            return [], None
+
+        statement, limit, sort_spec = build_search_query(
+            user_id, terms, db_session.get_bind().dialect.name, limit, cursor
+        )
+        rows = db_session.execute(statement).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_task, last_rank = rows[-1]
+            next_cursor = encode_cursor([last_rank, last_task.id], sort_spec)
+
+        logger.info("Tasks searched", user_id=user_id, term_count=len(terms), task_count=len(rows))
+        return [task for task, _ in rows], next_cursor
+
+    @staticmethod
+    def import_tasks(
+        db_session: Session,
+        user_id: str,
+        rows: Iterable[ImportRow],
+        chunk_size: int = IMPORT_CHUNK_SIZE,
+    ) -> dict:
+        """
+        Validate and insert a stream of task rows in chunks.
+
+        Each row is validated against TaskCreate. Valid rows are written
+        ``chunk_size`` at a time with insert_many and committed per chunk, so
+        memory stays bounded and a failure only loses the current chunk.
+
+        Args:
+            db_session: Database session
+            user_id: ID of the user the tasks belong to
+            rows: ``(line_number, row)`` pairs from a task_import reader
+            chunk_size: Rows per insert statement
+
+        Returns:
+            Dict with ``imported`` and ``failed`` counts and up to
+            MAX_IMPORT_ERRORS ``errors`` (``line`` and ``detail``)
+        """
+        imported = failed = 0
+        errors = []
+        first_seq = None
+        chunk: List[dict] = []
+        now = datetime.utcnow()
+
+        for line_number, row in rows:
+            try:
+                if isinstance(row, str):
+                    raise ValueError(row)
+                values = import_values(user_id, row, now)
+            except ValueError as e:
+                failed += 1
+                if len(errors) < MAX_IMPORT_ERRORS:
+                    errors.append({"line": line_number, "detail": import_error_detail(e)})
+                continue
+
+            chunk.append(values)
+            if len(chunk) >= chunk_size:
+                base = TaskService._insert_chunk(db_session, user_id, chunk)
+                first_seq = first_seq or base
+                imported += len(chunk)
+                chunk = []
+
+        if chunk:
+            base = TaskService._insert_chunk(db_session, user_id, chunk)
+            first_seq = first_seq or base
+            imported += len(chunk)
+
+        if imported:
+            # One resync marker instead of an event per row; clients catch up via /changes
+            after_write(user_id, lambda: [{"type": "resync", "since": first_seq - 1}])
+
+        logger.info("Tasks imported", user_id=user_id, imported=imported, failed=failed)
+        return {"imported": imported, "failed": failed, "errors": errors}
+
+    @staticmethod
+    def _insert_chunk(db_session: Session, user_id: str, rows: List[dict]) -> int:
+        """Stamp rows with fresh sequence numbers, insert them and commit; returns the first seq."""
+        completed = sum(1 for row in rows if row["completed"])
+        base = TaskService._next_seq(db_session, user_id, len(rows), len(rows), completed) - len(rows) + 1
+        for index, row in enumerate(rows):
+            row["seq"] = base + index
+        insert_many(db_session, rows)
         db_session.commit()
+        return base
 
-        logger.info("Task deleted successfully", task_id=task_id, user_id=user_id)
-        return True
\ No newline at end of file
+    @staticmethod
+    def get_stats(db_session: Session, user_id: str) -> dict:
+        """
+        Get a user's task counts.
+
+        Total and completed come from the user's TaskCounter row. Overdue depends
+        on the clock rather than on writes, so it is counted live from the
+        (user_id, completed, due_date) index, touching only overdue rows.
+
+        Returns:
+            Dict with ``total``, ``completed``, ``pending`` and ``overdue``
+        """
+        counter = db_session.get(TaskCounter, user_id)
+        total = counter.task_count if counter else 0
+        completed = counter.completed_count if counter else 0
+        overdue = db_session.execute(overdue_count_query(user_id, datetime.utcnow())).scalar_one()
+        return {"total": total, "completed": completed, "pending": total - completed, "overdue": overdue}
+
+    @staticmethod
+    def verify_counters(db_session: Session, fix: bool = False, user_id: Optional[str] = None) -> List[dict]:
+        """
+        Recompute task counts from the task table and compare them with TaskCounter.
+
+        Args:
+            db_session: Database session
+            fix: Overwrite drifted counters with the recomputed values
+            user_id: Only check this user (default: every user)
+
+        Returns:
+            One dict per drifted user with ``user_id``, ``task_count``,
+            ``completed_count`` (stored) and ``expected_task_count``,
+            ``expected_completed_count`` (recomputed)
+        """
+        def recount(user_ids=None):
+            statement = (
+                select(Task.user_id, func.count(), func.sum(case((Task.completed, 1), else_=0)))
+                .where(Task.deleted_at.is_(None))
+                .group_by(Task.user_id)
+            )
+            if user_ids is not None:
+                statement = statement.where(Task.user_id.in_(user_ids))
+            return {row[0]: (row[1], row[2] or 0) for row in db_session.execute(statement)}
+
+        scope = [user_id] if user_id else None
+        expected = recount(scope)
+        counters = select(TaskCounter)
+        if scope:
+            counters = counters.where(TaskCounter.user_id.in_(scope))
+        stored = {c.user_id: (c.task_count, c.completed_count) for c in db_session.exec(counters)}
+
+        drifted = sorted(
+            uid for uid in set(expected) | set(stored)
+            if expected.get(uid, (0, 0)) != stored.get(uid, (0, 0))
+        )
+        drift = []
+        for uid in drifted:
+            if fix:
+                # Lock the counter row so no write lands between recount and repair
+                TaskService._next_seq(db_session, uid, count=0)
+                expected[uid] = recount([uid]).get(uid, (0, 0))
+                db_session.execute(
+                    update(TaskCounter)
+                    .where(TaskCounter.user_id == uid)
+                    .values(task_count=expected[uid][0], completed_count=expected[uid][1])
+                )
+                db_session.commit()
+            drift.append({
+                "user_id": uid,
+                "task_count": stored.get(uid, (0, 0))[0],
+                "completed_count": stored.get(uid, (0, 0))[1],
+                "expected_task_count": expected.get(uid, (0, 0))[0],
+                "expected_completed_count": expected.get(uid, (0, 0))[1],
+            })
+
+        logger.info("Task counters verified", drifted=len(drift), fixed=fix)
+        return drift
+
+    @staticmethod
+    def get_changes(db_session: Session, user_id: str, since: int, limit: int = MAX_PAGE_SIZE) -> dict:
+        """
+        Get the tasks a user has created, updated or deleted after sequence ``since``.
+
+        Args:
+            db_session: Database session
+            user_id: ID of the user
+            since: Sequence returned by the previous poll (0 for a first sync)
+            limit: Maximum number of changes to return
+
+        Returns:
+            Dict with ``tasks`` (live rows), ``deleted_ids``, ``since`` (the
+            sequence to poll from next), ``has_more`` and ``reset``. ``reset`` is
+            True when tombstones newer than ``since`` have been purged, in which
+            case the client must discard its copy and resync from 0.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        counter = db_session.get(TaskCounter, user_id)
+        if counter is not None and 0 < since < counter.purged_seq:
+            return {"tasks": [], "deleted_ids": [], "since": 0, "has_more": True, "reset": True}
+
+        rows = list(db_session.exec(changes_query(user_id, since, limit)).all())
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        logger.info("Task changes fetched", user_id=user_id, since=since, change_count=len(rows))
+        return {
+            "tasks": [task for task in rows if task.deleted_at is None],
+            "deleted_ids": [task.id for task in rows if task.deleted_at is not None],
+            "since": rows[-1].seq if rows else since,
+            "has_more": has_more,
+            "reset": False,
+        }
+
+    @staticmethod
+    def purge_tombstones(db_session: Session, older_than: datetime, batch_size: int = 1000) -> int:
+        """
+        Permanently delete up to ``batch_size`` tombstones deleted before ``older_than``.
+
+        Each affected user's ``purged_seq`` is raised to the highest purged
+        sequence so clients that synced before it are told to resync.
+
+        Returns:
+            Number of tombstones removed; call again until it returns 0
+        """
+        rows = db_session.exec(
+            select(Task.id, Task.user_id, Task.seq)
+            .where(Task.deleted_at.is_not(None), Task.deleted_at < older_than)
+            .limit(batch_size)
+            # Concurrent purges (one scheduler per worker) take disjoint batches
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not rows:
+            return 0
+
+        purged: Dict[str, int] = {}
+        for _, user_id, seq in rows:
+            purged[user_id] = max(seq, purged.get(user_id, 0))
+        for user_id, seq in purged.items():
+            db_session.execute(
+                update(TaskCounter)
+                .where(TaskCounter.user_id == user_id, TaskCounter.purged_seq < seq)
+                .values(purged_seq=seq)
+            )
+        db_session.execute(delete(Task).where(Task.id.in_([row[0] for row in rows])))
+        db_session.commit()
+
+        logger.info("Purged task tombstones", count=len(rows), user_count=len(purged))
+        return len(rows)
+
+    @staticmethod
+    def _next_seq(
+        db_session: Session, user_id: str, count: int = 1, task_delta: int = 0, completed_delta: int = 0
+    ) -> int:
+        """Reserve ``count`` change sequence numbers for a user and return the last."""
+        statement = bump_sequence(user_id, db_session.get_bind().dialect.name, count, task_delta, completed_delta)
+        return db_session.execute(statement).scalar_one()
+
+    @staticmethod
+    def _update_one(db_session: Session, user_id: str, statement) -> Optional[Task]:
+        """Execute an UPDATE ... RETURNING for one task and commit."""
+        task = db_session.execute(statement).scalars().first()
+        if task is not None:
+            # The returned row is current; keep the commit from expiring it
+            db_session.expunge(task)
+        db_session.commit()
+        if task is not None:
+            after_write(user_id, lambda: [task_event("updated", task.id, task.seq, task)])
+        return task
+
+    @staticmethod
+    def apply_batch(db_session: Session, user_id: str, operations: Sequence[TaskBatchOperation]) -> List[dict]:
+        """
+        Apply a batch of mixed task operations in a single transaction.
+
+        Operations are grouped by kind and executed set-based: one multi-row
+        INSERT ... RETURNING for all creates, one UPDATE ... WHERE id IN ...
+        RETURNING per distinct change set, one for all completes and one
+        soft-delete UPDATE ... RETURNING for all deletes. Groups run in that order, so an
+        update and a delete of the same task in one batch leaves it deleted.
+
+        Args:
+            db_session: Database session
+            user_id: ID of the user owning the tasks
+            operations: Operations to apply
+
+        Returns:
+            One result dict per operation, in request order, with keys
+            index, op, status ("ok", "not_found" or "invalid"), id, task, detail
+        """
+        logger.info("Applying task batch", user_id=user_id, operation_count=len(operations))
+
+        results: List[Optional[dict]] = [None] * len(operations)
+
+        def record(index: int, status: str, task_id: Optional[int] = None, task: Optional[Task] = None, detail: Optional[str] = None):
+            results[index] = {
+                "index": index,
+                "op": operations[index].op,
+                "status": status,
+                "id": task_id,
+                "task": task,
+                "detail": detail,
+            }
+
+        creates: List[Tuple[int, Task]] = []
+        updates: Dict[tuple, List[Tuple[int, int]]] = {}
+        completes: List[Tuple[int, int]] = []
+        deletes: List[Tuple[int, int]] = []
+
+        for index, operation in enumerate(operations):
+            if operation.op == "create":
+                if operation.task is None:
+                    record(index, "invalid", detail="create requires task")
+                    continue
+                try:
+                    creates.append((index, build_task(user_id, operation.task)))
+                except ValueError as e:
+                    record(index, "invalid", detail=str(e))
+            elif operation.id is None:
+                record(index, "invalid", detail=f"{operation.op} requires id")
+            elif operation.op == "update":
+                if operation.changes is None:
+                    record(index, "invalid", task_id=operation.id, detail="update requires changes")
+                    continue
+                # Updates with identical change sets share one UPDATE statement
+                change_set = tuple(sorted(operation.changes.model_dump(exclude_unset=True).items()))
+                updates.setdefault(change_set, []).append((index, operation.id))
+            elif operation.op == "complete":
+                completes.append((index, operation.id))
+            else:
+                deletes.append((index, operation.id))
+
+        now = datetime.utcnow()
+        try:
+            # Reserve one sequence number per operation; operation i gets base + i
+            mutations = len(creates) + sum(len(items) for items in updates.values()) + len(completes) + len(deletes)
+            base = 0
+            if mutations:
+                created_completed = sum(1 for _, task in creates if task.completed)
+                base = TaskService._next_seq(
+                    db_session, user_id, len(operations), len(creates), created_completed
+                ) - len(operations) + 1
+            for index, task in creates:
+                task.seq = base + index
+
+            # Tasks whose live/completed state the batch may change; their counts
+            # are adjusted by the difference between before and after
+            touched = {task_id for _, task_id in completes + deletes}
+            for change_set, items in updates.items():
+                if dict(change_set).get("completed") is not None:
+                    touched.update(task_id for _, task_id in items)
+            counted_before = TaskService._live_counts(db_session, user_id, touched)
+
+            if creates:
+                rows = [task.model_dump(exclude={"id"}) for _, task in creates]
+                created = db_session.execute(
+                    insert(Task).returning(Task, sort_by_parameter_order=True), rows
+                ).scalars().all()
+                for (index, _), task in zip(creates, created):
+                    record(index, "ok", task_id=task.id, task=task)
+
+            for change_set, items in updates.items():
+                values = dict(change_set, updated_at=now)
+                TaskService._batch_update(db_session, user_id, items, values, base, record)
+
+            if completes:
+                TaskService._batch_update(db_session, user_id, completes, {"completed": True, "updated_at": now}, base, record)
+
+            if deletes:
+                deleted_ids = set(db_session.execute(
+                    update(Task)
+                    .where(
+                        Task.user_id == user_id,
+                        Task.id.in_([task_id for _, task_id in deletes]),
+                        Task.deleted_at.is_(None),
+                    )
+                    .values(deleted_at=now, updated_at=now, seq=batch_seq(deletes, base))
+                    .returning(Task.id)
+                    .execution_options(synchronize_session=False)
+                ).scalars().all())
+                for index, task_id in deletes:
+                    record(index, "ok" if task_id in deleted_ids else "not_found", task_id=task_id)
+
+            if touched:
+                counted_after = TaskService._live_counts(db_session, user_id, touched)
+                if counted_after != counted_before:
+                    db_session.execute(adjust_counts(
+                        user_id,
+                        counted_after[0] - counted_before[0],
+                        counted_after[1] - counted_before[1],
+                    ))
+
+            # RETURNING already gave us current rows; detach them so the commit
+            # does not expire them and trigger one reload SELECT per task
+            for task in {id(r["task"]): r["task"] for r in results if r and r["task"] is not None}.values():
+                db_session.expunge(task)
+            db_session.commit()
+        except Exception:
+            db_session.rollback()
+            logger.exception("Task batch failed", user_id=user_id)
+            raise
+
+        if any(result["status"] == "ok" for result in results):
+            after_write(user_id, lambda: [
+                task_event(
+                    "deleted" if result["op"] == "delete" else "created" if result["op"] == "create" else "updated",
+                    result["id"],
+                    base + result["index"],
+                    result["task"],
+                )
+                for result in results
+                if result["status"] == "ok"
+            ])
+
+        logger.info("Task batch applied", user_id=user_id, operation_count=len(operations))
+        return results
+
+    @staticmethod
+    def _live_counts(db_session: Session, user_id: str, task_ids: set) -> Tuple[int, int]:
+        """(live, completed) counts among ``task_ids``; (0, 0) without a query when empty."""
+        if not task_ids:
+            return 0, 0
+        live, completed = db_session.execute(
+            select(func.count(), func.coalesce(func.sum(case((Task.completed, 1), else_=0)), 0))
+            .where(Task.user_id == user_id, Task.id.in_(task_ids), Task.deleted_at.is_(None))
+        ).one()
+        return live, completed
+
+    @staticmethod
+    def _batch_update(db_session: Session, user_id: str, items: List[Tuple[int, int]], values: dict, base: int, record):
+        """Run one UPDATE ... WHERE id IN ... RETURNING for a group of batch items."""
+        statement = (
+            update(Task)
+            .where(
+                Task.user_id == user_id,
+                Task.id.in_([task_id for _, task_id in items]),
+                Task.deleted_at.is_(None),
+            )
+            .values(**values, seq=batch_seq(items, base))
+            .returning(Task)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        updated = {task.id: task for task in db_session.execute(statement).scalars().all()}
+        for index, task_id in items:
+            task = updated.get(task_id)
+            record(index, "ok" if task else "not_found", task_id=task_id, task=task)
@@ -0,0 +1,127 @@
+"""
+Bounded executor for bcrypt password hashing.
+
+bcrypt is deliberately slow (100-300 ms of CPU per call at the default cost), so
+running it inline in request handlers lets a burst of sign-ins starve every other
+request on the worker. Hashing is instead submitted to a dedicated process pool
+sized to the available cores. The number of queued + running jobs is capped, and
+callers beyond the cap are rejected immediately with HashingPoolSaturatedError
+rather than waiting in an unbounded queue.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from .metrics import password_hash_duration_seconds
+from .security import get_password_hash, verify_password
+
+load_dotenv()
+
+# 0 disables the pool and hashes inline (useful for tests and single-core hosts)
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+# Maximum jobs queued or running before new requests are shed
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", str(max(HASH_WORKERS, 1) * 4)))
+# Seconds clients are told to wait before retrying when the pool is saturated
+HASH_RETRY_AFTER = int(os.getenv("HASH_RETRY_AFTER", "1"))
+
+
+# Metric label for each hashing function
+HASH_OPERATIONS = {verify_password: "verify", get_password_hash: "hash"}
+
+
+class HashingPoolSaturatedError(RuntimeError):
+    """Raised when the hashing executor already has HASH_MAX_PENDING jobs in flight."""
+
+    def __init__(self, retry_after: int = HASH_RETRY_AFTER):
+        super().__init__("Password hashing capacity exhausted, retry later")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """Runs bcrypt hash/verify calls on a bounded process pool."""
+
+    def __init__(self, max_workers: int = HASH_WORKERS, max_pending: int = HASH_MAX_PENDING):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs currently queued or running"""
+        return self._pending
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Created lazily so importing the module does not fork worker processes
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def _reserve(self):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HashingPoolSaturatedError()
+            self._pending += 1
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+
+    def submit(self, fn, *args) -> Future:
+        """Submit a hashing function, failing fast if the pool is saturated."""
+        self._reserve()
+        duration = password_hash_duration_seconds.labels(HASH_OPERATIONS.get(fn, fn.__name__))
+        start = time.perf_counter()
+        if self.max_workers <= 0:
+            future: Future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                self._release()
+                duration.observe(time.perf_counter() - start)
+            return future
+
+        try:
+            future = self._get_pool().submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        # Measured from submission, so time spent queued behind other jobs counts
+        future.add_done_callback(lambda _future: duration.observe(time.perf_counter() - start))
+        return future
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password, blocking the calling thread (not the CPU) until done"""
+        return self.submit(verify_password, plain_password, hashed_password).result()
+
+    def hash(self, password: str) -> str:
+        """Hash a password, blocking the calling thread (not the CPU) until done"""
+        return self.submit(get_password_hash, password).result()
+
+    async def verify_async(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(verify_password, plain_password, hashed_password))
+
+    async def hash_async(self, password: str) -> str:
+        """Hash a password without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(get_password_hash, password))
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+password_hasher = PasswordHasher()
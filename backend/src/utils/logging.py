@@ -0,0 +1,9 @@
+"""
+Logging helpers for the AI-Powered Natural Language Chatbot for Todo Management.
+"""
+import structlog
+
+
+def get_logger(name: str = None):
+    """Return a structlog logger bound to the given module name."""
+    return structlog.get_logger(name)
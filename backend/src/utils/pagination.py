@@ -0,0 +1,193 @@
+"""
+Keyset (cursor) pagination helpers.
+
+A cursor is an opaque, URL-safe token that records the sort key of the last row
+on a page. The next page is fetched with a ``WHERE (key) > (cursor)`` style
+predicate instead of an OFFSET, so the cost of a page does not depend on how
+deep into the result set the client is.
+
+That only holds while the predicate is an index range. An ``a > x OR (a = x
+AND b > y)`` expansion is not one on SQLite or PostgreSQL: the planner seeks
+to the equality prefix of the index and filters from there, so each page
+re-reads every row before the cursor. Predicates here are therefore built
+from row-value comparisons, ``(a, b) > (x, y)``, which both use as a seek.
+A row value needs all its columns sorted the same way, so a key with mixed
+directions is split into one branch per run of equal direction, and
+``keyset_page`` queries each branch as its own range.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Boolean, and_, false, literal, or_, select, tuple_, union_all
+from sqlalchemy.orm import aliased
+from sqlmodel import select as select_model
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded or does not match the query."""
+
+
+def encode_cursor(values: Sequence[Any], sort: str) -> str:
+    """Encode the sort key of the last row on a page into an opaque cursor."""
+    key = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps({"s": sort, "k": key}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, length: Optional[int] = None) -> List[Any]:
+    """
+    Decode a cursor produced by ``encode_cursor`` for the same sort
+    specification; when given, its key must hold ``length`` values.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        key = payload["k"]
+        cursor_sort = payload["s"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError("Invalid pagination cursor") from e
+
+    if cursor_sort != sort:
+        raise InvalidCursorError("Pagination cursor does not match the requested sort order")
+    if not isinstance(key, list) or (length is not None and len(key) != length):
+        raise InvalidCursorError("Invalid pagination cursor")
+    return key
+
+
+def _keyset_runs(keys: Sequence[Tuple[Any, bool]], leading: int) -> List[List[int]]:
+    """Group key positions into runs sorted the same way; the first ``leading`` keys stand alone."""
+    runs: List[List[int]] = []
+    for i, (_, descending) in enumerate(keys):
+        if runs and i > leading and keys[runs[-1][0]][1] == descending:
+            runs[-1].append(i)
+        else:
+            runs.append([i])
+    return runs
+
+
+def _keyset_branches(keys: Sequence[Tuple[Any, bool]], values: Sequence[Any], leading: int) -> List[Tuple[int, Any]]:
+    """``keyset_branches``, each paired with the position of the first key it orders by"""
+    # Bind values as typed literals so booleans can take part in range comparisons
+    bound = [literal(value, column.type) for (column, _), value in zip(keys, values)]
+    branches = []
+    for run in _keyset_runs(keys, leading):
+        column, descending = keys[run[0]]
+        start = run[0]
+        if len(run) == 1 and isinstance(column.type, Boolean) and isinstance(values[run[0]], bool):
+            if values[run[0]] != descending:
+                # Nothing sorts after True ascending or False descending
+                continue
+            comparison = column == literal(not descending, column.type)
+            start += 1
+        elif len(run) == 1:
+            comparison = column < bound[run[0]] if descending else column > bound[run[0]]
+        else:
+            columns, after = tuple_(*(keys[i][0] for i in run)), tuple_(*(bound[i] for i in run))
+            comparison = columns < after if descending else columns > after
+        equal_prefix = [keys[i][0] == bound[i] for i in range(run[0])]
+        branches.append((start, and_(*equal_prefix, comparison)))
+    return list(reversed(branches))
+
+
+def keyset_branches(keys: Sequence[Tuple[Any, bool]], values: Sequence[Any], leading: int = 0) -> List[Any]:
+    """
+    Split the "rows strictly after ``values``" condition into disjoint,
+    index-friendly branches.
+
+    Args:
+        keys: (column, descending) pairs in sort order
+        values: the sort key of the last row already returned
+        leading: number of leading keys that each get a branch of their own
+            even when the next key sorts the same way, for an index scanned
+            in either direction past them
+
+    Returns:
+        One condition per run of keys sorted the same way, in result order:
+        equality on the runs before it and a row-value comparison on the run
+        itself. A boolean has at most one value after any other, so its
+        comparison is written as an equality, which keeps the later index
+        columns in order. For (completed ASC, updated_at DESC, id DESC) after
+        a pending task that is ``completed = false AND (updated_at, id) < (u,
+        i)``, then ``completed = true``.
+    """
+    return [condition for _, condition in _keyset_branches(keys, values, leading)]
+
+
+def keyset_predicate(keys: Sequence[Tuple[Any, bool]], values: Sequence[Any]):
+    """
+    Build the "rows strictly after ``values``" predicate for a keyset.
+
+    Equivalent to a row-value comparison over all keys; with mixed sort
+    directions it is an OR of ``keyset_branches``, which is correct but only
+    the first branch can use an index. Use ``keyset_page`` for those.
+    """
+    branches = keyset_branches(keys, values)
+    return or_(*branches) if branches else false()
+
+
+def keyset_page(
+    statement,
+    model,
+    keys: Sequence[Tuple[Any, bool]],
+    values: Optional[Sequence[Any]],
+    limit: int,
+    leading: int = 0,
+    split_start: bool = False,
+):
+    """
+    Order ``statement`` (a ``select(model)``) by ``keys`` and take ``limit``
+    rows after ``values``, or from the start when ``values`` is None;
+    ``leading`` is passed to ``keyset_branches``. With ``split_start`` and a
+    leading boolean key, the first page is also read one branch per value of
+    it, for an index whose later columns run the other way.
+
+    With mixed sort directions each branch of the keyset is a separate
+    ordered, limited range scan; the branches are combined with UNION ALL and
+    only their at most ``limit`` rows each are sorted again.
+    """
+    if values is not None:
+        branches = _keyset_branches(keys, values, leading)
+    elif split_start and leading and isinstance(keys[0][0].type, Boolean):
+        # From the start, one branch per value of a leading boolean
+        column, descending = keys[0]
+        branches = [(1, column == literal(value, column.type)) for value in ((True, False) if descending else (False, True))]
+    else:
+        return statement.order_by(*order_by_clauses(keys)).limit(limit)
+    if not branches:
+        return statement.where(false()).limit(limit)
+    if len(branches) == 1:
+        start, condition = branches[0]
+        return statement.where(condition).order_by(*order_by_clauses(keys[start:])).limit(limit)
+
+    # Within a branch the keys before its run are fixed, and leaving them out
+    # of its ORDER BY lets either scan direction of the index serve it. Each
+    # branch is wrapped in a subquery: SQLite rejects ORDER BY/LIMIT on a bare
+    # UNION member.
+    parts = union_all(
+        *(
+            select(statement.where(condition).order_by(*order_by_clauses(keys[start:])).limit(limit).subquery())
+            for start, condition in branches
+        )
+    ).subquery()
+    page = aliased(model, parts)
+    # SQLModel's select, so Session.exec yields model instances as for the plain query
+    return select_model(page).order_by(
+        *order_by_clauses([(parts.c[column.key], descending) for column, descending in keys])
+    ).limit(limit)
+
+
+def order_by_clauses(keys: Sequence[Tuple[Any, bool]]) -> List[Any]:
+    """Return ORDER BY clauses for a keyset specification."""
+    return [column.desc() if descending else column.asc() for column, descending in keys]
+
+
+def parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO timestamp stored in a cursor."""
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError) as e:
+        raise InvalidCursorError("Invalid pagination cursor") from e
@@ -0,0 +1,234 @@
+"""
+Rate limiting and concurrency admission for expensive endpoints.
+
+RateLimiter keeps a token bucket per rule and key (a client IP, an email, or
+both). A rule such as ``5/minute`` holds up to 5 tokens and refills at 5 per
+minute, so it admits a burst of 5 and then one request every 12 seconds. A
+request without a token is rejected with 429 and a Retry-After of the time
+until the next token. Rules are configured per endpoint with RATE_LIMIT_<RULE>
+(an empty value disables the rule).
+
+Buckets live in a pluggable store:
+
+- ``memory`` (default): an in-process LRU of RATE_LIMIT_MAX_KEYS buckets.
+  Each worker process counts separately, so with N workers a client gets up
+  to N times the configured rate.
+- ``redis``: one atomic Lua script per check, shared by every worker, keyed
+  by the Redis server clock.
+
+Store errors fail open: a request is let through and a warning is logged.
+
+ConcurrencyLimiter caps how many requests of a kind run at once in a process
+(AUTH_MAX_CONCURRENT for the bcrypt-heavy auth endpoints). Requests over the
+cap are rejected with 503 and Retry-After before they take a threadpool
+thread, so a login storm cannot starve the task endpoints.
+
+Both checks run as async dependencies on the event loop. The client IP is
+``request.client.host``; behind a reverse proxy run uvicorn with
+``--proxy-headers --forwarded-allow-ips=<proxy>`` so it is the real client.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .logging import get_logger
+from .metrics import registry
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # memory or redis
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+AUTH_MAX_CONCURRENT = int(os.getenv("AUTH_MAX_CONCURRENT", "16"))
+AUTH_RETRY_AFTER = int(os.getenv("AUTH_RETRY_AFTER", "1"))
+
+# Rule name -> default limit
+AUTH_RATE_LIMITS = {
+    "signin_ip": "20/minute",
+    "signin_email": "5/minute",
+    "signup_ip": "5/minute",
+    "forgot_password_ip": "5/minute",
+    "forgot_password_email": "3/hour",
+    "reset_password_ip": "10/minute",
+    "refresh_ip": "60/minute",
+}
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+rate_limited_total = registry.counter(
+    "rate_limited_total", "Requests rejected by a rate limit rule", ("rule",)
+)
+concurrency_shed_total = registry.counter(
+    "concurrency_shed_total", "Requests rejected by a concurrency cap", ("limiter",)
+)
+
+
+class RateLimitedError(RuntimeError):
+    """Raised when a rate limit bucket is empty."""
+
+    def __init__(self, rule: str, retry_after: int):
+        super().__init__("Too many requests, retry later")
+        self.rule = rule
+        self.retry_after = retry_after
+
+
+class OverloadedError(RuntimeError):
+    """Raised when a ConcurrencyLimiter is at its cap."""
+
+    def __init__(self, retry_after: int = AUTH_RETRY_AFTER):
+        super().__init__("Server busy, retry later")
+        self.retry_after = retry_after
+
+
+def parse_limit(spec: str) -> Optional[Tuple[float, int]]:
+    """Parse ``"<count>/<second|minute|hour|day>"`` into (tokens per second, capacity); '' is no limit"""
+    if not spec.strip():
+        return None
+    count, _, period = spec.strip().partition("/")
+    capacity = int(count)
+    if capacity <= 0 or period not in PERIODS:
+        raise ValueError(f"Invalid rate limit {spec!r}; expected e.g. '5/minute'")
+    return capacity / PERIODS[period], capacity
+
+
+class MemoryRateLimitBackend:
+    """In-process token buckets, least recently used evicted beyond ``max_keys``."""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS, clock=time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        # key -> [tokens, last refill time]
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, rate: float, capacity: int) -> float:
+        """Take a token; returns 0 if one was available, else the seconds until one is"""
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(capacity), now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / rate
+
+
+# KEYS[1] bucket hash; ARGV rate (tokens/s), capacity. Returns the wait in
+# seconds as a string, since Lua numbers come back from Redis as integers.
+TOKEN_BUCKET_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisRateLimitBackend:
+    """Token buckets shared across workers, for an asyncio Redis-compatible client."""
+
+    def __init__(self, client):
+        self.client = client
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def take(self, key: str, rate: float, capacity: int) -> float:
+        wait = await self._script(keys=[f"ratelimit:{key}"], args=[rate, capacity])
+        return float(wait)
+
+
+class RateLimiter:
+    """Named token bucket rules over a shared bucket store."""
+
+    def __init__(self, backend, limits: Dict[str, str], enabled: bool = True):
+        self.backend = backend
+        self.rules = {name: parse_limit(spec) for name, spec in limits.items()}
+        self.enabled = enabled
+
+    async def hit(self, rule: str, value: str):
+        """Take a token from ``rule``'s bucket for ``value`` or raise RateLimitedError"""
+        limit = self.rules.get(rule)
+        if not self.enabled or limit is None:
+            return
+        rate, capacity = limit
+        try:
+            wait = await self.backend.take(f"{rule}:{value}", rate, capacity)
+        except Exception as e:
+            logger.warning("Rate limit check failed; allowing request", rule=rule, error=str(e))
+            return
+        if wait > 0:
+            rate_limited_total.labels(rule).inc()
+            raise RateLimitedError(rule, max(1, int(wait + 0.999)))
+
+
+class ConcurrencyLimiter:
+    """Admits at most ``limit`` concurrent holders and rejects the rest immediately."""
+
+    def __init__(self, name: str, limit: int, retry_after: int = AUTH_RETRY_AFTER):
+        self.name = name
+        self.limit = limit
+        self.retry_after = retry_after
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self.limit > 0 and self.active >= self.limit:
+                concurrency_shed_total.labels(self.name).inc()
+                raise OverloadedError(self.retry_after)
+            self.active += 1
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+
+    async def slot(self):
+        """FastAPI dependency holding a slot for the rest of the request"""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+def rate_limit_limits(defaults: Dict[str, str] = AUTH_RATE_LIMITS) -> Dict[str, str]:
+    """The rules with RATE_LIMIT_<RULE> overrides applied"""
+    return {name: os.getenv(f"RATE_LIMIT_{name.upper()}", spec) for name, spec in defaults.items()}
+
+
+def create_backend(name: str = RATE_LIMIT_BACKEND):
+    """Build the configured bucket store"""
+    if name == "redis":
+        # Optional dependency; only needed when the Redis backend is selected
+        import redis.asyncio
+        return RedisRateLimitBackend(redis.asyncio.Redis.from_url(REDIS_URL))
+    return MemoryRateLimitBackend()
+
+
+auth_rate_limiter = RateLimiter(create_backend(), rate_limit_limits(), enabled=RATE_LIMIT_ENABLED)
+auth_concurrency = ConcurrencyLimiter("auth", AUTH_MAX_CONCURRENT)
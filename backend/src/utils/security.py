@@ -1,6 +1,11 @@
 import bcrypt
+import hashlib
+import hmac
+import secrets
+import uuid
 from datetime import datetime, timedelta
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, Tuple
 import os
 from dotenv import load_dotenv
 from jose import JWTError, jwt
@@ -11,6 +16,11 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY", "your-default-secret-key-change-in-production")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+# Refresh tokens expire after this many days without use
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+
+# bcrypt cost factor; each increment doubles the time to hash or verify
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password"""
@@ -26,9 +36,18 @@ def get_password_hash(password: str) -> str:
     # Truncate to 72 bytes for bcrypt
     if len(password_bytes) > 72:
         password_bytes = password_bytes[:72]
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     return bcrypt.hashpw(password_bytes, salt).decode('utf-8')
 
+@lru_cache(maxsize=1)
+def dummy_password_hash() -> str:
+    """
+    A hash of a random password at BCRYPT_ROUNDS, computed on first use.
+    Verifying against it costs the same as a real check, which sign-in does
+    for unknown emails so response time does not reveal which accounts exist.
+    """
+    return get_password_hash(secrets.token_urlsafe(16))
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -47,4 +66,26 @@ def verify_token(token: str) -> Optional[dict]:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
     except JWTError:
-        return None
\ No newline at end of file
+        return None
+
+def hash_refresh_secret(secret: str) -> str:
+    """HMAC-SHA256 of a refresh token secret; the session table stores only this"""
+    return hmac.new(SECRET_KEY.encode("utf-8"), secret.encode("utf-8"), hashlib.sha256).hexdigest()
+
+def create_refresh_token(session_id: uuid.UUID) -> Tuple[str, str]:
+    """
+    A new refresh token ``<session id>.<secret>`` for a session, and the hash
+    of its secret to store
+    """
+    secret = secrets.token_urlsafe(32)
+    return f"{session_id.hex}.{secret}", hash_refresh_secret(secret)
+
+def parse_refresh_token(token: str) -> Optional[Tuple[uuid.UUID, str]]:
+    """The session id and secret hash in a refresh token, or None if it is malformed"""
+    session_id, _, secret = token.partition(".")
+    if not secret:
+        return None
+    try:
+        return uuid.UUID(hex=session_id), hash_refresh_secret(secret)
+    except ValueError:
+        return None
@@ -0,0 +1,119 @@
+"""
+Bounded LRU cache of verified JWT claims.
+
+Decoding a token (base64 + JSON + HMAC check) on every request is pure overhead
+for clients that poll with the same token. Claims are cached by SHA-256 digest of
+the token until the token's own ``exp``, so a cached entry is never served after
+the point where ``jwt.decode`` would have rejected the token.
+
+There is no per-token or per-user invalidation: access tokens are stateless, so
+evicting an entry would only make the next request decode the token again and
+accept it. Signing out, a password reset or a revoked refresh session end the
+session at the next refresh; an access token already issued, cached or not,
+works until its ``exp`` (ACCESS_TOKEN_EXPIRE_MINUTES).
+
+The hit, miss and eviction counters and the size are exported on /metrics.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from .metrics import registry
+
+load_dotenv()
+
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "10000"))
+
+
+def token_digest(token: str) -> str:
+    """Digest used as the cache key, so raw tokens are never held in memory"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class TokenCache:
+    """Thread-safe LRU/TTL cache mapping token digests to decoded claims."""
+
+    def __init__(self, maxsize: int = JWT_CACHE_SIZE, clock=time.time):
+        self.maxsize = maxsize
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, token: str) -> Optional[dict]:
+        """Return cached claims for a token, or None on a miss or expired entry"""
+        key = token_digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            claims, expires_at = entry
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return claims
+
+    def put(self, token: str, claims: dict):
+        """Cache verified claims; tokens without a numeric exp are not cached"""
+        expires_at = claims.get("exp")
+        if not isinstance(expires_at, (int, float)) or self.maxsize <= 0:
+            return
+        key = token_digest(token)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self._entries[key] = (claims, expires_at)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all cached entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+token_cache = TokenCache()
+
+
+# stats() keys exported to Prometheus: (metric name, type, help)
+TOKEN_CACHE_METRICS = {
+    "hits": ("jwt_cache_hits_total", "counter", "Requests whose token claims were served from the cache"),
+    "misses": ("jwt_cache_misses_total", "counter", "Requests that decoded and verified their token"),
+    "evictions": ("jwt_cache_evictions_total", "counter", "Cached tokens evicted to stay within JWT_CACHE_SIZE"),
+    "size": ("jwt_cache_size", "gauge", "Tokens currently cached"),
+}
+
+
+def token_cache_metric_lines():
+    """token_cache.stats() in the Prometheus text format."""
+    stats = token_cache.stats()
+    for key, (name, kind, documentation) in TOKEN_CACHE_METRICS.items():
+        yield f"# HELP {name} {documentation}"
+        yield f"# TYPE {name} {kind}"
+        yield f"{name} {stats[key]}"
+
+
+registry.add_collector(token_cache_metric_lines)
@@ -0,0 +1,89 @@
+"""
+Bounded LRU cache of sign-in credentials by email.
+
+Every sign-in looks the user up by email before the bcrypt check. Caching the
+id and password hash for USER_CACHE_TTL seconds lets repeat sign-ins skip that
+query. Entries are invalidated when the password changes in this process;
+other worker processes keep their entry until it expires. An old password
+that still matches such an entry gets no session: the session insert only
+succeeds while the user's stored hash is the one that was checked
+(``models/auth_session.start_session``). A cached hash that rejects the
+password is re-read from the database before the sign-in fails, so a new
+password works everywhere immediately.
+
+Unknown emails are not cached: a sign-up in another process would otherwise be
+invisible here until the entry expired.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+
+
+class UserCredentials(NamedTuple):
+    """The columns sign-in needs"""
+    id: uuid.UUID
+    email: str
+    password_hash: str
+
+
+class UserCache:
+    """Thread-safe LRU/TTL cache mapping emails to UserCredentials."""
+
+    def __init__(self, maxsize: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, email: str) -> Optional[UserCredentials]:
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is None:
+                self.misses += 1
+                return None
+            credentials, expires_at = entry
+            if self._clock() >= expires_at:
+                del self._entries[email]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(email)
+            self.hits += 1
+            return credentials
+
+    def put(self, credentials: UserCredentials):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[credentials.email] = (credentials, self._clock() + self.ttl)
+            self._entries.move_to_end(credentials.email)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, email: str) -> bool:
+        """Drop a user's entry, e.g. after a password change"""
+        with self._lock:
+            return self._entries.pop(email, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+user_cache = UserCache()
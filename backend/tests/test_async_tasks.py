@@ -0,0 +1,89 @@
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ..api.async_tasks import router as async_tasks_router
+from ..database.async_engine import get_async_session
+from ..utils.security import create_access_token
+
+# The async routers are only mounted on PostgreSQL, so these tests serve them
+# from their own app over aiosqlite.
+@pytest.fixture(name="client")
+def client_fixture(tmp_path):
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    sync_engine = create_engine(url)
+    SQLModel.metadata.create_all(sync_engine)
+    sync_engine.dispose()
+
+    async_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+    session_factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def get_async_session_override():
+        async with session_factory() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(async_tasks_router, prefix="/api/{user_id}")
+    app.dependency_overrides[get_async_session] = get_async_session_override
+    # One event loop for the whole test, which the engine's connections belong to
+    with TestClient(app) as client:
+        yield client
+        client.portal.call(async_engine.dispose)
+
+
+def auth_headers():
+    user_id = str(uuid.uuid4())
+    token = create_access_token(data={"sub": user_id, "email": f"{user_id}@example.com"})
+    return user_id, {"Authorization": f"Bearer {token}"}
+
+
+def test_async_task_crud(client: TestClient):
+    user_id, headers = auth_headers()
+
+    response = client.post(f"/api/{user_id}/tasks", json={"title": "Async task", "priority": "high"}, headers=headers)
+    assert response.status_code == 201
+    task = response.json()
+    assert task["title"] == "Async task"
+
+    assert client.get(f"/api/{user_id}/tasks/{task['id']}", headers=headers).json()["priority"] == "high"
+    response = client.put(f"/api/{user_id}/tasks/{task['id']}", json={"title": "Renamed"}, headers=headers)
+    assert response.json()["title"] == "Renamed"
+    response = client.patch(f"/api/{user_id}/tasks/{task['id']}/complete", headers=headers)
+    assert response.json()["completed"] is True
+
+    assert client.delete(f"/api/{user_id}/tasks/{task['id']}", headers=headers).status_code == 204
+    assert client.get(f"/api/{user_id}/tasks/{task['id']}", headers=headers).status_code == 404
+    assert client.get(f"/api/{user_id}/tasks", headers=headers).json() == []
+
+    # Another user's tasks are off limits
+    other_id, _ = auth_headers()
+    assert client.get(f"/api/{other_id}/tasks", headers=headers).status_code == 403
+
+
+def test_async_task_pagination(client: TestClient):
+    user_id, headers = auth_headers()
+    for i in range(5):
+        client.post(f"/api/{user_id}/tasks", json={"title": f"Task {i}"}, headers=headers)
+
+    seen = []
+    params = {"limit": 2}
+    while True:
+        response = client.get(f"/api/{user_id}/tasks", params=params, headers=headers)
+        assert response.status_code == 200
+        page = [task["id"] for task in response.json()]
+        assert len(page) <= 2
+        seen.extend(page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        params["cursor"] = cursor
+    # Newest first by default
+    assert seen == sorted(seen, reverse=True)
+    assert len(set(seen)) == 5
+
+    response = client.get(f"/api/{user_id}/tasks", params={"cursor": "not-a-cursor"}, headers=headers)
+    assert response.status_code == 400
@@ -1,8 +1,14 @@
+import email
+import email.policy
+from datetime import datetime, timedelta
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel import Session, SQLModel, create_engine, select
 from sqlmodel.pool import StaticPool
 from ..main import app
+from ..utils.rate_limit import MemoryRateLimitBackend, auth_rate_limiter
+from ..utils.user_cache import user_cache
 from ..database.engine import get_session
 from ..models.user import User
 
@@ -28,6 +34,9 @@ def client_fixture(session):
         return session
 
     app.dependency_overrides[get_session] = get_session_override
+    # Fresh rate limit buckets (every test client shares one IP) and user cache
+    auth_rate_limiter.backend = MemoryRateLimitBackend()
+    user_cache.clear()
     client = TestClient(app)
     yield client
     app.dependency_overrides.clear()
@@ -45,4 +54,303 @@ def test_create_user(client: TestClient, session: Session):
     # Verify user was created in the database
     user = session.get(User, data["id"])
     assert user is not None
-    assert user.email == "test@example.com"
\ No newline at end of file
+    assert user.email == "test@example.com"
+
+def test_password_hasher_rejects_when_saturated():
+    from ..utils.hashing import HashingPoolSaturatedError, PasswordHasher
+
+    hasher = PasswordHasher(max_workers=0, max_pending=1)
+    hashed = hasher.hash("password123")
+    assert hasher.verify("password123", hashed)
+    assert hasher.pending == 0
+
+    saturated = PasswordHasher(max_workers=0, max_pending=0)
+    with pytest.raises(HashingPoolSaturatedError):
+        saturated.verify("password123", hashed)
+
+
+def test_token_cache_expiry_and_invalidation():
+    from ..utils.token_cache import TokenCache
+
+    now = [1000.0]
+    cache = TokenCache(maxsize=2, clock=lambda: now[0])
+    cache.put("token-a", {"sub": "user-1", "exp": 1010})
+
+    assert cache.get("token-a") == {"sub": "user-1", "exp": 1010}
+    assert cache.get("token-b") is None
+
+    now[0] = 1010.0
+    assert cache.get("token-a") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+    now[0] = 1000.0
+    cache.put("token-a", {"sub": "user-1", "exp": 1010})
+    cache.put("token-b", {"sub": "user-1", "exp": 1010})
+    cache.put("token-c", {"sub": "user-2", "exp": 1010})
+    assert cache.get("token-a") is None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size"] == 2
+
+
+def test_token_cache_counters_on_metrics(client: TestClient):
+    import time
+    from ..utils.token_cache import token_cache
+
+    token_cache.clear()
+    token_cache.put("token-a", {"sub": "user-1", "exp": time.time() + 60})
+    token_cache.get("token-a")
+    token_cache.get("token-b")
+
+    body = client.get("/metrics").text
+    stats = token_cache.stats()
+    assert "jwt_cache_size 1" in body
+    assert f"jwt_cache_hits_total {stats['hits']}" in body
+    assert f"jwt_cache_misses_total {stats['misses']}" in body
+    assert "# TYPE jwt_cache_evictions_total counter" in body
+
+
+def test_forgot_password_queues_email_for_outbox_worker(client: TestClient, session: Session, tmp_path, monkeypatch):
+    from ..models.email_outbox import EmailOutbox
+    from ..models.password_reset import PasswordResetToken
+    from ..services import email_outbox
+    from ..services.email_providers import FileProvider
+
+    class DownProvider:
+        name = "down"
+
+        def send_batch(self, messages):
+            return ["SMTPServerDisconnected: Connection unexpectedly closed"] * len(messages)
+
+    client.post("/auth/signup", json={"email": "reset@example.com", "password": "password123"})
+    response = client.post("/auth/forgot-password", json={"email": "reset@example.com"})
+    assert response.status_code == 200
+
+    # Queued with the token in the same commit, not sent by the request
+    queued = session.exec(select(EmailOutbox)).one()
+    token = session.exec(select(PasswordResetToken)).one()
+    assert queued.status == "pending"
+    assert queued.to_email == "reset@example.com"
+    assert token.token in queued.html
+
+    # A failed send is retried with backoff
+    assert email_outbox.dispatch_pending(session, DownProvider()) == 1
+    session.refresh(queued)
+    assert (queued.status, queued.attempts) == ("pending", 1)
+    assert queued.last_error.startswith("SMTPServerDisconnected")
+    assert queued.next_attempt_at > datetime.utcnow() + timedelta(seconds=email_outbox.EMAIL_RETRY_BASE_SECONDS / 2 - 1)
+    assert email_outbox.dispatch_pending(session, FileProvider(tmp_path)) == 0
+
+    queued.next_attempt_at = datetime.utcnow()
+    session.add(queued)
+    session.commit()
+    assert email_outbox.dispatch_pending(session, FileProvider(tmp_path)) == 1
+    session.refresh(queued)
+    assert (queued.status, queued.attempts, queued.last_error) == ("sent", 2, None)
+    [sent] = tmp_path.glob("*.eml")
+    message = email.message_from_bytes(sent.read_bytes(), policy=email.policy.default)
+    assert message["To"] == "reset@example.com"
+    assert token.token in message.get_content()
+
+    # Batches drain the whole backlog; the last attempt marks a message failed
+    monkeypatch.setattr(email_outbox, "EMAIL_MAX_ATTEMPTS", 1)
+    for i in range(5):
+        session.add(EmailOutbox(kind="test", to_email=f"user{i}@example.com", subject="Hi", html="<p>Hi</p>"))
+    session.commit()
+    assert email_outbox.dispatch_pending(session, DownProvider(), batch_size=2) == 5
+    statuses = session.exec(select(EmailOutbox.status).where(EmailOutbox.kind == "test")).all()
+    assert statuses == ["failed"] * 5
+
+    # Finished rows, reset link and all, are purged after the retention; pending ones stay
+    from ..services.maintenance import purge_sent_emails
+
+    session.add(EmailOutbox(kind="pending", to_email="later@example.com", subject="Hi", html="<p>Hi</p>"))
+    session.commit()
+    assert purge_sent_emails(session, retention_days=7) == 0
+    later = datetime.utcnow() + timedelta(days=8)
+    assert purge_sent_emails(session, batch_size=4, now=later, retention_days=7) == 6
+    assert session.exec(select(EmailOutbox.kind)).all() == ["pending"]
+
+
+def test_reset_tokens_invalidated_and_purged(client: TestClient, session: Session):
+    from ..models.password_reset import PasswordResetToken
+    from ..services.maintenance import purge_password_reset_tokens
+
+    client.post("/auth/signup", json={"email": "reset@example.com", "password": "password123"})
+    for _ in range(3):
+        client.post("/auth/forgot-password", json={"email": "reset@example.com"})
+
+    # Each request invalidates the previous tokens
+    tokens = session.exec(select(PasswordResetToken).order_by(PasswordResetToken.id)).all()
+    assert [token.used for token in tokens] == [True, True, False]
+    active = tokens[-1]
+
+    for hours in (-1, -2, -3):
+        session.add(PasswordResetToken(
+            user_id=active.user_id,
+            token=PasswordResetToken.generate_token(),
+            expires_at=PasswordResetToken.get_expiry(hours=hours),
+        ))
+    session.commit()
+
+    assert purge_password_reset_tokens(session, batch_size=2) == 5
+    remaining = session.exec(select(PasswordResetToken.token)).all()
+    assert remaining == [active.token]
+    assert purge_password_reset_tokens(session) == 0
+
+
+def test_auth_rate_limits_and_concurrency_cap(client: TestClient, monkeypatch):
+    import asyncio
+    from ..utils.rate_limit import auth_concurrency, parse_limit
+
+    client.post("/auth/signup", json={"email": "victim@example.com", "password": "password123"})
+    for _ in range(5):
+        response = client.post("/auth/signin", json={"email": "victim@example.com", "password": "wrong-password"})
+        assert response.status_code == 401
+
+    # This client's bucket for the email is empty, even for the right password (and any casing)
+    response = client.post("/auth/signin", json={"email": "Victim@Example.com", "password": "password123"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+    # The account owner signing in from elsewhere is not locked out
+    owner = TestClient(app, client=("203.0.113.7", 50000))
+    assert owner.post("/auth/signin", json={"email": "victim@example.com", "password": "password123"}).status_code == 200
+    # Other accounts from the same IP are unaffected
+    client.post("/auth/signup", json={"email": "other@example.com", "password": "password123"})
+    assert client.post("/auth/signin", json={"email": "other@example.com", "password": "password123"}).status_code == 200
+
+    # Every request released its slot, including the rejected ones
+    assert auth_concurrency.active == 0
+
+    # Requests over the concurrency cap are shed before doing any work
+    monkeypatch.setattr(auth_concurrency, "active", auth_concurrency.limit)
+    response = client.post("/auth/signin", json={"email": "other@example.com", "password": "password123"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    monkeypatch.undo()
+
+    # Buckets refill at the configured rate
+    now = [0.0]
+    backend = MemoryRateLimitBackend(clock=lambda: now[0])
+    rate, capacity = parse_limit("2/minute")
+    take = lambda: asyncio.run(backend.take("key", rate, capacity))
+    assert [take(), take()] == [0, 0]
+    assert take() == 30
+    now[0] = 29.0
+    assert take() == pytest.approx(1)
+    now[0] = 30.0
+    assert take() == 0
+
+
+def test_signin_uses_user_cache_and_single_insert_signup(client: TestClient, engine, session: Session):
+    from sqlalchemy import event
+    from ..models.password_reset import PasswordResetToken
+    from ..utils.security import dummy_password_hash, get_password_hash
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql))
+    dummy_password_hash()  # computed once; keep it out of the timing below
+
+    response = client.post("/auth/signup", json={"email": "cached@example.com", "password": "password123"})
+    assert response.status_code == 201
+    assert [sql.split()[0] for sql in statements] == ["INSERT"]
+
+    # The duplicate is caught by the unique constraint
+    response = client.post("/auth/signup", json={"email": "cached@example.com", "password": "password123"})
+    assert response.status_code == 409
+
+    # Sign-ins after sign-up are served from the cache (within the per-email rate limit);
+    # each only inserts its refresh token session
+    statements.clear()
+    for _ in range(2):
+        assert client.post("/auth/signin", json={"email": "cached@example.com", "password": "password123"}).status_code == 200
+    assert [sql.split()[:3] for sql in statements] == [["INSERT", "INTO", "authsession"]] * 2
+    assert client.post("/auth/signin", json={"email": "nobody@example.com", "password": "password123"}).status_code == 401
+
+    # A reset drops the cached hash: the old password stops working at once
+    client.post("/auth/forgot-password", json={"email": "cached@example.com"})
+    token = session.exec(select(PasswordResetToken.token)).one()
+    response = client.post("/auth/reset-password", json={"token": token, "new_password": "new-password123"})
+    assert response.status_code == 200
+    assert client.post("/auth/signin", json={"email": "cached@example.com", "password": "password123"}).status_code == 401
+    assert client.post("/auth/signin", json={"email": "cached@example.com", "password": "new-password123"}).status_code == 200
+
+    # A password changed by another process is picked up when the cached hash fails
+    user = session.exec(select(User).where(User.email == "cached@example.com")).one()
+    user.password_hash = get_password_hash("third-password")
+    session.add(user)
+    session.commit()
+    assert client.post("/auth/signin", json={"email": "cached@example.com", "password": "third-password"}).status_code == 200
+
+    # Another process resets the password while this one still caches the old
+    # hash: the old password checks out against the cache but gets no session
+    from ..models.auth_session import AuthSession
+
+    def reset_elsewhere(password):
+        user.password_hash = get_password_hash(password)
+        session.add(user)
+        session.commit()
+
+    auth_rate_limiter.backend = MemoryRateLimitBackend()
+    sessions = len(session.exec(select(AuthSession.id)).all())
+    reset_elsewhere("fourth-password")
+    assert client.post("/auth/signin", json={"email": "cached@example.com", "password": "third-password"}).status_code == 401
+    assert len(session.exec(select(AuthSession.id)).all()) == sessions
+    # Resetting to the same password (a new salt) still signs in, after one re-check
+    assert client.post("/auth/signin", json={"email": "cached@example.com", "password": "fourth-password"}).status_code == 200
+    reset_elsewhere("fourth-password")
+    assert client.post("/auth/signin", json={"email": "cached@example.com", "password": "fourth-password"}).status_code == 200
+
+
+def test_refresh_tokens_rotate_and_revoke(client: TestClient, engine, session: Session):
+    from sqlalchemy import event
+    from ..models.auth_session import AuthSession
+    from ..services.maintenance import purge_auth_sessions
+
+    client.post("/auth/signup", json={"email": "refresh@example.com", "password": "password123"})
+    tokens = client.post("/auth/signin", json={"email": "refresh@example.com", "password": "password123"}).json()
+    assert tokens["expires_in"] == 30 * 60
+    first = tokens["refresh_token"]
+    # Only the HMAC of the secret is stored
+    stored = session.exec(select(AuthSession)).one()
+    assert stored.token_hash not in first
+
+    # A refresh is one indexed lookup and one update, with no bcrypt
+    statements = []
+    listener = lambda conn, cursor, sql, *args: statements.append(sql.split()[0])
+    event.listen(engine, "before_cursor_execute", listener)
+    response = client.post("/auth/refresh", json={"refresh_token": first})
+    event.remove(engine, "before_cursor_execute", listener)
+    assert response.status_code == 200
+    assert statements == ["SELECT", "UPDATE"]
+    second = response.json()["refresh_token"]
+    assert second != first
+    user_id = session.exec(select(User.id)).one()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    assert client.get(f"/api/{user_id}/tasks", headers=headers).status_code == 200
+
+    # Replaying the rotated-out token ends the session, for the thief and the client
+    assert client.post("/auth/refresh", json={"refresh_token": first}).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": second}).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": "garbage"}).status_code == 401
+
+    # Sign-out ends one session; a password reset ends the rest
+    signin = {"email": "refresh@example.com", "password": "password123"}
+    phone = client.post("/auth/signin", json=signin).json()["refresh_token"]
+    laptop = client.post("/auth/signin", json=signin).json()["refresh_token"]
+    tablet = client.post("/auth/signin", json=signin).json()["refresh_token"]
+    assert client.post("/auth/signout", json={"refresh_token": phone}).status_code == 200
+    assert client.post("/auth/refresh", json={"refresh_token": phone}).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": laptop}).status_code == 200
+
+    reset_link = client.post("/auth/forgot-password", json={"email": "refresh@example.com"}).json()["reset_link"]
+    client.post("/auth/reset-password", json={"token": reset_link.split("token=")[1], "new_password": "new-password"})
+    assert client.post("/auth/refresh", json={"refresh_token": tablet}).status_code == 401
+    assert session.exec(select(AuthSession)).all() == []
+
+    # Expired sessions are refused and purged
+    expired = client.post("/auth/signin", json={"email": "refresh@example.com", "password": "new-password"}).json()
+    session.exec(select(AuthSession)).one().expires_at = datetime.utcnow() - timedelta(seconds=1)
+    session.commit()
+    assert client.post("/auth/refresh", json={"refresh_token": expired["refresh_token"]}).status_code == 401
+    assert purge_auth_sessions(session) == 1
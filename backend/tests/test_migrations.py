@@ -0,0 +1,65 @@
+import uuid
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, text
+from sqlmodel import SQLModel
+
+from ..database.engine import ALEMBIC_INI
+
+
+@pytest.fixture(name="migration_engine")
+def migration_engine_fixture(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    yield engine
+    engine.dispose()
+
+
+def run_migrations(engine, revision: str, downgrade: bool = False):
+    config = Config(ALEMBIC_INI)
+    config.attributes["configure_logger"] = False
+    with engine.connect() as connection:
+        config.attributes["connection"] = connection
+        (command.downgrade if downgrade else command.upgrade)(config, revision)
+
+
+def test_migrations_match_models(migration_engine):
+    run_migrations(migration_engine, "head")
+
+    with migration_engine.connect() as connection:
+        context = MigrationContext.configure(
+            connection,
+            opts={"include_object": lambda obj, name, type_, *_: not (type_ == "table" and name.startswith("task_fts"))},
+        )
+        assert compare_metadata(context, SQLModel.metadata) == []
+
+    run_migrations(migration_engine, "base", downgrade=True)
+
+
+def test_task_stats_migration_backfills_counters(migration_engine, monkeypatch):
+    from ..database import migrations
+
+    run_migrations(migration_engine, "0004")
+    user_ids = [str(uuid.uuid4()) for _ in range(3)]
+    with migration_engine.begin() as connection:
+        for i in range(30):
+            connection.execute(
+                text(
+                    "INSERT INTO task (title, completed, priority, user_id, created_at, updated_at, seq) "
+                    "VALUES (:title, :completed, 'medium', :user_id, '2024-01-01', '2024-01-01', 0)"
+                ),
+                {"title": f"Task {i}", "completed": i % 2 == 0, "user_id": user_ids[i % 3]},
+            )
+
+    # Small batches so the backfill crosses several batch boundaries
+    monkeypatch.setattr(migrations, "BACKFILL_BATCH_SIZE", 4)
+    run_migrations(migration_engine, "head")
+
+    with migration_engine.connect() as connection:
+        counters = connection.execute(text("SELECT task_count, completed_count FROM taskcounter")).all()
+        assert sorted(counters) == [(10, 5)] * 3
+        # Existing rows were indexed for search
+        assert connection.execute(text("SELECT count(*) FROM task_fts WHERE task_fts MATCH 'task'")).scalar() == 30
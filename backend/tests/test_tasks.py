@@ -1,12 +1,18 @@
+import base64
+import json
 import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session, SQLModel, create_engine
 from sqlmodel.pool import StaticPool
 from ..main import app
+from ..utils.rate_limit import MemoryRateLimitBackend, auth_rate_limiter
+from ..utils.user_cache import user_cache
 from ..database.engine import get_session
 from ..models.user import User
 from ..models.task import Task
 from uuid import uuid4
+from contextlib import contextmanager
+from sqlalchemy import event
 
 # Create a test database engine
 @pytest.fixture(name="engine")
@@ -30,6 +36,9 @@ def client_fixture(session):
         return session
 
     app.dependency_overrides[get_session] = get_session_override
+    # Fresh rate limit buckets (every test client shares one IP) and user cache
+    auth_rate_limiter.backend = MemoryRateLimitBackend()
+    user_cache.clear()
     client = TestClient(app)
     yield client
     app.dependency_overrides.clear()
@@ -58,4 +67,684 @@ def test_create_task(client: TestClient, session: Session):
     task = session.get(Task, data["id"])
     assert task is not None
     assert task.title == "Test Task"
-    assert task.user_id == user_id
\ No newline at end of file
+    assert task.user_id == user_id
+
+
+def auth_user(client: TestClient, email: str = "test@example.com"):
+    """Sign up and sign in a user, returning (user_id, auth headers)"""
+    user_id = client.post("/auth/signup", json={
+        "email": email,
+        "password": "password123"
+    }).json()["id"]
+    token = client.post("/auth/signin", json={
+        "email": email,
+        "password": "password123"
+    }).json()["access_token"]
+    return user_id, {"Authorization": f"Bearer {token}"}
+
+
+def test_get_tasks_keyset_pagination(client: TestClient, session: Session):
+    user_id, headers = auth_user(client)
+
+    for i in range(7):
+        client.post(f"/api/{user_id}/tasks", json={"title": f"Task {i}"}, headers=headers)
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(f"/api/{user_id}/tasks", params=params, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 3
+        seen.extend(task["id"] for task in page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert len(seen) == 7
+    assert len(set(seen)) == 7
+
+    response = client.get(f"/api/{user_id}/tasks", params={"cursor": "not-a-cursor"}, headers=headers)
+    assert response.status_code == 400
+
+    # Well-formed cursors with the wrong key shape are rejected too
+    for key in ([1, 2], [False, None, "x"], 5, [False, "yesterday", 1], ["no", None, 1]):
+        cursor = raw_cursor({"s": "updated_at:desc", "k": key})
+        response = client.get(f"/api/{user_id}/tasks", params={"cursor": cursor}, headers=headers)
+        assert response.status_code == 400, key
+
+
+def test_keyset_pages_are_index_ranges(session: Session):
+    """Pages match a full sort, and a deep page seeks instead of scanning from the start"""
+    import datetime
+    from sqlalchemy import text
+    from sqlmodel import select
+    from ..services.task_service import TaskService, build_page_query
+    from ..utils.pagination import encode_cursor
+
+    start = datetime.datetime(2024, 1, 1)
+    for i in range(30):
+        # Repeated timestamps, so id breaks ties
+        session.add(Task(title=f"Task {i}", user_id="keyset", completed=i % 3 == 0, updated_at=start + datetime.timedelta(minutes=i // 4)))
+    session.commit()
+    tasks = session.exec(select(Task).where(Task.user_id == "keyset")).all()
+
+    for order in ("desc", "asc"):
+        for completed in (None, True, False):
+            # Pending first in either order, then by (updated_at, id) in the requested order
+            expected = sorted(
+                sorted(
+                    (task for task in tasks if completed is None or task.completed == completed),
+                    key=lambda task: (task.updated_at, task.id),
+                    reverse=order == "desc",
+                ),
+                key=lambda task: task.completed,
+            )
+            seen, cursor = [], None
+            while True:
+                page, cursor = TaskService.get_tasks_page(session, "keyset", completed=completed, order=order, limit=4, cursor=cursor)
+                seen.extend(task.id for task in page)
+                if not cursor:
+                    break
+            assert seen == [task.id for task in expected], (order, completed)
+
+            last = expected[len(expected) // 2]
+            statement, _, _ = build_page_query(
+                "keyset", completed, None, "updated_at", order, 4,
+                encode_cursor([last.completed, last.updated_at, last.id], f"updated_at:{order}"),
+            )
+            sql = str(statement.compile(session.get_bind(), compile_kwargs={"literal_binds": True}))
+            plan = [row[-1] for row in session.exec(text("EXPLAIN QUERY PLAN " + sql)).all()]
+            reads = [line for line in plan if " task " in f"{line} "]
+            assert reads and all("ix_task_user_completed_updated_desc (user_id=? AND completed=?" in line for line in reads), plan
+            assert any("updated_at" in line for line in reads), plan
+            assert not any("RIGHT PART OF ORDER BY" in line for line in plan), plan
+
+
+def raw_cursor(payload) -> str:
+    """Encode an arbitrary cursor payload the way encode_cursor does"""
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+
+
+def test_batch_operations(client: TestClient, session: Session):
+    user_id, headers = auth_user(client)
+
+    response = client.post(f"/api/{user_id}/tasks:batch", json={"operations": [
+        {"op": "create", "task": {"title": "First"}},
+        {"op": "create", "task": {"title": "Second"}},
+        {"op": "create", "task": {"title": "Third"}},
+        {"op": "create", "task": {"title": "   "}},
+    ]}, headers=headers)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == ["ok", "ok", "ok", "invalid"]
+    first, second, third = (r["id"] for r in results[:3])
+
+    response = client.post(f"/api/{user_id}/tasks:batch", json={"operations": [
+        {"op": "update", "id": first, "changes": {"priority": "high"}},
+        {"op": "complete", "id": second},
+        {"op": "delete", "id": third},
+        {"op": "delete", "id": 999999},
+    ]}, headers=headers)
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == ["ok", "ok", "ok", "not_found"]
+    assert results[0]["task"]["priority"] == "high"
+    assert results[1]["task"]["completed"] is True
+    assert session.get(Task, third).deleted_at is not None
+
+
+@contextmanager
+def count_queries(engine):
+    """Count SQL statements sent to the database inside the block"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_task_mutation_round_trips(client: TestClient, engine):
+    # Each write is the change-sequence upsert plus one RETURNING statement;
+    # writes that can change the completed/live counts add one counter UPDATE
+    user_id, headers = auth_user(client)
+
+    with count_queries(engine) as statements:
+        response = client.post(f"/api/{user_id}/tasks", json={"title": "Round trips"}, headers=headers)
+    assert response.status_code == 201
+    assert len(statements) == 2
+    task_id = response.json()["id"]
+
+    with count_queries(engine) as statements:
+        response = client.put(f"/api/{user_id}/tasks/{task_id}", json={"title": "Renamed"}, headers=headers)
+    assert response.json()["title"] == "Renamed"
+    assert len(statements) == 2
+
+    with count_queries(engine) as statements:
+        response = client.patch(f"/api/{user_id}/tasks/{task_id}/complete", headers=headers)
+    assert response.json()["completed"] is True
+    assert len(statements) == 3
+
+    with count_queries(engine) as statements:
+        response = client.patch(f"/api/{user_id}/tasks/{task_id}/complete", headers=headers)
+    assert response.json()["completed"] is False
+    assert len(statements) == 3
+
+    with count_queries(engine) as statements:
+        response = client.delete(f"/api/{user_id}/tasks/{task_id}", headers=headers)
+    assert response.status_code == 204
+    assert len(statements) == 3
+
+    with count_queries(engine) as statements:
+        response = client.delete(f"/api/{user_id}/tasks/{task_id}", headers=headers)
+    assert response.status_code == 404
+    assert len(statements) == 3
+
+
+def test_task_list_etag_and_invalidation(client: TestClient, engine):
+    user_id, headers = auth_user(client)
+    client.post(f"/api/{user_id}/tasks", json={"title": "Cached"}, headers=headers)
+
+    response = client.get(f"/api/{user_id}/tasks", headers=headers)
+    etag = response.headers["ETag"]
+
+    with count_queries(engine) as statements:
+        response = client.get(f"/api/{user_id}/tasks", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert len(statements) == 0
+
+    client.post(f"/api/{user_id}/tasks", json={"title": "Invalidates"}, headers=headers)
+    response = client.get(f"/api/{user_id}/tasks", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    assert response.headers["ETag"] != etag
+
+
+def test_memory_cache_never_evicts_generations():
+    from ..services.task_cache import MemoryCacheBackend, TaskListCache
+
+    cache = TaskListCache(MemoryCacheBackend(maxsize=4))
+    cache.invalidate("user-1")
+    key, _ = cache.lookup("user-1", {"limit": 50})
+    cache.store(key, b"[]", '"etag"', None)
+
+    # Fill the LRU past maxsize; the generation was used before the page, so
+    # an LRU would evict it first and the next bump would land back on the
+    # generation the page is cached under
+    for i in range(3):
+        other, _ = cache.lookup("user-2", {"limit": i})
+        cache.store(other, b"[]", '"other"', None)
+
+    cache.invalidate("user-1")
+    assert cache.lookup("user-1", {"limit": 50})[1] is None
+
+
+class FakeRedis:
+    """Minimal stand-in for the subset of the redis-py API the cache uses"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+
+def test_task_list_cache_redis_backend():
+    from ..services.task_cache import RedisCacheBackend, TaskListCache
+
+    cache = TaskListCache(RedisCacheBackend(FakeRedis()))
+    key, entry = cache.lookup("user-1", {"limit": 50})
+    assert entry is None
+
+    cache.store(key, b"[]", '"etag"', None)
+    assert cache.lookup("user-1", {"limit": 50})[1] == (b"[]", '"etag"', None)
+    assert cache.lookup("user-1", {"limit": 10})[1] is None
+
+    cache.invalidate("user-1")
+    assert cache.lookup("user-1", {"limit": 50})[1] is None
+
+
+def test_task_list_cache_async_path_and_worker_guard():
+    import asyncio
+    from ..services.task_cache import RedisCacheBackend, TaskListCache, create_backend
+
+    class FakeAsyncRedis:
+        def __init__(self, sync):
+            self.sync = sync
+
+        async def get(self, key):
+            return self.sync.get(key)
+
+        async def set(self, key, value, ex=None):
+            self.sync.set(key, value, ex=ex)
+
+        async def incr(self, key):
+            return self.sync.incr(key)
+
+    class BlockingClient:
+        def __getattr__(self, name):
+            raise AssertionError("the async path must not use the sync client")
+
+    cache = TaskListCache(RedisCacheBackend(BlockingClient(), FakeAsyncRedis(FakeRedis())))
+
+    async def run():
+        key, entry = await cache.lookup_async("user-1", {"limit": 50})
+        assert entry is None
+        await cache.store_async(key, b"[]", '"etag"', None)
+        assert (await cache.lookup_async("user-1", {"limit": 50}))[1] == (b"[]", '"etag"', None)
+        await cache.invalidate_async("user-1")
+        assert (await cache.lookup_async("user-1", {"limit": 50}))[1] is None
+
+    asyncio.run(run())
+
+    # A per-process cache cannot see other workers' writes
+    assert create_backend("none", workers=4) is None
+    with pytest.raises(RuntimeError):
+        create_backend("memory", workers=4)
+
+
+def test_task_changes_since(client: TestClient):
+    user_id, headers = auth_user(client)
+    first = client.post(f"/api/{user_id}/tasks", json={"title": "First"}, headers=headers).json()["id"]
+    second = client.post(f"/api/{user_id}/tasks", json={"title": "Second"}, headers=headers).json()["id"]
+
+    changes = client.get(f"/api/{user_id}/tasks/changes", params={"since": 0}, headers=headers).json()
+    assert [task["id"] for task in changes["tasks"]] == [first, second]
+    assert changes["has_more"] is False
+    since = changes["since"]
+
+    changes = client.get(f"/api/{user_id}/tasks/changes", params={"since": since}, headers=headers).json()
+    assert changes["tasks"] == [] and changes["deleted_ids"] == []
+
+    client.patch(f"/api/{user_id}/tasks/{first}/complete", headers=headers)
+    client.delete(f"/api/{user_id}/tasks/{second}", headers=headers)
+
+    changes = client.get(f"/api/{user_id}/tasks/changes", params={"since": since}, headers=headers).json()
+    assert [task["id"] for task in changes["tasks"]] == [first]
+    assert changes["tasks"][0]["completed"] is True
+    assert changes["deleted_ids"] == [second]
+    assert changes["since"] > since
+
+
+def test_tombstone_purge_resets_stale_sync(client: TestClient, session: Session):
+    """Purged tombstones make clients that synced before them start over"""
+    from datetime import datetime, timedelta
+    from ..services.maintenance import JOBS, purge_task_tombstones
+
+    assert "purge-tombstones" in [job.name for job in JOBS]
+    user_id, headers = auth_user(client)
+    ids = [client.post(f"/api/{user_id}/tasks", json={"title": f"Task {i}"}, headers=headers).json()["id"] for i in range(4)]
+    stale_since = client.get(f"/api/{user_id}/tasks/changes", params={"since": 0}, headers=headers).json()["since"]
+    for task_id in ids[:3]:
+        client.delete(f"/api/{user_id}/tasks/{task_id}", headers=headers)
+    since = client.get(f"/api/{user_id}/tasks/changes", params={"since": stale_since}, headers=headers).json()["since"]
+
+    # Within the retention nothing is purged
+    assert purge_task_tombstones(session, retention_days=30) == 0
+    later = datetime.utcnow() + timedelta(days=31)
+    assert purge_task_tombstones(session, batch_size=2, now=later, retention_days=30) == 3
+    assert session.get(Task, ids[0]) is None
+
+    changes = client.get(f"/api/{user_id}/tasks/changes", params={"since": stale_since}, headers=headers).json()
+    assert changes["reset"] is True and changes["tasks"] == []
+    # A full resync and clients past the purged deletions carry on as usual
+    changes = client.get(f"/api/{user_id}/tasks/changes", params={"since": 0}, headers=headers).json()
+    assert changes["reset"] is False and [task["id"] for task in changes["tasks"]] == [ids[3]]
+    changes = client.get(f"/api/{user_id}/tasks/changes", params={"since": since}, headers=headers).json()
+    assert changes["reset"] is False and changes["deleted_ids"] == []
+
+
+def test_task_events_backpressure():
+    import asyncio
+    from ..services.task_events import LocalBroker, TooManySubscribersError, task_event
+
+    async def scenario():
+        broker = LocalBroker(queue_size=2, max_subscribers=1)
+        subscription = broker.subscribe("user-1")
+        with pytest.raises(TooManySubscribersError):
+            broker.subscribe("user-1")
+
+        broker.publish("user-1", [task_event("created", 1, 1)])
+        await asyncio.sleep(0)
+        assert (await subscription.get())["seq"] == 1
+
+        # A consumer that falls behind gets one resync marker instead of the backlog
+        broker.publish("user-1", [task_event("updated", 1, seq) for seq in range(2, 6)])
+        await asyncio.sleep(0)
+        assert await subscription.get() == {"type": "resync", "since": 1}
+
+        subscription.close()
+        assert not broker.has_subscribers("user-1")
+
+    asyncio.run(scenario())
+
+
+def test_redis_broker_publishes_without_blocking():
+    import asyncio
+    from ..services.task_events import RedisBroker, task_event
+
+    class FakeAsyncRedis:
+        def __init__(self):
+            self.published = []
+
+        async def publish(self, channel, message):
+            self.published.append((channel, json.loads(message)))
+
+    class BlockingClient:
+        def __getattr__(self, name):
+            raise AssertionError("the async path must not use the sync client")
+
+    async_client = FakeAsyncRedis()
+    broker = RedisBroker(BlockingClient(), async_client)
+    asyncio.run(broker.publish_async("user-1", [task_event("deleted", 7, 3)]))
+    assert async_client.published == [("task_events:user-1", [{"type": "deleted", "id": 7, "seq": 3}])]
+
+
+def test_redis_broker_listener_reconnects_and_resyncs():
+    import asyncio
+    from ..services.task_events import RedisBroker
+
+    class FakePubSub:
+        def __init__(self, messages):
+            self.messages = messages
+            self.closed = False
+
+        async def psubscribe(self, pattern):
+            pass
+
+        async def listen(self):
+            for message in self.messages:
+                if isinstance(message, Exception):
+                    raise message
+                yield message
+
+        async def close(self):
+            self.closed = True
+
+    def pmessage(data):
+        return {"type": "pmessage", "channel": b"task_events:user-1", "data": data}
+
+    connections = [
+        [pmessage(json.dumps([{"type": "created", "id": 1, "seq": 1}])), pmessage("not json"), ConnectionError("lost")],
+        [pmessage(json.dumps([{"type": "updated", "id": 1, "seq": 2}]))],
+    ]
+
+    class FakeAsyncRedis:
+        def __init__(self):
+            self.pubsubs = []
+
+        def pubsub(self):
+            self.pubsubs.append(FakePubSub(connections[len(self.pubsubs)] if len(self.pubsubs) < len(connections) else []))
+            return self.pubsubs[-1]
+
+    async def scenario():
+        async_client = FakeAsyncRedis()
+        broker = RedisBroker(None, async_client, reconnect_delay=0, max_reconnect_delay=0)
+        subscription = broker.subscribe("user-1")
+
+        assert (await asyncio.wait_for(subscription.get(), 1))["seq"] == 1
+        # A malformed message and the dropped connection each tell the client to catch up
+        assert (await asyncio.wait_for(subscription.get(), 1))["type"] == "resync"
+        assert (await asyncio.wait_for(subscription.get(), 1))["type"] == "resync"
+        # and the listener carries on with a new connection
+        assert (await asyncio.wait_for(subscription.get(), 1))["seq"] == 2
+        assert len(async_client.pubsubs) >= 2 and async_client.pubsubs[0].closed
+
+        subscription.close()
+        await asyncio.wait_for(broker._listener, 1)
+
+    asyncio.run(scenario())
+
+
+def test_export_tasks(client: TestClient):
+    import csv
+    import io
+    import json
+
+    user_id, headers = auth_user(client)
+    first = client.post(f"/api/{user_id}/tasks", json={"title": "Buy milk, eggs"}, headers=headers).json()["id"]
+    second = client.post(f"/api/{user_id}/tasks", json={"title": "Walk dog"}, headers=headers).json()["id"]
+    deleted = client.post(f"/api/{user_id}/tasks", json={"title": "Gone"}, headers=headers).json()["id"]
+    client.delete(f"/api/{user_id}/tasks/{deleted}", headers=headers)
+
+    response = client.get(f"/api/{user_id}/tasks/export", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [first, second]
+    assert rows[0]["title"] == "Buy milk, eggs"
+
+    response = client.get(f"/api/{user_id}/tasks/export", params={"format": "csv"}, headers=headers)
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["title"] for row in rows] == ["Buy milk, eggs", "Walk dog"]
+
+    response = client.get(f"/api/{user_id}/tasks/export", params={"format": "xml"}, headers=headers)
+    assert response.status_code == 422
+
+
+def test_import_tasks(client: TestClient):
+    user_id, headers = auth_user(client)
+    body = (
+        '{"title": "Buy milk", "priority": "high"}\n'
+        '\n'
+        '{"title": "  "}\n'
+        'not json\n'
+        '{"title": "Walk dog", "completed": "maybe"}\n'
+        '{"title": "Call mom", "due_date": "2030-01-01T00:00:00"}\n'
+    )
+    response = client.post(f"/api/{user_id}/tasks/import", content=body, headers=headers)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["imported"] == 2
+    assert result["failed"] == 3
+    assert [error["line"] for error in result["errors"]] == [3, 4, 5]
+
+    # A CSV export can be imported back
+    export = client.get(f"/api/{user_id}/tasks/export", params={"format": "csv"}, headers=headers).text
+    response = client.post(
+        f"/api/{user_id}/tasks/import",
+        content=export,
+        headers={**headers, "Content-Type": "text/csv"},
+    )
+    assert response.json() == {"imported": 2, "failed": 0, "errors": []}
+
+    tasks = client.get(f"/api/{user_id}/tasks", headers=headers).json()
+    assert sorted(task["title"] for task in tasks) == ["Buy milk", "Buy milk", "Call mom", "Call mom"]
+
+
+def test_search_tasks(client: TestClient):
+    user_id, headers = auth_user(client)
+    milk = client.post(f"/api/{user_id}/tasks", json={"title": "Buy milk"}, headers=headers).json()["id"]
+    call = client.post(
+        f"/api/{user_id}/tasks", json={"title": "Call mom", "description": "ask about the milk"}, headers=headers
+    ).json()["id"]
+    bread = client.post(f"/api/{user_id}/tasks", json={"title": "Buy bread"}, headers=headers).json()["id"]
+
+    def search(**params):
+        response = client.get(f"/api/{user_id}/tasks/search", params=params, headers=headers)
+        assert response.status_code == 200
+        return [task["id"] for task in response.json()], response.headers.get("X-Next-Cursor")
+
+    # Prefix match; title matches rank above description matches
+    assert search(q="mil")[0] == [milk, call]
+    assert search(q="buy milk")[0] == [milk]
+
+    # Edits and deletes are reflected
+    client.put(f"/api/{user_id}/tasks/{bread}", json={"title": "Buy cheese"}, headers=headers)
+    assert search(q="bread")[0] == []
+    assert search(q="chee")[0] == [bread]
+    client.delete(f"/api/{user_id}/tasks/{milk}", headers=headers)
+    assert search(q="milk")[0] == [call]
+
+    # Keyset pagination
+    client.post(f"/api/{user_id}/tasks", json={"title": "Buy eggs"}, headers=headers)
+    first_page, cursor = search(q="buy", limit=1)
+    second_page, cursor = search(q="buy", limit=1, cursor=cursor)
+    assert cursor is None
+    assert len(set(first_page + second_page)) == 2
+
+    response = client.get(f"/api/{user_id}/tasks/search", params={"q": "buy", "cursor": "bogus"}, headers=headers)
+    assert response.status_code == 400
+    # Well-formed cursors for this query with a key of the wrong shape
+    for key in ([1], [1.5, 2, 3], {"rank": 1}, [None, 1]):
+        cursor = raw_cursor({"k": key, "s": "search:buy"})
+        response = client.get(f"/api/{user_id}/tasks/search", params={"q": "buy", "cursor": cursor}, headers=headers)
+        assert response.status_code == 400
+
+
+def test_task_stats(client: TestClient):
+    user_id, headers = auth_user(client)
+    ids = [
+        client.post(f"/api/{user_id}/tasks", json=task, headers=headers).json()["id"]
+        for task in (
+            {"title": "Done", "completed": True},
+            {"title": "Late", "due_date": "2000-01-01T00:00:00"},
+            {"title": "Soon", "due_date": "2999-01-01T00:00:00"},
+            {"title": "Gone"},
+        )
+    ]
+    client.patch(f"/api/{user_id}/tasks/{ids[2]}/complete", headers=headers)
+    client.put(f"/api/{user_id}/tasks/{ids[0]}", json={"completed": True}, headers=headers)
+    client.delete(f"/api/{user_id}/tasks/{ids[3]}", headers=headers)
+    client.post(f"/api/{user_id}/tasks:batch", json={"operations": [
+        {"op": "create", "task": {"title": "Batched", "completed": True}},
+        {"op": "complete", "id": ids[1]},
+        {"op": "delete", "id": ids[1]},
+    ]}, headers=headers)
+
+    response = client.get(f"/api/{user_id}/tasks/stats", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {"total": 3, "completed": 3, "pending": 0, "overdue": 0}
+
+
+def test_verify_task_counters(client: TestClient, session: Session):
+    from ..models.task_counter import TaskCounter
+    from ..services.task_service import TaskService
+
+    user_id, headers = auth_user(client)
+    client.post(f"/api/{user_id}/tasks", json={"title": "Late", "due_date": "2000-01-01T00:00:00"}, headers=headers)
+    client.post(f"/api/{user_id}/tasks", json={"title": "Done", "completed": True}, headers=headers)
+    assert TaskService.verify_counters(session) == []
+
+    counter = session.get(TaskCounter, user_id)
+    counter.task_count = 7
+    session.add(counter)
+    session.commit()
+
+    drift = TaskService.verify_counters(session, fix=True)
+    assert [(row["task_count"], row["expected_task_count"]) for row in drift] == [(7, 2)]
+    assert TaskService.verify_counters(session) == []
+    assert client.get(f"/api/{user_id}/tasks/stats", headers=headers).json() == {
+        "total": 2, "completed": 1, "pending": 1, "overdue": 1
+    }
+
+
+def test_query_instrumentation(engine):
+    from sqlalchemy import text
+    from ..database.instrumentation import (
+        DB_N_PLUS_ONE_THRESHOLD,
+        RequestQueries,
+        fingerprint,
+        instrument_engine,
+        request_queries,
+    )
+
+    # Parameter lists of any length share one fingerprint
+    assert fingerprint("SELECT * FROM task WHERE id IN (?, ?, ?)") == fingerprint("SELECT * FROM task WHERE id IN (?)")
+    assert fingerprint("SELECT * FROM task WHERE id = 1")[1] == "SELECT * FROM task WHERE id = ?"
+
+    instrument_engine(engine)
+    queries = RequestQueries()
+    token = request_queries.set(queries)
+    try:
+        with engine.connect() as connection:
+            for task_id in range(DB_N_PLUS_ONE_THRESHOLD):
+                connection.execute(text("SELECT * FROM task WHERE id = :id"), {"id": task_id})
+    finally:
+        request_queries.reset(token)
+
+    assert queries.count == DB_N_PLUS_ONE_THRESHOLD
+    assert queries.fingerprints.most_common(1)[0][1] == DB_N_PLUS_ONE_THRESHOLD
+
+
+def test_prometheus_metrics(client: TestClient):
+    user_id, headers = auth_user(client)
+    client.post(f"/api/{user_id}/tasks", json={"title": "Metered"}, headers=headers)
+    client.get(f"/api/{user_id}/tasks/999999", headers=headers)
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    # Labelled by route template, not by the concrete path
+    assert 'http_requests_total{method="POST",route="/api/{user_id}/tasks",status="201"}' in body
+    assert 'http_requests_total{method="GET",route="/api/{user_id}/tasks/{id}",status="404"}' in body
+    assert f'route="/api/{user_id}' not in body
+    assert 'http_request_duration_seconds_bucket{method="POST",route="/api/{user_id}/tasks",le="+Inf"}' in body
+    assert "http_response_size_bytes_count" in body
+    assert "http_requests_in_flight" in body
+    assert 'password_hash_duration_seconds_count{operation="hash"}' in body
+
+
+def test_request_profiling(client: TestClient, tmp_path):
+    import json
+    import time
+    from ..middleware.profiling import ProfilingMiddleware
+
+    user_id, headers = auth_user(client, email="admin@example.com")
+    _, other_headers = auth_user(client, email="other@example.com")
+    profiled = TestClient(ProfilingMiddleware(app, admin_emails={"admin@example.com"}, directory=str(tmp_path)))
+
+    # Only admin tokens can trigger a profile
+    response = profiled.get(f"/api/{user_id}/tasks", headers={**other_headers, "X-Profile": "1"})
+    assert "x-profile-id" not in response.headers
+    response = profiled.get(f"/api/{user_id}/tasks", headers=headers)
+    assert "x-profile-id" not in response.headers
+
+    response = profiled.get(f"/api/{user_id}/tasks", headers={**headers, "X-Profile": "1"})
+    assert response.status_code == 200
+    profile_path = tmp_path / f"{response.headers['x-profile-id']}.speedscope.json"
+    # The sampler thread writes the file after the response is sent
+    for _ in range(100):
+        if profile_path.exists():
+            break
+        time.sleep(0.01)
+    profile = json.loads(profile_path.read_text())
+    assert profile["name"] == "GET /api/{user_id}/tasks"
+    assert all(p["type"] == "sampled" for p in profile["profiles"])
+
+
+def test_serialize_task_list_matches_task_read(session: Session):
+    import datetime
+    import json
+    from ..api.tasks import serialize_task_list, task_to_read
+
+    user_id = str(uuid4())
+    tasks = [
+        Task(title="Overdue", user_id=user_id, due_date=datetime.datetime(2000, 1, 1)),
+        Task(title="Done", description="Finished", user_id=user_id, completed=True, due_date=datetime.datetime(2000, 1, 1)),
+        Task(title="Open", user_id=user_id, priority="high"),
+    ]
+    session.add_all(tasks)
+    session.commit()
+
+    # The fast path must produce exactly what TaskRead would
+    expected = [task_to_read(task).model_dump(mode="json") for task in tasks]
+    assert json.loads(serialize_task_list(tasks)) == expected
+    assert [task["is_overdue"] for task in expected] == [True, False, False]
@@ -121,8 +121,8 @@ const DashboardPage = () => {
     setEditForm({ title: '', priority: '', dueDate: '', description: '' });
   };
 
-  const handleLogout = () => {
-    authService.signout();
+  const handleLogout = async () => {
+    await authService.signout();
     router.push('/auth/login');
   };
 
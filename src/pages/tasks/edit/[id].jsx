@@ -21,15 +21,8 @@ const EditTaskPage = () => {
   const fetchTask = async () => {
     try {
       setLoading(true);
-      // In a real app, we would fetch the specific task by ID
-      // For now, we'll simulate by getting all tasks and finding the one with the matching ID
-      const tasks = await taskService.getTasks(userId);
-      const foundTask = tasks.find(t => t.id === parseInt(id));
-      if (foundTask) {
-        setTask(foundTask);
-      } else {
-        setError('Task not found');
-      }
+      const foundTask = await taskService.getTask(userId, parseInt(id));
+      setTask(foundTask);
     } catch (err) {
       setError(err.message);
     } finally {
@@ -21,9 +21,10 @@ export const authService = {
         password,
       });
       
-      // Store the token in localStorage
+      // Store the tokens in localStorage
       if (response.data.access_token) {
         localStorage.setItem('access_token', response.data.access_token);
+        localStorage.setItem('refresh_token', response.data.refresh_token);
       }
       
       return response.data;
@@ -33,8 +34,17 @@ export const authService = {
   },
 
   async signout() {
-    // Remove the token from localStorage
+    // End the server-side session, then remove the tokens from localStorage
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (refreshToken) {
+      try {
+        await api.post('/auth/signout', { refresh_token: refreshToken });
+      } catch (error) {
+        // Signing out locally still works if the request fails
+      }
+    }
     localStorage.removeItem('access_token');
+    localStorage.removeItem('refresh_token');
   },
 
   isAuthenticated() {
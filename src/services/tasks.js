@@ -4,13 +4,31 @@ import api from './api';
 export const taskService = {
   async getTasks(userId) {
     try {
-      const response = await api.get(`/api/${userId}/tasks`);
-      return response.data;
+      // The list is paginated: follow X-Next-Cursor until the last page
+      const tasks = [];
+      let cursor;
+      do {
+        const response = await api.get(`/api/${userId}/tasks`, {
+          params: { limit: 200, cursor },
+        });
+        tasks.push(...response.data);
+        cursor = response.headers['x-next-cursor'];
+      } while (cursor);
+      return tasks;
     } catch (error) {
       throw new Error(error.response?.data?.detail || 'Failed to fetch tasks');
     }
   },
 
+  async getTask(userId, taskId) {
+    try {
+      const response = await api.get(`/api/${userId}/tasks/${taskId}`);
+      return response.data;
+    } catch (error) {
+      throw new Error(error.response?.data?.detail || 'Failed to fetch task');
+    }
+  },
+
   async createTask(userId, taskData) {
     try {
       const response = await api.post(`/api/${userId}/tasks`, taskData);